@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# serve the read endpoints with the async views (orders_app/async_views.py)
+os.environ.setdefault('ORDERS_ASYNC_VIEWS', 'true')
 
 application = get_asgi_application()
@@ -43,15 +43,27 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'orders_app.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # runs ORDERS_SITE_MIDDLEWARE for everything outside ORDERS_API_PREFIX
+    'orders_app.middleware.SiteMiddleware',
+    'orders_app.middleware.TenantMiddleware',
+    'orders_app.middleware.AdmissionMiddleware',
+]
+
+# API requests (ORDERS_API_PREFIX) go straight from SecurityMiddleware to
+# TenantMiddleware; docs, schema and admin get the usual stack below.
+ORDERS_API_PREFIX = '/api/'
+ORDERS_SITE_MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'orders_app.middleware.TenantMiddleware'
 ]
+# admin looks for sessions/auth/messages in MIDDLEWARE itself; SiteMiddleware runs them
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
 
 ROOT_URLCONF = 'config.urls'
 
@@ -85,9 +97,119 @@ DATABASES = {
         "PASSWORD": config("POSTGRES_PASSWORD", "postgres"),
         "HOST": config("POSTGRES_HOST", "localhost"),
         "PORT": config("POSTGRES_PORT", "5432"),
+        "OPTIONS": {},
+    }
+}
+
+# Connection pool (psycopg_pool, one per process). Without it, connections are
+# opened per request unless POSTGRES_CONN_MAX_AGE keeps them around.
+# CONN_HEALTH_CHECKS checks a connection on checkout in either mode, so a
+# restarted server does not surface as request errors.
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = config("POSTGRES_CONN_HEALTH_CHECKS", default=True, cast=bool)
+if config("POSTGRES_POOL_ENABLED", default=True, cast=bool):
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": config("POSTGRES_POOL_MIN_SIZE", default=2, cast=int),
+        "max_size": config("POSTGRES_POOL_MAX_SIZE", default=20, cast=int),
+        # seconds an idle connection above min_size is kept before closing
+        "max_idle": config("POSTGRES_POOL_MAX_IDLE", default=300.0, cast=float),
+        # seconds a request waits for a free connection before failing
+        "timeout": config("POSTGRES_POOL_TIMEOUT", default=10.0, cast=float),
     }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = config("POSTGRES_CONN_MAX_AGE", default=0, cast=int)
+
+# Run the hot statements (idempotency claim, confirm/close, first list page) as
+# server-side prepared statements. Turn off behind a transaction-mode PgBouncer.
+ORDERS_PREPARED_STATEMENTS = config("ORDERS_PREPARED_STATEMENTS", default=True, cast=bool)
+
+
+# -------------------------------
+# Cache
+# -------------------------------
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Replay cache in front of the IdempotencyKey table. SHARED_CACHE names a
+# CACHES alias shared between workers; leave it empty for in-process only.
+IDEMPOTENCY_REPLAY_CACHE = {
+    "ENABLED": config("IDEMPOTENCY_REPLAY_CACHE_ENABLED", default=True, cast=bool),
+    "LOCAL_MAX_ENTRIES": config("IDEMPOTENCY_REPLAY_CACHE_MAX_ENTRIES", default=10000, cast=int),
+    "SHARED_CACHE": config("IDEMPOTENCY_REPLAY_CACHE_ALIAS", default="default"),
+}
+
+# Upper bound on items accepted by the batch endpoints (and ids per multi-get)
+ORDERS_BATCH_MAX_ITEMS = config("ORDERS_BATCH_MAX_ITEMS", default=500, cast=int)
+
+# Generate time-ordered (UUIDv7) ids for new orders and outbox rows; existing
+# v4 ids stay valid. Also switches the list endpoint to compact id-only cursors.
+ORDERS_TIME_ORDERED_IDS = config("ORDERS_TIME_ORDERED_IDS", default=False, cast=bool)
+
+# Seconds a recently read or written order version may answer If-None-Match
+# without a query (0 disables); entries live in the ORDERS_VERSION_CACHE_ALIAS cache.
+ORDERS_VERSION_CACHE_TTL = config("ORDERS_VERSION_CACHE_TTL", default=2, cast=int)
+ORDERS_VERSION_CACHE_ALIAS = config("ORDERS_VERSION_CACHE_ALIAS", default="default")
+
+# Change feed (GET /orders/changes). Rows updated within LAG_SECONDS are held
+# back so a transaction that commits late cannot slip behind a handed-out cursor.
+ORDERS_CHANGES = {
+    "LAG_SECONDS": config("ORDERS_CHANGES_LAG_SECONDS", default=1.0, cast=float),
+    "MAX_WAIT_SECONDS": config("ORDERS_CHANGES_MAX_WAIT_SECONDS", default=25.0, cast=float),
+    "POLL_INTERVAL_SECONDS": config("ORDERS_CHANGES_POLL_INTERVAL_SECONDS", default=0.5, cast=float),
+}
+
+# Route the read endpoints (list, detail, multi-get, changes) to async views.
+# config/asgi.py turns this on; WSGI deployments keep the APIView versions.
+ORDERS_ASYNC_VIEWS = config("ORDERS_ASYNC_VIEWS", default=False, cast=bool)
+
+# Validate X-Tenant-Id against the Tenant table (cached in memory, reloaded every
+# TTL_SECONDS). Off by default: any tenant id is accepted, as before.
+ORDERS_TENANT_REGISTRY = {
+    "VALIDATE": config("ORDERS_TENANT_VALIDATION", default=False, cast=bool),
+    "TTL_SECONDS": config("ORDERS_TENANT_REGISTRY_TTL", default=30.0, cast=float),
+}
+
+# Per-tenant admission control for API requests. RATE is tokens per second,
+# BURST the bucket size; MAX_CONCURRENT caps a tenant's in-flight requests per
+# process (0 = no cap). BACKEND "local" keeps buckets in process memory
+# (limits apply per worker); "cache" shares them through CACHE_ALIAS. Tenants
+# can override via their config ("rate_limits", "max_concurrent").
+ORDERS_RATE_LIMITS = {
+    "ENABLED": config("ORDERS_RATE_LIMITS_ENABLED", default=False, cast=bool),
+    "BACKEND": config("ORDERS_RATE_LIMITS_BACKEND", default="local"),
+    "CACHE_ALIAS": config("ORDERS_RATE_LIMITS_CACHE_ALIAS", default="default"),
+    "MAX_CONCURRENT": config("ORDERS_TENANT_MAX_CONCURRENT", default=8, cast=int),
+    "ENDPOINTS": {
+        "create": {"RATE": 50, "BURST": 100},
+        "transitions": {"RATE": 50, "BURST": 100},
+        "list": {"RATE": 100, "BURST": 200},
+        "export": {"RATE": 0.2, "BURST": 2},
+    },
+}
+
+# Group commit for POST /api/orders/: concurrent creates in one worker process
+# wait up to MAX_DELAY_MS for each other and are committed as one multi-row
+# INSERT (at most MAX_SIZE per batch). Pays off with threaded WSGI workers;
+# sync views under ASGI run one at a time, so there is nothing to batch.
+ORDERS_CREATE_BATCHING = {
+    "ENABLED": config("ORDERS_CREATE_BATCHING", default=False, cast=bool),
+    "MAX_DELAY_MS": config("ORDERS_CREATE_BATCH_DELAY_MS", default=2.0, cast=float),
+    "MAX_SIZE": config("ORDERS_CREATE_BATCH_SIZE", default=64, cast=int),
+}
+
+# Closed orders created more than AFTER_DAYS ago are moved to the archive table
+# by `manage.py archive_orders`; list pages reaching past that window, single
+# reads and exports also read the archive. 0 turns archival and the fallback off.
+# Only raise it after moving archived rows back: reads skip the archive for
+# orders newer than the window.
+ORDERS_ARCHIVE = {
+    "AFTER_DAYS": config("ORDERS_ARCHIVE_AFTER_DAYS", default=0, cast=int),
 }
 
+# Per-route latency / SQL counters served in Prometheus format at /metrics
+ORDERS_METRICS_ENABLED = config("ORDERS_METRICS_ENABLED", default=True, cast=bool)
 
 
 # Password validation
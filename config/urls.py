@@ -17,6 +17,7 @@ Including another URLconf
 # from django.contrib import admin
 from django.urls import path,include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from orders_app.views import MetricsView
 
 
 urlpatterns = [
@@ -24,4 +25,5 @@ urlpatterns = [
     path('api/orders/',include('orders_app.urls')),
     path('schema/', SpectacularAPIView.as_view(), name='schema'),
     path('docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class OrdersAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders_app'
+
+    def ready(self):
+        from . import lookups  # noqa: F401  (registers UUIDField __any)
+        from . import metrics  # noqa: F401  (counts SQL per request)
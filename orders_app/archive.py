@@ -0,0 +1,120 @@
+# orders_app/archive.py
+"""
+Cold storage for closed orders.
+
+`archive_orders` moves closed orders created more than ORDERS_ARCHIVE["AFTER_DAYS"]
+ago from Order into OrderArchive, so the hot table and the indexes every list
+and transition query relies on only hold recent and still-open orders. Reads
+stay transparent: a list page that reaches past the hot window is merged with
+the archive, and an id missing from Order is looked up there. AFTER_DAYS = 0
+(the default) turns both off.
+"""
+import heapq
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .models import Order, OrderArchive, TenantOrderStats
+
+ORDER_TABLE = Order._meta.db_table
+ARCHIVE_TABLE = OrderArchive._meta.db_table
+
+# One batch of one tenant per statement: the oldest closed orders past the
+# cutoff, found through orders_tenant_status_idx, are deleted and inserted into
+# the archive together. SKIP LOCKED leaves rows a request is working on for the
+# next run.
+_MOVE_SQL = """
+WITH moved AS (
+    DELETE FROM {orders}
+    WHERE ctid = ANY(ARRAY(
+        SELECT ctid FROM {orders}
+        WHERE tenant_id = %(tenant_id)s AND status = %(closed)s AND created_at < %(cutoff)s
+        ORDER BY created_at
+        LIMIT %(batch_size)s
+        FOR UPDATE SKIP LOCKED
+    ))
+    RETURNING id, tenant_id, status, version, total_cents, created_at, updated_at
+)
+INSERT INTO {archive} (id, tenant_id, status, version, total_cents, created_at, updated_at, archived_at)
+SELECT id, tenant_id, status, version, total_cents, created_at, updated_at, %(now)s FROM moved
+""".format(orders=ORDER_TABLE, archive=ARCHIVE_TABLE)
+
+
+def _options():
+    return getattr(settings, "ORDERS_ARCHIVE", {})
+
+
+def enabled():
+    return _options().get("AFTER_DAYS", 0) > 0
+
+
+def window_start(now=None):
+    """Orders created before this may be archived; None when archival is off."""
+    if not enabled():
+        return None
+    return (now or timezone.now()) - timedelta(days=_options()["AFTER_DAYS"])
+
+
+def tenants_with_closed_orders():
+    return list(
+        TenantOrderStats.objects.filter(status=Order.Status.CLOSED, order_count__gt=0)
+        .order_by("tenant_id").values_list("tenant_id", flat=True)
+    )
+
+
+def move_batch(tenant_id, cutoff, batch_size):
+    """Archive up to `batch_size` of the tenant's closed orders created before `cutoff`; returns rows moved."""
+    with connection.cursor() as cursor:
+        cursor.execute(_MOVE_SQL, {
+            "tenant_id": tenant_id,
+            "closed": Order.Status.CLOSED,
+            "cutoff": cutoff,
+            "batch_size": batch_size,
+            "now": timezone.now(),
+        })
+        return cursor.rowcount
+
+
+# --- read fallback ---
+
+def archived_orders(tenant_id, filters=None):
+    """
+    The tenant's archived orders matching the list filters, or None when the
+    archive cannot hold any (archival off, or a status other than closed).
+    """
+    filters = filters or {}
+    if not enabled() or filters.get("status", Order.Status.CLOSED) != Order.Status.CLOSED:
+        return None
+    return OrderArchive.objects.filter(tenant_id=tenant_id, **filters)
+
+
+def reaches_archive(rows, limit):
+    """
+    True when a list page of hot `rows` (up to limit + 1, list order) may
+    continue into the archive: the hot table ran out, or the page already
+    reaches orders older than the hot window. Archived orders are all older
+    than the window, so a full page of newer rows never needs them.
+    """
+    start = window_start()
+    if start is None:
+        return False
+    return len(rows) <= limit or rows[-1].created_at < start
+
+
+def merge(rows, archived_rows, limit):
+    """The first limit + 1 rows of two list-ordered (created_at DESC, id DESC) row lists."""
+    merged = heapq.merge(rows, archived_rows, key=lambda row: (row.created_at, row.id), reverse=True)
+    return [row for row, _ in zip(merged, range(limit + 1))]
+
+
+def table_sizes():
+    """(table size, index size, estimated live rows) of the hot order table."""
+    with connection.cursor() as cursor:
+        # publish this session's row counts (from the batches just run) first; Postgres 15+
+        cursor.execute("SELECT pg_stat_force_next_flush()")
+        cursor.execute(
+            "SELECT pg_size_pretty(pg_table_size(%s::regclass)), pg_size_pretty(pg_indexes_size(%s::regclass)), "
+            "(SELECT n_live_tup FROM pg_stat_user_tables WHERE relid = %s::regclass)",
+            [ORDER_TABLE] * 3,
+        )
+        return cursor.fetchone()
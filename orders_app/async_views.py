@@ -0,0 +1,134 @@
+# orders_app/async_views.py
+"""
+Async variants of the read endpoints, routed instead of the APIView versions when
+ORDERS_ASYNC_VIEWS is on (the default under config.asgi). Responses match the
+sync views field for field; only the handlers and ORM calls are async.
+"""
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
+from .encoders import ORDER_COLUMNS, VERSION, encode_row, encode_rows
+from .filters import FilterError, created_range, list_filters
+from .models import Order
+from .pagination import KeysetPagination, InvalidCursor
+from . import archive
+from . import changes
+from . import export
+from . import reads
+
+
+def _error(code, message, status):
+    return JsonResponse({"code": code, "message": message}, status=status)
+
+
+def _not_modified(version):
+    response = HttpResponse(status=304)
+    response["ETag"] = reads.etag(version)
+    return response
+
+
+class AsyncOrderListView(View):
+    async def get(self, request):
+        tenant_id = request.tenant_id
+        try:
+            filters, filter_key = list_filters(request.GET)
+        except FilterError as exc:
+            return _error("invalid_filter", str(exc), 400)
+        paginator = KeysetPagination()
+        try:
+            paginator.get_limit(request)
+        except ValueError as exc:
+            return _error("invalid_param", str(exc), 400)
+
+        qs = Order.objects.filter(tenant_id=tenant_id, **filters).values_list(*ORDER_COLUMNS, named=True)
+        archived = archive.archived_orders(tenant_id, filters)
+        if archived is not None:
+            archived = archived.values_list(*ORDER_COLUMNS, named=True)
+        try:
+            items, next_cursor = await paginator.apaginate_queryset(qs, request, filter_key=filter_key,
+                                                                    archived=archived)
+        except InvalidCursor as exc:
+            return _error("invalid_cursor", str(exc), 400)
+        return JsonResponse({"items": encode_rows(items), "nextCursor": next_cursor})
+
+
+class AsyncOrderDetailView(View):
+    async def get(self, request, id):
+        tenant_id = request.tenant_id
+
+        tags = reads.if_none_match(request.headers.get("If-None-Match"))
+        if tags is not None:
+            version = await reads.acached_version(tenant_id, id)
+            if version is not None and reads.not_modified(version, tags):
+                return _not_modified(version)
+
+        row = await reads.aget_order(tenant_id, id)
+        if row is None:
+            return _error("not_found", "order not found", 404)
+        if reads.not_modified(row[VERSION], tags):
+            return _not_modified(row[VERSION])
+        response = JsonResponse(encode_row(row))
+        response["ETag"] = reads.etag(row[VERSION])
+        return response
+
+
+class AsyncOrderMultiGetView(View):
+    async def get(self, request):
+        tenant_id = request.tenant_id
+        try:
+            ids = reads.parse_ids(request.GET.getlist("ids"), settings.ORDERS_BATCH_MAX_ITEMS)
+        except ValueError as exc:
+            return _error("invalid_ids", str(exc), 400)
+
+        rows = await reads.aget_orders(tenant_id, ids)
+        tz = timezone.get_current_timezone()
+        return JsonResponse({
+            "items": [encode_row(rows[i], tz) for i in ids if i in rows],
+            "missing": [str(i) for i in ids if i not in rows],
+        })
+
+
+class AsyncOrderChangesView(View):
+    async def get(self, request):
+        tenant_id = request.tenant_id
+        cursor = request.GET.get("since")
+        try:
+            since, limit, wait = changes.parse_params(request.GET)
+        except InvalidCursor as exc:
+            return _error("invalid_cursor", str(exc), 400)
+        except ValueError as exc:
+            return _error("invalid_param", str(exc), 400)
+
+        if wait:
+            # the long-poll sleeps on the event loop, not in a worker thread
+            rows, has_more = await changes.await_for_changes(tenant_id, since, limit, wait)
+        else:
+            rows, has_more = await changes.achanges_page(tenant_id, since, limit)
+        return JsonResponse({
+            "items": encode_rows(rows),
+            "nextCursor": changes.next_cursor(rows, cursor),
+            "hasMore": has_more,
+        })
+
+
+class AsyncOrderExportView(View):
+    async def get(self, request):
+        tenant_id = request.tenant_id
+        output = request.GET.get("output", "ndjson")
+        if output not in ("ndjson", "csv"):
+            return _error("invalid_output", "output must be ndjson or csv", 400)
+        try:
+            filters = created_range(request.GET)
+        except FilterError as exc:
+            return _error("invalid_filter", str(exc), 400)
+
+        qs = Order.objects.filter(tenant_id=tenant_id, **filters)
+        archived = archive.archived_orders(tenant_id, filters)
+        # an async iterator, so the ASGI handler streams rows as they are read
+        if output == "csv":
+            response = StreamingHttpResponse(export.acsv_lines(qs, archived), content_type="text/csv")
+            response["Content-Disposition"] = 'attachment; filename="orders.csv"'
+        else:
+            response = StreamingHttpResponse(export.andjson_lines(qs, archived), content_type="application/x-ndjson")
+        return response
@@ -0,0 +1,136 @@
+# orders_app/batching.py
+import threading
+import time
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from . import metrics
+from .bulk import create_many
+
+
+class _Item:
+    __slots__ = ("entry", "queued_at", "done", "promoted", "result", "error")
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.queued_at = time.perf_counter()
+        self.done = False
+        self.promoted = False
+        self.result = None
+        self.error = None
+
+
+class GroupCommitter:
+    """
+    Coalesces concurrent calls from this process's threads into one call of
+    `execute(entries) -> results`.
+
+    The first caller becomes the leader: it waits up to `max_delay` seconds
+    (less once `max_size` entries are queued), runs the batch on its own
+    database connection and hands every follower its result. If the batch
+    fails, each entry is retried on its own so one bad entry only fails its
+    own caller. Entries beyond `max_size` get a new leader from among them,
+    and the next batch starts gathering while this one commits.
+
+    Every hand-off (promotion, results) is flagged on the item under one lock
+    and waited for with a predicate, so a signal sent before its follower
+    starts waiting is not lost. A follower still queued after `max_wait`
+    seconds leads a batch itself rather than waiting on a leader forever.
+    """
+
+    def __init__(self, execute, max_delay=0.002, max_size=64, max_wait=5.0):
+        self.execute = execute
+        self.max_delay = max_delay
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._filled = threading.Condition(self._lock)   # leader: batch is full
+        self._changed = threading.Condition(self._lock)  # followers: promoted or done
+        self._pending = []
+        self._leading = False
+
+    def submit(self, entry):
+        """Run `entry` as part of a batch; returns its result or raises its error."""
+        item = _Item(entry)
+        with self._lock:
+            self._pending.append(item)
+            lead = not self._leading
+            self._leading = True
+            if not lead and len(self._pending) >= self.max_size:
+                self._filled.notify()
+        while True:
+            if lead:
+                self._lead()
+            with self._lock:
+                woken = self._changed.wait_for(lambda: item.done or item.promoted, self.max_wait)
+                if item.done:
+                    break
+                # promoted, or stranded in the queue; still waiting while its batch runs
+                lead = item.promoted or (not woken and item in self._pending)
+                item.promoted = False
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _lead(self):
+        deadline = time.monotonic() + self.max_delay
+        with self._lock:
+            while len(self._pending) < self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._filled.wait(remaining)
+            batch, self._pending = self._pending[:self.max_size], self._pending[self.max_size:]
+            if self._pending:
+                self._pending[0].promoted = True
+                self._changed.notify_all()
+            else:
+                self._leading = False
+        if not batch:
+            return  # a stranded follower's entries were taken by another leader meanwhile
+
+        started = time.perf_counter()
+        metrics.CREATE_BATCH_SIZE.observe(len(batch))
+        for item in batch:
+            metrics.CREATE_BATCH_WAIT.observe(started - item.queued_at)
+        try:
+            results = self.execute([item.entry for item in batch])
+        except Exception:
+            results = None
+        for index, item in enumerate(batch):
+            if results is not None:
+                item.result = results[index]
+            else:
+                try:
+                    item.result = self.execute([item.entry])[0]
+                except Exception as exc:
+                    item.error = exc
+        with self._lock:
+            for item in batch:
+                item.done = True
+            self._changed.notify_all()
+
+
+_batcher = None
+
+
+def get_create_batcher():
+    """Process-wide GroupCommitter for order creates, or None when batching is off."""
+    global _batcher
+    options = getattr(settings, "ORDERS_CREATE_BATCHING", {})
+    if not options.get("ENABLED", False):
+        return None
+    if _batcher is None:
+        _batcher = GroupCommitter(
+            create_many,
+            max_delay=options.get("MAX_DELAY_MS", 2.0) / 1000,
+            max_size=options.get("MAX_SIZE", 64),
+        )
+    return _batcher
+
+
+@receiver(setting_changed)
+def _reset_batcher(setting, **kwargs):
+    global _batcher
+    if setting == "ORDERS_CREATE_BATCHING":
+        _batcher = None
@@ -0,0 +1,40 @@
+"""
+Benchmarks runnable with ``python manage.py orders_bench <name>``.
+
+Each module listed in BENCHMARKS exposes ``add_arguments(parser)`` and
+``run(options)``, which returns a flat dict of results.
+"""
+
+BENCHMARKS = {
+    "encoder": "orders_app.benchmarks.encoder",
+    "insert_ids": "orders_app.benchmarks.insert_ids",
+    "middleware": "orders_app.benchmarks.middleware",
+    "serving": "orders_app.benchmarks.serving",
+    "seed": "orders_app.benchmarks.seed",
+    "load": "orders_app.benchmarks.load",
+}
+
+# result key suffixes where a smaller value is better; "_per_sec" keys are the other way
+LOWER_IS_BETTER = ("_ms", "_usec", "_queries_per_request", "_errors")
+
+
+def compare(results, baseline):
+    """
+    (key, baseline value, new value, change in percent, regressed) for every
+    numeric result present in both runs. Regressed is None for keys that are
+    neither timings, rates nor error counts.
+    """
+    rows = []
+    for key, new in results.items():
+        old = baseline.get(key)
+        if isinstance(new, bool) or not isinstance(new, (int, float)) or not isinstance(old, (int, float)):
+            continue
+        change = (new - old) / old * 100 if old else (0.0 if new == old else float("inf"))
+        if key.endswith(LOWER_IS_BETTER):
+            regressed = change
+        elif key.endswith("_per_sec"):
+            regressed = -change
+        else:
+            regressed = None
+        rows.append((key, old, new, round(change, 1), regressed))
+    return rows
@@ -0,0 +1,53 @@
+"""
+Order row encoding: OrderSerializer over model instances vs encoders.encode_rows
+over values_list() tuples. Runs in memory; no database access.
+"""
+import time
+import uuid
+from datetime import timedelta
+from django.utils import timezone
+from orders_app.encoders import ORDER_COLUMNS, encode_rows
+from orders_app.models import Order
+from orders_app.serializers import OrderSerializer
+
+
+def add_arguments(parser):
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+
+
+def _rows(count):
+    now = timezone.now()
+    statuses = Order.Status.values
+    return [
+        (uuid.uuid4(), "bench-tenant", statuses[i % 3], 1 + i % 3, None if i % 3 == 0 else i * 100,
+         now - timedelta(seconds=i), now)
+        for i in range(count)
+    ]
+
+
+def _best_rate(fn, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return len(rows) / best
+
+
+def _serializer(rows):
+    # Order.from_db is what the ORM calls for every fetched row
+    orders = [Order.from_db("default", ORDER_COLUMNS, row) for row in rows]
+    return OrderSerializer(orders, many=True).data
+
+
+def run(options):
+    rows = _rows(options["rows"])
+    serializer_rate = _best_rate(_serializer, rows, options["repeat"])
+    encoder_rate = _best_rate(encode_rows, rows, options["repeat"])
+    return {
+        "rows": len(rows),
+        "serializer_rows_per_sec": round(serializer_rate),
+        "encoder_rows_per_sec": round(encoder_rate),
+        "speedup": round(encoder_rate / serializer_rate, 2),
+    }
@@ -0,0 +1,57 @@
+"""
+Order insert throughput with random (v4) vs time-ordered (v7) primary keys.
+Inserts into temporary copies of the orders table, indexes included.
+"""
+import time
+import uuid
+from django.db import connection, transaction
+from django.utils import timezone
+from orders_app.ids import uuid7
+from orders_app.models import Order
+
+GENERATORS = {"v4": uuid.uuid4, "v7": uuid7}
+
+
+def add_arguments(parser):
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=1000, help="Rows per INSERT statement.")
+
+
+def _insert(cursor, table, make_id, rows, batch):
+    now = timezone.now()
+    sql = (
+        f"INSERT INTO {table} (id, tenant_id, status, version, total_cents, created_at, updated_at) "
+        "SELECT id, tenant_id, %s, 1, NULL, %s, %s FROM unnest(%s::uuid[], %s::varchar[]) AS i(id, tenant_id)"
+    )
+    started = time.perf_counter()
+    for offset in range(0, rows, batch):
+        count = min(batch, rows - offset)
+        ids = [str(make_id()) for _ in range(count)]
+        tenants = [f"tenant-{i % 50}" for i in range(offset, offset + count)]
+        with transaction.atomic():
+            cursor.execute(sql, [Order.Status.DRAFT, now, now, ids, tenants])
+    return time.perf_counter() - started
+
+
+def run(options):
+    results = {"rows": options["rows"]}
+    with connection.cursor() as cursor:
+        for name, make_id in GENERATORS.items():
+            table = f"bench_orders_{name}"
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute(f"CREATE TEMP TABLE {table} (LIKE {Order._meta.db_table} INCLUDING ALL)")
+            elapsed = _insert(cursor, table, make_id, options["rows"], options["batch"])
+            cursor.execute(
+                "SELECT pg_relation_size(i.indexrelid) FROM pg_index i "
+                "WHERE i.indrelid = %s::regclass AND i.indisprimary",
+                [table],
+            )
+            pk_bytes = cursor.fetchone()[0]
+            cursor.execute("SELECT pg_indexes_size(%s::regclass)", [table])
+            index_bytes = cursor.fetchone()[0]
+            cursor.execute(f"DROP TABLE {table}")
+            results[f"{name}_rows_per_sec"] = round(options["rows"] / elapsed)
+            results[f"{name}_pk_index_mb"] = round(pk_bytes / 2 ** 20, 1)
+            results[f"{name}_all_indexes_mb"] = round(index_bytes / 2 ** 20, 1)
+    results["v7_speedup"] = round(results["v7_rows_per_sec"] / results["v4_rows_per_sec"], 2)
+    return results
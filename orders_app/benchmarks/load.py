@@ -0,0 +1,227 @@
+"""
+Mixed API workload against the data seeded by the seed benchmark: idempotent
+creates with a share of replays, confirm/close on a small set of hot orders
+(so writers contend), and deep keyset pagination. Runs the full middleware
+stack in-process (Django test client, one per thread) and reports throughput,
+p50/p95/p99 latency and SQL statements per request for each endpoint.
+"""
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from orders_app.models import Order
+from orders_app.replay_cache import get_replay_cache
+from .seed import TENANT_PREFIX, bench_tenants
+
+ENDPOINTS = ("create", "confirm", "close", "list")
+WORKLOADS = ("create", "transition", "list")
+
+
+def add_arguments(parser):
+    parser.add_argument("--requests", type=int, default=5000, help="Total requests over all threads.")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--mix", default="create=40,transition=30,list=30",
+                        help="Relative weights of the create, transition and list workloads.")
+    parser.add_argument("--replay-ratio", type=float, default=0.2,
+                        help="Share of creates that resend an already used Idempotency-Key.")
+    parser.add_argument("--hot-orders", type=int, default=20, help="Orders the transition workload contends on.")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--max-depth", type=int, default=100, help="Pages walked before restarting a listing.")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def _mix(text):
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in WORKLOADS:
+            raise CommandError(f"unknown workload {name!r}; expected {', '.join(WORKLOADS)}")
+        weights[name.strip()] = float(weight)
+    return [weights.get(name, 0) for name in WORKLOADS]
+
+
+class HotOrders:
+    """
+    Draft orders shared by every thread. A thread moves a random one forward
+    (draft -> confirmed -> closed) with the version it last saw, so concurrent
+    threads race and some get 409; closed orders are swapped for fresh drafts.
+    """
+
+    def __init__(self, tenant_id, size, spare):
+        self.tenant_id = tenant_id
+        self._spare = [o.id for o in Order.objects.bulk_create(Order(tenant_id=tenant_id) for _ in range(spare))]
+        self._slots = [[self._spare.pop(), "draft", 1] for _ in range(size)]
+        self._lock = threading.Lock()
+
+    def pick(self, rng):
+        with self._lock:
+            slot = rng.choice(self._slots)
+            return slot, tuple(slot)
+
+    def update(self, slot, order):
+        with self._lock:
+            if str(slot[0]) != order["id"]:
+                return  # the slot moved on to another order meanwhile
+            if order["status"] == "closed":
+                slot[:] = [self._spare.pop(), "draft", 1] if self._spare else [slot[0], "closed", order["version"]]
+            elif order["version"] > slot[2]:
+                slot[1:] = [order["status"], order["version"]]
+
+
+class Worker(threading.Thread):
+    def __init__(self, index, options, requests, tenants, hot, weights):
+        super().__init__(name=f"load-{index}")
+        self.rng = random.Random(options["seed"] * 1000 + index)
+        self.index = index
+        self.options = options
+        self.requests = requests
+        self.tenants = tenants
+        self.hot = hot
+        self.weights = weights
+        self.samples = {name: [] for name in ENDPOINTS}  # (seconds, statements, status)
+        self.used_keys = []
+        self.cursor = None
+        self.depth = 0
+        self.error = None
+
+    def run(self):
+        try:
+            self.client = Client()
+            for _ in range(self.requests):
+                workload = self.rng.choices(WORKLOADS, self.weights)[0]
+                getattr(self, workload)()
+        except Exception as exc:  # surfaced by the main thread
+            self.error = exc
+        finally:
+            connections.close_all()
+
+    def timed(self, endpoint, call):
+        statements = [0]
+
+        def count(execute, sql, params, many, context):
+            statements[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            response = call()
+            elapsed = time.perf_counter() - started
+        self.samples[endpoint].append((elapsed, statements[0], response.status_code))
+        return response
+
+    def create(self):
+        tenant_id = self.rng.choice(self.tenants[:10])
+        if self.used_keys and self.rng.random() < self.options["replay_ratio"]:
+            tenant_id, key = self.rng.choice(self.used_keys)
+        else:
+            key = f"load-{self.options['run_id']}-{self.index}-{len(self.used_keys)}"
+            self.used_keys.append((tenant_id, key))
+        self.timed("create", lambda: self.client.post(
+            reverse("order-create"), data="{}", content_type="application/json",
+            HTTP_X_TENANT_ID=tenant_id, HTTP_IDEMPOTENCY_KEY=key,
+        ))
+
+    def transition(self):
+        slot, (order_id, status, version) = self.hot.pick(self.rng)
+        headers = {"HTTP_X_TENANT_ID": self.hot.tenant_id, "HTTP_IF_MATCH": str(version)}
+        if status == "draft":
+            response = self.timed("confirm", lambda: self.client.patch(
+                reverse("order-confirm", args=[order_id]), data=json.dumps({"totalCents": 1000}),
+                content_type="application/json", **headers,
+            ))
+        elif status == "confirmed":
+            response = self.timed("close", lambda: self.client.post(
+                reverse("order-close", args=[order_id]), **headers,
+            ))
+        else:
+            return
+        if response.status_code == 200:
+            self.hot.update(slot, response.json())
+
+    def list(self):
+        if self.cursor is None:
+            self.tenant_id = self.tenants[0]  # the largest tenant gives the deepest pages
+        query = f"?limit={self.options['page_size']}" + (f"&cursor={self.cursor}" if self.cursor else "")
+        response = self.timed("list", lambda: self.client.get(
+            reverse("order-list") + query, HTTP_X_TENANT_ID=self.tenant_id,
+        ))
+        self.depth += 1
+        next_cursor = response.json().get("nextCursor") if response.status_code == 200 else None
+        if next_cursor is None or self.depth >= self.options["max_depth"]:
+            self.cursor, self.depth = None, 0
+        else:
+            self.cursor = next_cursor
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def _summarize(name, samples, elapsed):
+    results = {f"{name}_requests": len(samples)}
+    if not samples:
+        return results
+    latencies = sorted(s[0] for s in samples)
+    results.update({
+        f"{name}_per_sec": round(len(samples) / elapsed, 1),
+        f"{name}_p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        f"{name}_p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        f"{name}_p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        f"{name}_queries_per_request": round(sum(s[1] for s in samples) / len(samples), 2),
+        f"{name}_conflicts": sum(1 for s in samples if s[2] == 409),
+        f"{name}_errors": sum(1 for s in samples if s[2] >= 400 and s[2] != 409),
+    })
+    return results
+
+
+def run(options):
+    tenants = bench_tenants()
+    if not tenants:
+        raise CommandError(f"no {TENANT_PREFIX}* tenants; run `orders_bench seed` first")
+    weights = _mix(options["mix"])
+    options = {**options, "run_id": uuid.uuid4().hex[:8]}  # fresh Idempotency-Keys every run
+    threads = options["threads"]
+    hot = HotOrders(tenants[-1], options["hot_orders"], options["requests"])
+    get_replay_cache().clear()
+
+    # rate limits would turn the run into a test of the limiter; 409s are expected, not worth a log line
+    request_log = logging.getLogger("django.request")
+    log_level = request_log.level
+    request_log.setLevel(logging.ERROR)
+    try:
+        with override_settings(ALLOWED_HOSTS=["testserver"], ORDERS_RATE_LIMITS={"ENABLED": False}):
+            workers = [
+                Worker(i, options, options["requests"] // threads + (i < options["requests"] % threads),
+                       tenants, hot, weights)
+                for i in range(threads)
+            ]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+    finally:
+        request_log.setLevel(log_level)
+
+    for worker in workers:
+        if worker.error is not None:
+            raise CommandError(f"{worker.name} failed: {worker.error!r}")
+
+    Order.objects.filter(tenant_id=hot.tenant_id, id__in=hot._spare).delete()
+    results = {
+        "requests": options["requests"],
+        "threads": threads,
+        "seconds": round(elapsed, 2),
+        "total_per_sec": round(options["requests"] / elapsed, 1),
+    }
+    for name in ENDPOINTS:
+        samples = [s for worker in workers for s in worker.samples[name]]
+        results.update(_summarize(name, samples, elapsed))
+    return results
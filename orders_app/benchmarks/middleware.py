@@ -0,0 +1,87 @@
+"""
+Per-request middleware overhead on an API route: the full Django stack in front
+of every request vs the API-only pipeline (SiteMiddleware + TenantMiddleware +
+AdmissionMiddleware), with tenant validation or request metrics added. Runs
+WSGIHandler in-process on a view that does no work; no HTTP server involved.
+"""
+import time
+from django.core.handlers.wsgi import WSGIHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import path
+from orders_app.models import Tenant
+
+TENANT = "bench-middleware"
+
+FULL_STACK = [
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "orders_app.middleware.TenantMiddleware",
+]
+API_PIPELINE = [
+    "django.middleware.security.SecurityMiddleware",
+    "orders_app.middleware.SiteMiddleware",
+    "orders_app.middleware.TenantMiddleware",
+    "orders_app.middleware.AdmissionMiddleware",
+]
+PIPELINES = {
+    "none": ([], False),
+    "full": (FULL_STACK, False),
+    "api": (API_PIPELINE, False),
+    "api_validated": (API_PIPELINE, True),
+    "api_metrics": (["orders_app.middleware.MetricsMiddleware"] + API_PIPELINE, False),
+}
+
+
+def _ping(request):
+    return HttpResponse(getattr(request, "tenant_id", ""))
+
+
+urlpatterns = [path("api/orders/ping", _ping)]
+
+
+def add_arguments(parser):
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+
+
+def _best_usec(handler, environ, requests, repeat):
+    def start_response(status, headers):
+        pass
+
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(requests):
+            handler(dict(environ), start_response).close()
+        best = min(best, time.perf_counter() - started)
+    return best / requests * 1e6
+
+
+def run(options):
+    environ = RequestFactory(HTTP_X_TENANT_ID=TENANT)._base_environ(PATH_INFO="/api/orders/ping")
+    Tenant.objects.update_or_create(id=TENANT, defaults={"is_active": True})
+    results = {"requests": options["requests"]}
+    try:
+        for name, (middleware, validate) in PIPELINES.items():
+            with override_settings(
+                MIDDLEWARE=middleware,
+                ROOT_URLCONF=__name__,
+                ALLOWED_HOSTS=["testserver"],
+                ORDERS_TENANT_REGISTRY={"VALIDATE": validate, "TTL_SECONDS": 3600},
+            ):
+                handler = WSGIHandler()
+                results[f"{name}_usec_per_request"] = round(
+                    _best_usec(handler, environ, options["requests"], options["repeat"]), 1
+                )
+    finally:
+        Tenant.objects.filter(id=TENANT).delete()
+    base = results["none_usec_per_request"]
+    for name in list(PIPELINES)[1:]:
+        results[f"{name}_overhead_usec"] = round(results[f"{name}_usec_per_request"] - base, 1)
+    return results
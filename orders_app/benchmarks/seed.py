@@ -0,0 +1,100 @@
+"""
+Seed benchmark tenants and orders with COPY: a skewed (Zipf) spread of orders
+over tenants, a realistic status mix and created_at spread over past days.
+Replaces any previous benchmark data; the load benchmark runs against it.
+"""
+import random
+import time
+from datetime import timedelta
+from django.db import connection, transaction
+from django.utils import timezone
+from orders_app import stats
+from orders_app.ids import new_id
+from orders_app.models import Order, OrderArchive, Tenant, TenantOrderStats
+
+TENANT_PREFIX = "bench-"
+# (status, version, share of orders)
+STATUS_MIX = (
+    (Order.Status.CLOSED, 3, 0.60),
+    (Order.Status.CONFIRMED, 2, 0.25),
+    (Order.Status.DRAFT, 1, 0.15),
+)
+
+
+def add_arguments(parser):
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=90, help="created_at spread, ending now.")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of orders per tenant.")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed, for repeatable data.")
+
+
+def tenant_ids(count):
+    return [f"{TENANT_PREFIX}{i}" for i in range(count)]
+
+
+def bench_tenants():
+    """Benchmark tenant ids currently seeded, largest first."""
+    return list(
+        Tenant.objects.filter(id__startswith=TENANT_PREFIX)
+        .order_by("created_at", "id").values_list("id", flat=True)
+    )
+
+
+def clear():
+    with transaction.atomic():
+        Order.objects.filter(tenant_id__startswith=TENANT_PREFIX).delete()
+        OrderArchive.objects.filter(tenant_id__startswith=TENANT_PREFIX).delete()
+        TenantOrderStats.objects.filter(tenant_id__startswith=TENANT_PREFIX).delete()
+        Tenant.objects.filter(id__startswith=TENANT_PREFIX).delete()
+
+
+def _orders(rng, tenants, count, days, skew):
+    now = timezone.now()
+    weights = [1 / (rank + 1) ** skew for rank in range(len(tenants))]
+    statuses = [str(status) for status, _, _ in STATUS_MIX]
+    versions = {str(status): version for status, version, _ in STATUS_MIX}
+    shares = [share for _, _, share in STATUS_MIX]
+    for tenant_id, status in zip(rng.choices(tenants, weights, k=count), rng.choices(statuses, shares, k=count)):
+        created_at = now - timedelta(seconds=rng.uniform(0, days * 86400))
+        if status == Order.Status.DRAFT:
+            yield new_id(), tenant_id, status, 1, None, created_at, created_at
+        else:
+            total_cents = int(rng.lognormvariate(8, 1.2))
+            updated_at = min(now, created_at + timedelta(seconds=rng.uniform(0, 86400)))
+            yield new_id(), tenant_id, status, versions[status], total_cents, created_at, updated_at
+
+
+def seed(tenants, orders, days=90, skew=1.1, seed=1):
+    """Replace the benchmark data; returns seconds spent loading orders."""
+    rng = random.Random(seed)
+    ids = tenant_ids(tenants)
+    clear()
+    now = timezone.now()
+    # created_at keeps the rank order, so bench_tenants() lists the largest first
+    Tenant.objects.bulk_create(Tenant(id=t, created_at=now + timedelta(microseconds=i)) for i, t in enumerate(ids))
+
+    started = time.perf_counter()
+    columns = "id, tenant_id, status, version, total_cents, created_at, updated_at"
+    with transaction.atomic(), connection.cursor() as cursor:
+        with cursor.cursor.copy(f"COPY {Order._meta.db_table} ({columns}) FROM STDIN") as copy:
+            for row in _orders(rng, ids, orders, days, skew):
+                copy.write_row(row)
+    elapsed = time.perf_counter() - started
+
+    for tenant_id in ids:
+        stats.rebuild(tenant_id)
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {Order._meta.db_table}")
+    return elapsed
+
+
+def run(options):
+    elapsed = seed(options["tenants"], options["orders"], options["days"], options["skew"], options["seed"])
+    largest = Order.objects.filter(tenant_id=tenant_ids(1)[0]).count()
+    return {
+        "tenants": options["tenants"],
+        "orders": options["orders"],
+        "largest_tenant_orders": largest,
+        "copy_rows_per_sec": round(options["orders"] / elapsed),
+    }
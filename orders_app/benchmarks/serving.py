@@ -0,0 +1,134 @@
+"""
+Read endpoint throughput and latency: WSGI (gunicorn gthread) vs ASGI (uvicorn).
+Starts each server against the configured Postgres and drives it over keep-alive
+HTTP connections. Needs gunicorn and uvicorn installed.
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from importlib.util import find_spec
+from django.conf import settings
+from django.core.management.base import CommandError
+from orders_app.models import Order
+
+TENANT = "bench-serving"
+ENDPOINTS = {
+    "list": "/api/orders/list?limit=20",
+    "detail": "/api/orders/{id}",
+    "changes": "/api/orders/changes?limit=20",
+}
+
+
+def add_arguments(parser):
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="list")
+    parser.add_argument("--concurrency", type=int, default=200, help="Open client connections.")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=32, help="gunicorn threads per worker.")
+    parser.add_argument("--workers", type=int, default=1, help="Server processes for both servers.")
+    parser.add_argument("--orders", type=int, default=1000, help="Orders seeded for the bench tenant.")
+    parser.add_argument("--port", type=int, default=8765)
+
+
+def _servers(options):
+    port, workers = str(options["port"]), str(options["workers"])
+    python = sys.executable
+    return {
+        "wsgi": ([python, "-m", "gunicorn", "config.wsgi:application", "-k", "gthread",
+                  "--threads", str(options["threads"]), "-w", workers, "-b", f"127.0.0.1:{port}",
+                  "--log-level", "warning"], {"ORDERS_ASYNC_VIEWS": "false"}),
+        "asgi": ([python, "-m", "uvicorn", "config.asgi:application", "--workers", workers,
+                  "--port", port, "--log-level", "warning", "--no-access-log"], {"ORDERS_ASYNC_VIEWS": "true"}),
+    }
+
+
+def _wait_for_port(port, proc, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise CommandError(f"server exited with status {proc.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError(f"server did not listen on port {port}")
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while (size := int((await reader.readline()).strip(), 16)):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    return int(status_line.split()[1])
+
+
+async def _client(port, request, remaining, latencies, errors):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            writer.write(request)
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors[0] += 1
+    finally:
+        writer.close()
+
+
+async def _drive(port, path, concurrency, total):
+    request = (f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nX-Tenant-Id: {TENANT}\r\n"
+               "Connection: keep-alive\r\n\r\n").encode()
+    remaining, latencies, errors = [total], [], [0]
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(port, request, remaining, latencies, errors) for _ in range(concurrency)))
+    return time.perf_counter() - started, sorted(latencies), errors[0]
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(options):
+    for tool in ("gunicorn", "uvicorn"):
+        if find_spec(tool) is None:
+            raise CommandError(f"{tool} is required for this benchmark (pip install {tool})")
+
+    Order.objects.filter(tenant_id=TENANT).delete()
+    orders = Order.objects.bulk_create(Order(tenant_id=TENANT) for _ in range(options["orders"]))
+    path = ENDPOINTS[options["endpoint"]].format(id=orders[0].id)
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings")}
+
+    results = {"endpoint": options["endpoint"], "concurrency": options["concurrency"], "requests": options["requests"]}
+    try:
+        for name, (command, extra_env) in _servers(options).items():
+            proc = subprocess.Popen(command, cwd=settings.BASE_DIR, env={**env, **extra_env})
+            try:
+                _wait_for_port(options["port"], proc)
+                asyncio.run(_drive(options["port"], path, min(options["concurrency"], 10), 200))  # warm up
+                elapsed, latencies, errors = asyncio.run(
+                    _drive(options["port"], path, options["concurrency"], options["requests"])
+                )
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+            results[f"{name}_requests_per_sec"] = round(len(latencies) / elapsed)
+            results[f"{name}_p50_ms"] = round(_percentile(latencies, 0.50) * 1000, 1)
+            results[f"{name}_p99_ms"] = round(_percentile(latencies, 0.99) * 1000, 1)
+            results[f"{name}_errors"] = errors
+    finally:
+        Order.objects.filter(tenant_id=TENANT).delete()
+    return results
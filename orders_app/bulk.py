@@ -0,0 +1,118 @@
+# orders_app/bulk.py
+from collections import Counter
+from django.db import transaction
+from .idempotency import (
+    CLAIMED, CONFLICT, IDEMPOTENCY_TTL, REPLAY,
+    claim_many, complete_many, fingerprint_data, release_many,
+)
+from .models import Order
+from .replay_cache import get_replay_cache
+from .encoders import encode_order
+from .stats import record_created
+from . import metrics
+
+# per-item outcomes reported by create_orders()
+CREATED = "created"
+REPLAYED = "replayed"
+CONFLICTED = "conflict"
+IN_PROGRESS = "in_progress"
+
+
+def _item_hash(spec):
+    # the same canonical JSON a single create hashes its body as, so a key
+    # first used through POST /orders replays here and vice versa
+    return fingerprint_data({k: v for k, v in spec.items() if k != "idempotencyKey"})
+
+
+def create_orders(tenant_id, specs):
+    """
+    Create draft orders for a list of specs, each carrying its own idempotencyKey.
+
+    All keys are claimed with one statement, new orders are written with one
+    bulk INSERT and their responses stored with one UPDATE in the same
+    transaction. Returns one result dict per spec, in input order.
+    """
+    entries = [(tenant_id, spec["idempotencyKey"], _item_hash(spec)) for spec in specs]
+    return [_result(key, outcome, response)
+            for (_, key, _), (outcome, response) in zip(entries, create_many(entries))]
+
+
+def create_many(entries):
+    """
+    Create one draft order per (tenant_id, idempotency key, request hash) entry,
+    for any mix of tenants: one claim statement, then one transaction with a
+    single multi-row INSERT, the counter updates and one completion UPDATE.
+    Returns (outcome, response) per entry, in input order; outcome is CREATED,
+    REPLAY, CONFLICT or IN_FLIGHT.
+    """
+    cache = get_replay_cache()
+
+    # first occurrence of a key owns it; later duplicates in the batch follow it
+    owners = {}
+    for index, (tenant_id, key, _) in enumerate(entries):
+        owners.setdefault((tenant_id, key), index)
+
+    outcomes = {}   # (tenant_id, key) -> (outcome, response, request_hash)
+    to_claim = []
+    for (tenant_id, key), index in owners.items():
+        request_hash = entries[index][2]
+        cached = cache.get(tenant_id, key) if cache is not None else None
+        if cached is None:
+            to_claim.append((tenant_id, key, request_hash))
+        elif cached[0] == request_hash:
+            outcomes[(tenant_id, key)] = (REPLAY, cached[1], cached[0])
+            metrics.idempotency(REPLAY, "cache")
+        else:
+            outcomes[(tenant_id, key)] = (CONFLICT, None, cached[0])
+            metrics.idempotency(CONFLICT, "cache")
+
+    claims = claim_many(to_claim)
+    new_keys = []
+    for entry in to_claim:
+        result = claims[entry[:2]]
+        metrics.idempotency(result.outcome, "db")
+        outcomes[entry[:2]] = (result.outcome, result.response, entry[2])
+        if result.outcome == CLAIMED:
+            new_keys.append(entry[:2])
+        elif result.outcome == REPLAY and cache is not None:
+            cache.set(*entry, result.response, result.created_at + IDEMPOTENCY_TTL)
+
+    if new_keys:
+        orders = [Order(tenant_id=tenant_id, status=Order.Status.DRAFT, version=1) for tenant_id, _ in new_keys]
+        try:
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                # counter rows in a fixed order, so concurrent batches cannot deadlock on them
+                for tenant_id, count in sorted(Counter(tenant_id for tenant_id, _ in new_keys).items()):
+                    record_created(tenant_id, count)
+                data = [encode_order(order) for order in orders]
+                complete_many([(*owner, item) for owner, item in zip(new_keys, data)])
+        except Exception:
+            release_many(new_keys)
+            raise
+        for owner, item in zip(new_keys, data):
+            outcomes[owner] = (CREATED, item, outcomes[owner][2])
+            if cache is not None:
+                cache.set(*owner, outcomes[owner][2], item, claims[owner].created_at + IDEMPOTENCY_TTL)
+
+    results = []
+    for index, (tenant_id, key, request_hash) in enumerate(entries):
+        outcome, response, owner_hash = outcomes[(tenant_id, key)]
+        if index != owners[(tenant_id, key)] and outcome in (CREATED, REPLAY):
+            # a duplicate within the batch replays the owner's order, unless the body differs
+            outcome = REPLAY if request_hash == owner_hash else CONFLICT
+        results.append((outcome, response if outcome in (CREATED, REPLAY) else None))
+    return results
+
+
+def _result(key, outcome, response):
+    if outcome == CREATED:
+        return {"idempotencyKey": key, "status": CREATED, "order": response}
+    if outcome == REPLAY:
+        return {"idempotencyKey": key, "status": REPLAYED, "order": response}
+    if outcome == CONFLICT:
+        return {"idempotencyKey": key, "status": CONFLICTED,
+                "code": "conflict", "message": "Idempotency key used with different request body"}
+    return {"idempotencyKey": key, "status": IN_PROGRESS,
+            "code": "in_progress", "message": "A request with this Idempotency-Key is still being processed"}
+
@@ -0,0 +1,124 @@
+# orders_app/changes.py
+import asyncio
+import time
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .encoders import ORDER_COLUMNS
+from .lookups import RowGreaterThan
+from .models import Order
+from .pagination import InvalidCursor, _decode_cursor, _encode_cursor
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+def _options():
+    return getattr(settings, "ORDERS_CHANGES", {})
+
+
+def parse_params(params):
+    """
+    (since, limit, wait) from the since/limit/wait query parameters.
+    Raises InvalidCursor for a bad cursor and ValueError for bad numbers.
+    """
+    try:
+        limit = min(int(params.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+        wait = float(params.get("wait", 0))
+    except ValueError:
+        raise ValueError("limit and wait must be numbers") from None
+    if limit < 1 or wait < 0:
+        raise ValueError("limit must be positive and wait non-negative")
+    return decode_since(params.get("since")), limit, wait
+
+
+def decode_since(cursor):
+    """(updated_at, id) position of a change cursor; (None, None) for a full sync."""
+    if not cursor:
+        return None, None
+    ts_str, id_str, _ = _decode_cursor(cursor)
+    ts = parse_datetime(ts_str) if ts_str else None
+    if ts is None or not id_str:
+        raise InvalidCursor("malformed change cursor")
+    return ts, id_str
+
+
+def changes_page(tenant_id, since, limit):
+    """
+    Orders changed after `since`, in (updated_at, id) order, served by the
+    orders_tenant_updated_idx range scan. Rows younger than LAG_SECONDS are held
+    back: updated_at is stamped before commit, so a slower transaction can still
+    commit a smaller timestamp, and the lag keeps the cursor from passing it.
+    Returns (rows, has_more).
+    """
+    rows = list(_changes_query(tenant_id, since, limit))
+    return rows[:limit], len(rows) > limit
+
+
+async def achanges_page(tenant_id, since, limit):
+    rows = [row async for row in _changes_query(tenant_id, since, limit)]
+    return rows[:limit], len(rows) > limit
+
+
+def _changes_query(tenant_id, since, limit):
+    ts, id_ = since
+    horizon = timezone.now() - timedelta(seconds=_options().get("LAG_SECONDS", 1.0))
+    qs = Order.objects.filter(tenant_id=tenant_id, updated_at__lte=horizon)
+    if ts is not None:
+        qs = qs.filter(RowGreaterThan(("updated_at", "id"), (ts, id_)))
+    return qs.order_by("updated_at", "id").values_list(*ORDER_COLUMNS, named=True)[:limit + 1]
+
+
+def next_cursor(rows, since_cursor):
+    """Cursor after the last returned row; unchanged when the page is empty."""
+    if not rows:
+        return since_cursor
+    last = rows[-1]
+    return _encode_cursor(last.updated_at.isoformat(), last.id)
+
+
+def wait_for_changes(tenant_id, since, limit, wait):
+    """
+    Long-poll: re-run changes_page every POLL_INTERVAL_SECONDS until something
+    changed or `wait` seconds (capped at MAX_WAIT_SECONDS) have passed. With
+    connection pooling on, the connection goes back to the pool between polls,
+    so idle long-polls cannot use up the pool.
+    """
+    deadline, interval = _poll_plan(wait)
+    while True:
+        rows, has_more = changes_page(tenant_id, since, limit)
+        remaining = deadline - time.monotonic()
+        if rows or remaining <= 0:
+            return rows, has_more
+        _release_connection()
+        time.sleep(min(interval, remaining))
+
+
+async def await_for_changes(tenant_id, since, limit, wait):
+    """wait_for_changes that sleeps on the event loop instead of holding a thread."""
+    deadline, interval = _poll_plan(wait)
+    while True:
+        rows, has_more = await achanges_page(tenant_id, since, limit)
+        remaining = deadline - time.monotonic()
+        if rows or remaining <= 0:
+            return rows, has_more
+        await sync_to_async(_release_connection)()
+        await asyncio.sleep(min(interval, remaining))
+
+
+def _release_connection():
+    # close() returns a pooled connection to the pool; the next poll takes one
+    # again. Without the pool it would reconnect to Postgres every poll, and
+    # inside a transaction (ATOMIC_REQUESTS, tests) it would abort it, so the
+    # connection stays in both cases.
+    if "pool" in connection.settings_dict["OPTIONS"] and not connection.in_atomic_block:
+        connection.close()
+
+
+def _poll_plan(wait):
+    options = _options()
+    deadline = time.monotonic() + min(wait, options.get("MAX_WAIT_SECONDS", 25))
+    return deadline, options.get("POLL_INTERVAL_SECONDS", 0.5)
@@ -0,0 +1,52 @@
+# orders_app/encoders.py
+from django.utils import timezone
+
+# Column order expected by encode_row(); pass it to values_list() / RETURNING.
+ORDER_COLUMNS = ("id", "tenant_id", "status", "version", "total_cents", "created_at", "updated_at")
+ORDER_FIELDS = ("id", "tenantId", "status", "version", "totalCents", "createdAt", "updatedAt")
+# positions in an ORDER_COLUMNS row
+ID = ORDER_COLUMNS.index("id")
+VERSION = ORDER_COLUMNS.index("version")
+
+
+def _datetime(value, tz):
+    # DRF DateTimeField.to_representation with the default ISO-8601 format
+    if not value:
+        return None
+    value = value.astimezone(tz).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def encode_row(row, tz=None):
+    """
+    Encode one Order row (a tuple in ORDER_COLUMNS order) exactly as OrderSerializer
+    would, without instantiating a model or walking serializer fields.
+    """
+    id_, tenant_id, status, version, total_cents, created_at, updated_at = row
+    tz = tz or timezone.get_current_timezone()
+    return {
+        "id": str(id_),
+        "tenantId": tenant_id,
+        "status": status,
+        "version": version,
+        "totalCents": total_cents,
+        "createdAt": _datetime(created_at, tz),
+        "updatedAt": _datetime(updated_at, tz),
+    }
+
+
+def encode_rows(rows):
+    tz = timezone.get_current_timezone()
+    return [encode_row(row, tz) for row in rows]
+
+
+def order_row(order):
+    """ORDER_COLUMNS tuple for an Order instance."""
+    return (order.id, order.tenant_id, str(order.status), order.version,
+            order.total_cents, order.created_at, order.updated_at)
+
+
+def encode_order(order):
+    return encode_row(order_row(order))
@@ -0,0 +1,103 @@
+# orders_app/export.py
+import csv
+import heapq
+import json
+from django.utils import timezone
+from .encoders import ID, ORDER_COLUMNS, ORDER_FIELDS, encode_row
+
+CHUNK_SIZE = 2000
+_CREATED_AT = ORDER_COLUMNS.index("created_at")
+
+
+def _values(queryset, named=False):
+    return queryset.order_by("-created_at", "-id").values_list(*ORDER_COLUMNS, named=named)
+
+
+def _ordered(queryset):
+    return _values(queryset).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _list_key(row):
+    return row[_CREATED_AT], row[ID]
+
+
+def iter_rows(queryset, archived=None):
+    """
+    Stream a tenant's orders as encoded dicts. iterator() makes Django read through
+    a server-side cursor in CHUNK_SIZE batches, so memory stays flat. `archived`
+    (the same filters on OrderArchive) is streamed alongside and merged in order.
+    """
+    tz = timezone.get_current_timezone()
+    rows = _ordered(queryset)
+    if archived is not None:
+        rows = heapq.merge(rows, _ordered(archived), key=_list_key, reverse=True)
+    for row in rows:
+        yield encode_row(row, tz)
+
+
+async def _amerge(rows, archived_rows):
+    """heapq.merge(..., key=_list_key, reverse=True) for two async iterators."""
+    row, archived_row = await anext(rows, None), await anext(archived_rows, None)
+    while row is not None and archived_row is not None:
+        if _list_key(row) >= _list_key(archived_row):
+            yield row
+            row = await anext(rows, None)
+        else:
+            yield archived_row
+            archived_row = await anext(archived_rows, None)
+    rest, remaining = (row, rows) if row is not None else (archived_row, archived_rows)
+    if rest is not None:
+        yield rest
+        async for rest in remaining:
+            yield rest
+
+
+async def aiter_rows(queryset, archived=None):
+    """
+    iter_rows() for async views: aiterator() fetches each chunk without
+    blocking the event loop, and the ASGI handler can stream the result as it
+    comes instead of buffering a synchronous iterator.
+    """
+    tz = timezone.get_current_timezone()
+    # named rows: plain values_list() opens its cursor as soon as aiterator()
+    # starts, still on the event loop, which Django refuses
+    rows = _values(queryset, named=True).aiterator(chunk_size=CHUNK_SIZE)
+    if archived is not None:
+        rows = _amerge(rows, _values(archived, named=True).aiterator(chunk_size=CHUNK_SIZE))
+    async for row in rows:
+        yield encode_row(row, tz)
+
+
+def _ndjson_line(item):
+    return json.dumps(item, separators=(",", ":")) + "\n"
+
+
+def ndjson_lines(queryset, archived=None):
+    for item in iter_rows(queryset, archived):
+        yield _ndjson_line(item)
+
+
+async def andjson_lines(queryset, archived=None):
+    async for item in aiter_rows(queryset, archived):
+        yield _ndjson_line(item)
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the generator."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(queryset, archived=None):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(ORDER_FIELDS)
+    for item in iter_rows(queryset, archived):
+        yield writer.writerow(item.values())
+
+
+async def acsv_lines(queryset, archived=None):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(ORDER_FIELDS)
+    async for item in aiter_rows(queryset, archived):
+        yield writer.writerow(item.values())
@@ -0,0 +1,64 @@
+# orders_app/filters.py
+import hashlib
+import json
+from datetime import timezone as dt_timezone
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Order
+
+
+class FilterError(ValueError):
+    """Raised for an unparsable filter query parameter."""
+
+
+def _datetime_param(params, name):
+    raw = params.get(name)
+    if not raw:
+        return None
+    try:
+        value = parse_datetime(raw)
+    except ValueError:
+        value = None
+    if value is None:
+        raise FilterError(f"{name} must be an ISO-8601 datetime")
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value.astimezone(dt_timezone.utc)
+
+
+def created_range(params):
+    """
+    ORM filter kwargs for the optional created_from (inclusive) / created_to
+    (exclusive) query parameters.
+    """
+    filters = {}
+    created_from = _datetime_param(params, "created_from")
+    created_to = _datetime_param(params, "created_to")
+    if created_from is not None:
+        filters["created_at__gte"] = created_from
+    if created_to is not None:
+        filters["created_at__lt"] = created_to
+    return filters
+
+
+def list_filters(params):
+    """
+    Parse the list endpoint filters (status, created_from, created_to, updatedSince).
+    Returns (orm_filters, fingerprint) where the fingerprint identifies the filter
+    set and is embedded in pagination cursors (None when nothing is filtered).
+    """
+    filters = created_range(params)
+    status = params.get("status")
+    if status:
+        if status not in Order.Status.values:
+            raise FilterError(f"status must be one of {', '.join(Order.Status.values)}")
+        filters["status"] = status
+    updated_since = _datetime_param(params, "updatedSince")
+    if updated_since is not None:
+        filters["updated_at__gte"] = updated_since
+
+    if not filters:
+        # unfiltered cursors carry no fingerprint (and stay valid across upgrades)
+        return filters, None
+    canonical = json.dumps({k: str(v) for k, v in filters.items()}, sort_keys=True)
+    return filters, hashlib.sha256(canonical.encode()).hexdigest()[:16]
@@ -1,78 +1,341 @@
 # myapp/idempotency.py
+import hashlib
+import json
+from collections import namedtuple
 from functools import wraps
-from django.db import transaction
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
 from django.utils import timezone
 from datetime import timedelta
 from django.http import JsonResponse
 from .models import IdempotencyKey
+from .prepared import PreparedStatement
+from .replay_cache import get_replay_cache
+from . import metrics
 
 IDEMPOTENCY_TTL = timedelta(hours=1)
+# An in_progress claim older than this is taken to belong to a request that died
+# (worker crash, lost connection) and can be claimed again. Creates commit the
+# order and the stored response together, so a dead claim never hides an order.
+# Keep it above the slowest request (the worker timeout).
+IN_FLIGHT_LEASE = timedelta(seconds=30)
+
+# outcomes of claim()
+CLAIMED = "claimed"        # caller owns the key and must run the request
+REPLAY = "replay"          # a completed response with the same body is stored
+CONFLICT = "conflict"      # key was used with a different request body
+IN_FLIGHT = "in_flight"    # another request holding the key has not finished yet
+
+Claim = namedtuple("Claim", ["outcome", "response", "created_at"])
+
+# One statement: insert the key, or take over an expired row or a dead claim
+# (in_progress past IN_FLIGHT_LEASE). When neither
+# happens, the existing row is returned instead so the caller can decide
+# between replay / conflict / in-flight without a second round-trip.
+# The upsert never waits on a long-held lock: claims are autocommitted and the
+# in-progress state replaces the old row lock held for the whole request.
+_CLAIM_SQL = """
+WITH claim AS (
+    INSERT INTO {table} AS k (tenant_id, key, request_hash, response_json, state, created_at)
+    VALUES (%(tenant_id)s, %(key)s, %(request_hash)s, NULL, %(in_progress)s, %(now)s)
+    ON CONFLICT (tenant_id, key) DO UPDATE
+        SET request_hash = EXCLUDED.request_hash,
+            response_json = NULL,
+            state = EXCLUDED.state,
+            created_at = EXCLUDED.created_at
+        WHERE k.created_at < %(expired_before)s
+           OR (k.state = %(in_progress)s AND k.created_at < %(lease_expired_before)s)
+    RETURNING 1
+)
+SELECT TRUE, NULL, NULL, NULL, NULL FROM claim
+UNION ALL
+SELECT FALSE, state, request_hash = %(request_hash)s, response_json, created_at
+FROM {table}
+WHERE tenant_id = %(tenant_id)s AND key = %(key)s AND NOT EXISTS (SELECT 1 FROM claim)
+""".format(table=IdempotencyKey._meta.db_table)
+_CLAIM = PreparedStatement("orders_idempotency_claim", _CLAIM_SQL)
+
+# Set-based variant of the claim above for batch endpoints: every key in the
+# batch is inserted or taken over by one INSERT ... SELECT, and existing rows are
+# joined back in the same statement. Input keys must be unique; rows are
+# inserted in key order so concurrent batches lock keys in the same order.
+_CLAIM_MANY_SQL = """
+WITH input AS (
+    SELECT * FROM unnest(%(tenant_ids)s::varchar[], %(keys)s::varchar[], %(hashes)s::varchar[])
+        AS i(tenant_id, key, request_hash)
+),
+claim AS (
+    INSERT INTO {table} AS k (tenant_id, key, request_hash, response_json, state, created_at)
+    SELECT tenant_id, key, request_hash, NULL, %(in_progress)s, %(now)s
+    FROM input
+    ORDER BY tenant_id, key
+    ON CONFLICT (tenant_id, key) DO UPDATE
+        SET request_hash = EXCLUDED.request_hash,
+            response_json = NULL,
+            state = EXCLUDED.state,
+            created_at = EXCLUDED.created_at
+        WHERE k.created_at < %(expired_before)s
+           OR (k.state = %(in_progress)s AND k.created_at < %(lease_expired_before)s)
+    RETURNING k.tenant_id, k.key
+)
+SELECT i.tenant_id, i.key, c.key IS NOT NULL, e.state, e.request_hash = i.request_hash,
+       e.response_json, e.created_at
+FROM input i
+LEFT JOIN claim c ON c.tenant_id = i.tenant_id AND c.key = i.key
+LEFT JOIN {table} e ON c.key IS NULL AND e.tenant_id = i.tenant_id AND e.key = i.key
+""".format(table=IdempotencyKey._meta.db_table)
+
+# Stores many responses with one UPDATE ... FROM unnest().
+_COMPLETE_MANY_SQL = """
+UPDATE {table} AS k
+SET response_json = v.response_json::jsonb, state = %s
+FROM unnest(%s::varchar[], %s::varchar[], %s::text[]) AS v(tenant_id, key, response_json)
+WHERE k.tenant_id = v.tenant_id AND k.key = v.key
+""".format(table=IdempotencyKey._meta.db_table)
+
+_RELEASE_MANY_SQL = """
+DELETE FROM {table} AS k
+USING unnest(%s::varchar[], %s::varchar[]) AS v(tenant_id, key)
+WHERE k.tenant_id = v.tenant_id AND k.key = v.key AND k.state = %s
+""".format(table=IdempotencyKey._meta.db_table)
+
+
+def fingerprint(body_bytes):
+    """
+    SHA-256 hex digest of a request body.
+    JSON bodies are canonicalised first (sorted keys, no whitespace) so semantically
+    equal payloads share a digest; anything unparsable is hashed as raw bytes.
+    """
+    if body_bytes.strip():
+        try:
+            parsed = json.loads(body_bytes)
+        except ValueError:
+            pass
+        else:
+            return fingerprint_data(parsed)
+    return hashlib.sha256(body_bytes).hexdigest()
+
+
+def fingerprint_data(data):
+    """fingerprint() of an already parsed JSON body."""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def claim(tenant_id, key, request_hash):
+    """
+    Atomically claim an idempotency key for a request with the given fingerprint.
+    Returns a Claim; `response` is only set for REPLAY and `created_at` is the
+    moment the key was (re)claimed, which bounds how long it stays valid.
+    """
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        _CLAIM.execute(cursor, {
+            "tenant_id": tenant_id,
+            "key": key,
+            "request_hash": request_hash,
+            "in_progress": IdempotencyKey.State.IN_PROGRESS,
+            "now": now,
+            "expired_before": now - IDEMPOTENCY_TTL,
+            "lease_expired_before": now - IN_FLIGHT_LEASE,
+        })
+        row = cursor.fetchone()
+
+    if row is None:
+        # the conflicting row was committed after our snapshot; it is brand new
+        return Claim(IN_FLIGHT, None, None)
+    return _to_claim(*row, now=now)
+
+
+def claim_many(entries):
+    """
+    Claim many (tenant_id, key, request_hash) entries with one statement.
+    Returns {(tenant_id, key): Claim}. Entries must not repeat a (tenant_id, key).
+    """
+    if not entries:
+        return {}
+    now = timezone.now()
+    tenant_ids, keys, hashes = (list(col) for col in zip(*entries))
+    with connection.cursor() as cursor:
+        cursor.execute(_CLAIM_MANY_SQL, {
+            "tenant_ids": tenant_ids,
+            "keys": keys,
+            "hashes": hashes,
+            "in_progress": IdempotencyKey.State.IN_PROGRESS,
+            "now": now,
+            "expired_before": now - IDEMPOTENCY_TTL,
+            "lease_expired_before": now - IN_FLIGHT_LEASE,
+        })
+        rows = cursor.fetchall()
+
+    # a key with no visible row was committed after our snapshot: _to_claim reports it in flight
+    return {(row[0], row[1]): _to_claim(*row[2:], now=now) for row in rows}
+
+
+def _to_claim(claimed, state, same_body, response_json, created_at, now):
+    if claimed:
+        return Claim(CLAIMED, None, now)
+    if state != IdempotencyKey.State.COMPLETED:
+        return Claim(IN_FLIGHT, None, created_at)
+    if not same_body:
+        return Claim(CONFLICT, None, created_at)
+    if isinstance(response_json, str):
+        response_json = json.loads(response_json)
+    return Claim(REPLAY, response_json, created_at)
+
+
+def complete(tenant_id, key, data, claimed_at=None):
+    """
+    Store the response for a claimed key (single UPDATE). With `claimed_at`
+    (Claim.created_at) only while the claim is still ours; returns False when
+    another request has taken it over since.
+    """
+    keys = IdempotencyKey.objects.filter(tenant_id=tenant_id, key=key)
+    if claimed_at is not None:
+        keys = keys.filter(created_at=claimed_at, state=IdempotencyKey.State.IN_PROGRESS)
+    return keys.update(response_json=data, state=IdempotencyKey.State.COMPLETED) > 0
+
+
+def complete_many(results):
+    """Store responses for many claimed keys; `results` is [(tenant_id, key, data)]."""
+    if not results:
+        return
+    tenant_ids, keys, payloads = zip(*results)
+    with connection.cursor() as cursor:
+        cursor.execute(_COMPLETE_MANY_SQL, [
+            IdempotencyKey.State.COMPLETED,
+            list(tenant_ids),
+            list(keys),
+            [json.dumps(data, cls=DjangoJSONEncoder) for data in payloads],
+        ])
+
+
+def release(tenant_id, key, claimed_at=None):
+    """Drop an unfinished claim (ours, with `claimed_at`) so the client can retry straight away."""
+    keys = IdempotencyKey.objects.filter(tenant_id=tenant_id, key=key, state=IdempotencyKey.State.IN_PROGRESS)
+    if claimed_at is not None:
+        keys = keys.filter(created_at=claimed_at)
+    keys.delete()
+
+
+def release_many(entries):
+    """release() for many (tenant_id, key) pairs in one statement."""
+    if not entries:
+        return
+    tenant_ids, keys = zip(*entries)
+    with connection.cursor() as cursor:
+        cursor.execute(_RELEASE_MANY_SQL, [list(tenant_ids), list(keys), IdempotencyKey.State.IN_PROGRESS])
+
+
+# Deletes one bounded batch of expired keys, oldest first. Rows are addressed by
+# ctid so the statement does not depend on the table's key; SKIP LOCKED keeps the
+# sweeper from queueing behind a request that is reclaiming the same key.
+_PURGE_SQL = """
+DELETE FROM {table}
+WHERE ctid = ANY(ARRAY(
+    SELECT ctid FROM {table}
+    WHERE created_at < %s
+    ORDER BY created_at
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+))
+""".format(table=IdempotencyKey._meta.db_table)
+
+
+def purge_expired(batch_size, now=None):
+    """Delete up to `batch_size` keys older than IDEMPOTENCY_TTL; returns rows deleted."""
+    cutoff = (now or timezone.now()) - IDEMPOTENCY_TTL
+    with connection.cursor() as cursor:
+        cursor.execute(_PURGE_SQL, [cutoff, batch_size])
+        return cursor.rowcount
+
+
+def request_key(request):
+    """(tenant_id, Idempotency-Key, body fingerprint, None), or an error response last."""
+    key = request.headers.get("Idempotency-Key")
+    if not key:
+        return None, None, None, JsonResponse({"code":"missing_idempotency_key","message":"Idempotency-Key header required"}, status=400)
+
+    tenant_id = getattr(request, "tenant_id", None)
+    if not tenant_id:
+        return None, None, None, JsonResponse({"code":"missing_tenant","message":"X-Tenant-Id header required"}, status=400)
+
+    return tenant_id, key, fingerprint(request.body or b""), None
+
+
+def conflict_response():
+    return JsonResponse({"code":"conflict","message":"Idempotency key used with different request body"}, status=409)
+
+
+def in_progress_response():
+    response = JsonResponse({"code":"in_progress","message":"A request with this Idempotency-Key is still being processed"}, status=409)
+    response["Retry-After"] = "1"
+    return response
+
+
+class _ClaimLost(Exception):
+    """The key was taken over (IN_FLIGHT_LEASE ran out) while the view ran."""
+
 
 def idempotent_endpoint(func):
     """
     Decorator for views implementing idempotent behavior using Idempotency-Key header.
-    Stores response JSON into IdempotencyKey.response_json.
+    The view runs in a transaction that also stores its response in
+    IdempotencyKey.response_json, so a created order is never left behind a key
+    that has no response.
     """
 
     @wraps(func)
     def wrapper(view, request, *args, **kwargs):
         # Only for POST/PUT/DELETE where client provided Idempotency-Key
-        key = request.headers.get("Idempotency-Key")
-        if not key:
-            return JsonResponse({"code":"missing_idempotency_key","message":"Idempotency-Key header required"}, status=400)
-
-        tenant_id = getattr(request, "tenant_id", None)
-        if not tenant_id:
-            return JsonResponse({"code":"missing_tenant","message":"X-Tenant-Id header required"}, status=400)
-
-        body_bytes = request.body or b""
-
-        # Try to get or create the idempotency row
-        with transaction.atomic():
-            obj, created = IdempotencyKey.objects.select_for_update().get_or_create(
-                tenant_id=tenant_id, key=key,
-                defaults={"request_body": body_bytes}
-            )
-
-            if not created:
-                # check age
-                if obj.created_at + IDEMPOTENCY_TTL < timezone.now():
-                    # treat as new request: allow reprocessing — we'll update request_body below
-                    obj.request_body = body_bytes
-                    obj.response_json = None
-                    obj.created_at = timezone.now()
-                    obj.save(update_fields=['request_body','response_json','created_at'])
-                else:
-                    # same key within ttl
-                    # If response present -> replay if request_body matches
-                    if obj.response_json is not None:
-                        if obj.request_body == body_bytes:
-                            return JsonResponse(obj.response_json, status=200, safe=False)
-                        else:
-                            return JsonResponse({"code":"conflict","message":"Idempotency key used with different request body"}, status=409)
-
-            # If we reach here: either new row created, or old expired/reset, or no response yet.
-            # Mark request_body (create case already set by defaults)
-            obj.request_body = body_bytes
-            obj.save(update_fields=['request_body'])
-            # Proceed to view; we will save response after
-        # run the view (outside the transaction above so view can open its own transactions)
-        response = func(view, request, *args, **kwargs)
-
-        # After view returns, if 2xx: store response JSON into idempotency row
+        tenant_id, key, request_hash, error = request_key(request)
+        if error is not None:
+            return error
+
+        # completed keys can be answered from the replay cache without touching Postgres
+        cache = get_replay_cache()
+        cached = cache.get(tenant_id, key) if cache is not None else None
+        if cached is not None:
+            if cached[0] == request_hash:
+                metrics.idempotency(REPLAY, "cache")
+                return JsonResponse(cached[1], status=200, safe=False)
+            metrics.idempotency(CONFLICT, "cache")
+            return conflict_response()
+
+        result = claim(tenant_id, key, request_hash)
+        metrics.idempotency(result.outcome, "db")
+        if result.outcome == REPLAY:
+            if cache is not None:
+                cache.set(tenant_id, key, request_hash, result.response, result.created_at + IDEMPOTENCY_TTL)
+            return JsonResponse(result.response, status=200, safe=False)
+        if result.outcome == CONFLICT:
+            return conflict_response()
+        if result.outcome == IN_FLIGHT:
+            return in_progress_response()
+
+        if cache is not None:
+            # the key was created or reset; drop anything cached for an older incarnation
+            cache.invalidate(tenant_id, key)
+
+        # the claim above is already committed, so other requests see the key in
+        # flight; the view's writes and the stored response commit together
         try:
-            status_code = getattr(response, "status_code", 200)
-            data = response.data if hasattr(response, "data") else None
-            # convert DRF Response to JSONable (response.data) or raw HttpResponse
-            if 200 <= status_code < 300 and data is not None:
-                with transaction.atomic():
-                    # reload with lock and set response_json
-                    obj = IdempotencyKey.objects.select_for_update().get(tenant_id=tenant_id, key=key)
-                    obj.response_json = data
-                    obj.save(update_fields=['response_json'])
+            with transaction.atomic():
+                response = func(view, request, *args, **kwargs)
+                data = response.data if hasattr(response, "data") else None
+                completed = 200 <= response.status_code < 300 and data is not None
+                if completed and not complete(tenant_id, key, data, result.created_at):
+                    raise _ClaimLost
+        except _ClaimLost:
+            # rolled back: the request that took the key over answers for it
+            return in_progress_response()
         except Exception:
-            # do not hide original response on failure to persist idempotency record
-            pass
+            release(tenant_id, key, result.created_at)
+            raise
 
+        if not completed:
+            release(tenant_id, key, result.created_at)
+        elif cache is not None:
+            cache.set(tenant_id, key, request_hash, data, result.created_at + IDEMPOTENCY_TTL)
         return response
     return wrapper
@@ -0,0 +1,76 @@
+# orders_app/indexes.py
+from collections import namedtuple
+from django.apps import apps
+from django.db import connection
+
+IndexInfo = namedtuple(
+    "IndexInfo",
+    ["table", "name", "unique", "primary", "columns", "opclasses", "predicate", "expressions", "bytes", "scans"],
+)
+
+_INDEXES_SQL = """
+SELECT t.relname, i.relname, x.indisunique, x.indisprimary, x.indnkeyatts,
+       x.indkey::int2[], x.indclass::oid[], pg_get_expr(x.indpred, x.indrelid),
+       x.indexprs IS NOT NULL, pg_relation_size(i.oid), COALESCE(s.idx_scan, 0)
+FROM pg_index x
+JOIN pg_class i ON i.oid = x.indexrelid
+JOIN pg_class t ON t.oid = x.indrelid
+LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = x.indexrelid
+WHERE t.relname = ANY(%s) AND pg_table_is_visible(t.oid)
+ORDER BY t.relname, i.relname
+"""
+
+
+def app_tables():
+    return sorted(model._meta.db_table for model in apps.get_app_config("orders_app").get_models())
+
+
+def indexes(tables=None):
+    """IndexInfo for every index on `tables` (default: this app's tables)."""
+    with connection.cursor() as cursor:
+        cursor.execute(_INDEXES_SQL, [tables or app_tables()])
+        return [
+            IndexInfo(table, name, unique, primary, tuple(keys[:nkey]), tuple(classes[:nkey]),
+                      predicate, expressions, size, scans)
+            for table, name, unique, primary, nkey, keys, classes, predicate, expressions, size, scans
+            in cursor.fetchall()
+        ]
+
+
+def redundant(infos):
+    """
+    (index, covering index) pairs where every lookup the first one serves can
+    use the second: identical key columns, or a plain index whose columns lead
+    another index with the same predicate. Expression indexes are skipped.
+    """
+    found = []
+    for index in infos:
+        if index.primary or index.expressions:
+            continue
+        for other in infos:
+            if other is index or other.table != index.table or other.expressions or other.predicate != index.predicate:
+                continue
+            width = len(index.columns)
+            if other.columns[:width] != index.columns or other.opclasses[:width] != index.opclasses:
+                continue
+            if len(other.columns) == width:
+                # exact duplicates: keep the constraint, or the first by name
+                if index.unique and not other.unique or (index.unique == other.unique and index.name < other.name):
+                    continue
+            elif index.unique:
+                continue  # a unique index enforces something its wider twin does not
+            found.append((index, other))
+            break
+    return found
+
+
+def unused(infos):
+    """Indexes never scanned since statistics were last reset (constraint indexes excluded)."""
+    return [index for index in infos if index.scans == 0 and not index.unique and not index.primary]
+
+
+def stats_reset():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()")
+        row = cursor.fetchone()
+    return row[0] if row else None
@@ -0,0 +1,66 @@
+# orders_app/lookups.py
+from django.db.models import BooleanField, Func, Lookup, UUIDField, Value
+
+
+@UUIDField.register_lookup
+class UUIDAny(Lookup):
+    """
+    `id__any=[...]` -> `id = ANY(%s::uuid[])`: one array parameter instead of the
+    IN (%s, %s, ...) list, so the statement text is the same for any number of ids.
+    """
+    lookup_name = "any"
+    prepare_rhs = False
+
+    def get_db_prep_lookup(self, value, connection):
+        return "%s", [[str(v) for v in value]]
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} = ANY({rhs}::uuid[])", (*lhs_params, *rhs_params)
+
+
+class RowLessThan(Func):
+    """
+    `RowLessThan(("created_at", "id"), (ts, id))` -> `(created_at, id) < (%s, %s)`.
+
+    The row-value form of a keyset predicate: unlike the equivalent
+    `a < x OR (a = x AND b < y)` Postgres turns it into a single index
+    condition on a (..., a, b) btree, so a deep page starts where it should
+    instead of filtering every row before the cursor. Plain values are bound
+    with the type of the column they are compared to.
+    """
+    operator = "<"
+    output_field = BooleanField()
+
+    def __init__(self, fields, values):
+        if len(fields) != len(values):
+            raise ValueError(f"{type(self).__name__} needs as many values as fields")
+        self.width = len(fields)
+        values = [v if hasattr(v, "resolve_expression") else Value(v) for v in values]
+        super().__init__(*fields, *values)
+
+    def resolve_expression(self, *args, **kwargs):
+        c = super().resolve_expression(*args, **kwargs)
+        expressions = c.get_source_expressions()
+        columns, values = expressions[:c.width], expressions[c.width:]
+        values = [
+            Value(value.value, output_field=column.output_field) if isinstance(value, Value) else value
+            for column, value in zip(columns, values)
+        ]
+        c.set_source_expressions([*columns, *values])
+        return c
+
+    def as_sql(self, compiler, connection, **extra_context):
+        parts, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            parts.append(sql)
+            params.extend(expression_params)
+        columns, values = ", ".join(parts[:self.width]), ", ".join(parts[self.width:])
+        return f"({columns}) {self.operator} ({values})", params
+
+
+class RowGreaterThan(RowLessThan):
+    """`(a, b) > (x, y)`; see RowLessThan."""
+    operator = ">"
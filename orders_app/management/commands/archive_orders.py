@@ -0,0 +1,50 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from orders_app import archive
+
+
+class Command(BaseCommand):
+    help = "Move closed orders older than ORDERS_ARCHIVE_AFTER_DAYS to the archive table in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--sleep", type=float, default=0.0,
+                            help="Seconds to pause between batches to limit WAL and replica lag.")
+        parser.add_argument("--max-batches", type=int, default=None,
+                            help="Stop after this many batches even if archivable orders remain.")
+        parser.add_argument("--tenant", action="append", dest="tenants", default=None,
+                            help="Only this tenant (repeatable). Defaults to every tenant with closed orders.")
+
+    def handle(self, *args, **opts):
+        cutoff = archive.window_start()
+        if cutoff is None:
+            raise CommandError("archival is off; set ORDERS_ARCHIVE_AFTER_DAYS")
+        table_size, index_size, live_rows = archive.table_sizes()
+        self.stdout.write(
+            f"{archive.ORDER_TABLE}: {table_size} + {index_size} indexes, ~{live_rows} live rows before archival"
+        )
+
+        total = batches = 0
+        started = time.monotonic()
+        for tenant_id in opts["tenants"] or archive.tenants_with_closed_orders():
+            while opts["max_batches"] is None or batches < opts["max_batches"]:
+                # each batch is its own short transaction (autocommit)
+                moved = archive.move_batch(tenant_id, cutoff, opts["batch_size"])
+                batches += 1
+                total += moved
+                if moved < opts["batch_size"]:
+                    break
+                if opts["sleep"]:
+                    time.sleep(opts["sleep"])
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed > 0 else 0.0
+        table_size, index_size, live_rows = archive.table_sizes()
+        self.stdout.write(
+            f"moved {total} order(s) created before {cutoff:%Y-%m-%d %H:%M} in {batches} batch(es), "
+            f"{elapsed:.2f}s ({rate:.0f} rows/sec)"
+        )
+        self.stdout.write(
+            f"{archive.ORDER_TABLE}: {table_size} + {index_size} indexes, ~{live_rows} live rows after archival "
+            f"(VACUUM makes the freed space reusable)"
+        )
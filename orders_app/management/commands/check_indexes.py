@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from orders_app.indexes import indexes, redundant, stats_reset, unused
+
+
+def _mb(size):
+    return f"{size / 2 ** 20:.1f} MB"
+
+
+class Command(BaseCommand):
+    help = "Report duplicate or redundant indexes (fails if any) and indexes that are never scanned."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--table", action="append", dest="tables", default=None,
+                            help="Only this table (repeatable). Defaults to every orders_app table.")
+
+    def handle(self, *args, **opts):
+        infos = indexes(opts["tables"])
+
+        duplicates = redundant(infos)
+        for index, covering in duplicates:
+            self.stdout.write(
+                f"redundant: {index.table}.{index.name} ({_mb(index.bytes)}) is covered by {covering.name}"
+            )
+
+        idle = unused(infos)
+        reset = stats_reset()
+        since = f"since {reset:%Y-%m-%d %H:%M}" if reset else "since the statistics were created"
+        for index in idle:
+            self.stdout.write(f"unused {since}: {index.table}.{index.name} ({_mb(index.bytes)})")
+
+        self.stdout.write(f"{len(infos)} index(es), {_mb(sum(i.bytes for i in infos))} in total")
+        if duplicates:
+            raise CommandError(f"{len(duplicates)} redundant index(es); drop them in a migration")
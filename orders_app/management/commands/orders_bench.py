@@ -0,0 +1,49 @@
+import json
+from importlib import import_module
+from django.core.management.base import BaseCommand, CommandError
+from orders_app.benchmarks import BENCHMARKS, compare
+
+
+class Command(BaseCommand):
+    help = "Run one of the orders_app benchmarks and print its results as JSON."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest="benchmark", required=True)
+        for name, module_path in BENCHMARKS.items():
+            module = import_module(module_path)
+            subparser = subparsers.add_parser(name, help=(module.__doc__ or "").strip().splitlines()[0])
+            module.add_arguments(subparser)
+            subparser.add_argument("--output", help="Also write the results JSON to this file.")
+            subparser.add_argument("--baseline", help="Results JSON of an earlier run to compare against.")
+            subparser.add_argument("--max-regression", type=float, default=None,
+                                   help="Fail when a timing, rate or error count is this many percent worse "
+                                        "than the baseline.")
+
+    def handle(self, *args, **options):
+        module = import_module(BENCHMARKS[options["benchmark"]])
+        results = {"benchmark": options["benchmark"], **module.run(options)}
+        self.stdout.write(json.dumps(results, indent=2))
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+                f.write("\n")
+        if options["baseline"]:
+            self._compare(results, options["baseline"], options["max_regression"])
+
+    def _compare(self, results, path, max_regression):
+        with open(path) as f:
+            baseline = json.load(f)
+        if baseline.get("benchmark") != results["benchmark"]:
+            raise CommandError(f"{path} holds {baseline.get('benchmark')!r} results, not {results['benchmark']!r}")
+
+        regressions = []
+        self.stdout.write(f"\n{'result':<32} {'baseline':>12} {'this run':>12} {'change':>9}")
+        for key, old, new, change, regressed in compare(results, baseline):
+            flag = ""
+            if max_regression is not None and regressed is not None and regressed > max_regression:
+                regressions.append(key)
+                flag = "  REGRESSED"
+            self.stdout.write(f"{key:<32} {old:>12} {new:>12} {change:>+8.1f}%{flag}")
+        if regressions:
+            raise CommandError(f"{len(regressions)} result(s) regressed by more than {max_regression}%: "
+                               + ", ".join(regressions))
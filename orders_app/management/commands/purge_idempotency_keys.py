@@ -0,0 +1,51 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from orders_app.idempotency import purge_expired
+from orders_app.models import IdempotencyKey
+
+
+def _table_size(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_size_pretty(pg_total_relation_size(%s::regclass)), "
+            "(SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = %s::regclass)",
+            [table, table],
+        )
+        return cursor.fetchone()
+
+
+class Command(BaseCommand):
+    help = "Delete expired idempotency keys in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--sleep", type=float, default=0.0,
+                            help="Seconds to pause between batches to limit WAL and replica lag.")
+        parser.add_argument("--max-batches", type=int, default=None,
+                            help="Stop after this many batches even if expired rows remain.")
+
+    def handle(self, *args, **opts):
+        table = IdempotencyKey._meta.db_table
+        size, estimated_rows = _table_size(table)
+        self.stdout.write(f"{table}: {size}, ~{estimated_rows} rows before purge")
+
+        total = batches = 0
+        started = time.monotonic()
+        while opts["max_batches"] is None or batches < opts["max_batches"]:
+            # each batch is its own short transaction (autocommit)
+            deleted = purge_expired(opts["batch_size"])
+            batches += 1
+            total += deleted
+            if deleted < opts["batch_size"]:
+                break
+            if opts["sleep"]:
+                time.sleep(opts["sleep"])
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed > 0 else 0.0
+        size, estimated_rows = _table_size(table)
+        self.stdout.write(
+            f"deleted {total} row(s) in {batches} batch(es), {elapsed:.2f}s ({rate:.0f} rows/sec)"
+        )
+        self.stdout.write(f"{table}: {size}, ~{estimated_rows} rows after purge")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from orders_app.stats import rebuild, verify
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-tenant order counters from the orders table (or only check them)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenant", default=None, help="Only this tenant.")
+        parser.add_argument("--verify", action="store_true",
+                            help="Report counters that drifted from the orders table; change nothing.")
+
+    def handle(self, *args, **opts):
+        if opts["verify"]:
+            mismatches = verify(opts["tenant"])
+            for (tenant_id, status), (stored, actual) in sorted(mismatches.items()):
+                self.stdout.write(f"{tenant_id} {status}: stored {stored}, actual {actual}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} counter(s) out of date; run rebuild_order_stats")
+            self.stdout.write("counters match")
+            return
+
+        written = rebuild(opts["tenant"])
+        self.stdout.write(f"rebuilt {written} counter row(s)")
@@ -0,0 +1,29 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from orders_app.models import Tenant
+
+
+class Command(BaseCommand):
+    help = "Create or update a tenant accepted by the API when tenant validation is on."
+
+    def add_arguments(self, parser):
+        parser.add_argument("tenant", help="Value clients send in X-Tenant-Id.")
+        parser.add_argument("--name", default=None)
+        parser.add_argument("--config", default=None, help="Per-tenant settings as a JSON object.")
+        parser.add_argument("--deactivate", action="store_true", help="Reject the tenant's requests from now on.")
+
+    def handle(self, *args, **opts):
+        values = {"is_active": not opts["deactivate"]}
+        if opts["name"] is not None:
+            values["name"] = opts["name"]
+        if opts["config"] is not None:
+            try:
+                values["config"] = json.loads(opts["config"])
+            except ValueError as exc:
+                raise CommandError(f"--config is not valid JSON: {exc}")
+            if not isinstance(values["config"], dict):
+                raise CommandError("--config must be a JSON object")
+
+        tenant, created = Tenant.objects.update_or_create(id=opts["tenant"], defaults=values)
+        state = "active" if tenant.is_active else "inactive"
+        self.stdout.write(f"{'created' if created else 'updated'} tenant {tenant.id} ({state})")
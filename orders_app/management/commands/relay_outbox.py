@@ -0,0 +1,43 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from orders_app.outbox import DEFAULT_BATCH_SIZE, StreamPublisher, get_publisher, relay_batch
+
+
+class Command(BaseCommand):
+    help = "Publish pending Outbox rows in batches. Safe to run as several parallel processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--interval", type=float, default=1.0,
+                            help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument("--once", action="store_true",
+                            help="Drain the outbox and exit instead of polling forever.")
+        parser.add_argument("--publisher", default=None,
+                            help="Dotted path of a publisher class (defaults to settings.OUTBOX_PUBLISHER).")
+        parser.add_argument("--file", default=None,
+                            help="Append events as JSON lines to this file instead of stdout.")
+
+    def handle(self, *args, **opts):
+        if opts["file"]:
+            publisher = get_publisher("orders_app.outbox.FilePublisher", path=opts["file"])
+        elif opts["publisher"] or hasattr(settings, "OUTBOX_PUBLISHER"):
+            publisher = get_publisher(opts["publisher"])
+        else:
+            publisher = StreamPublisher(self.stdout)
+
+        total = 0
+        try:
+            while True:
+                published = relay_batch(publisher, batch_size=opts["batch_size"])
+                total += published
+                if published:
+                    continue
+                if opts["once"]:
+                    break
+                time.sleep(opts["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            publisher.close()
+        self.stderr.write(f"published {total} event(s)")
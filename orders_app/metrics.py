@@ -0,0 +1,256 @@
+# orders_app/metrics.py
+"""
+In-process request metrics, rendered in the Prometheus text format at /metrics.
+
+Values are per process (scrape every worker, or let Prometheus sum them); they
+reset when the process restarts, which Prometheus rate() handles.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from .models import Outbox
+from .pool import pool_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 34)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def lines(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def count(self, *labels):
+        counts = self._values.get(labels)
+        return sum(counts[:-1]) if counts else 0
+
+    def lines(self):
+        with self._lock:
+            values = sorted((labels, list(counts)) for labels, counts in self._values.items())
+        for labels, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(counts[-1])}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+REQUESTS = Counter(
+    "orders_http_requests_total", "HTTP requests by route, method and status code.",
+    ("route", "method", "status"),
+)
+REQUEST_LATENCY = Histogram(
+    "orders_http_request_duration_seconds", "Time to produce the response (headers, for streamed exports).",
+    ("route", "method"),
+)
+REQUEST_QUERIES = Histogram(
+    "orders_db_queries_per_request", "SQL statements executed per request.",
+    ("route",), buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    "orders_db_time_per_request_seconds", "Time spent executing SQL per request.",
+    ("route",), buckets=DB_TIME_BUCKETS,
+)
+IDEMPOTENCY = Counter(
+    "orders_idempotency_keys_total",
+    "Idempotency-Key lookups by outcome (claimed, replay, conflict, in_flight) and source (cache, db).",
+    ("outcome", "source"),
+)
+CREATE_BATCH_SIZE = Histogram(
+    "orders_create_batch_size", "Creates committed together by the group committer.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+CREATE_BATCH_WAIT = Histogram(
+    "orders_create_batch_wait_seconds", "Time a create waited to be batched before its batch ran.",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+METRICS = [
+    REQUESTS, REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, IDEMPOTENCY,
+    CREATE_BATCH_SIZE, CREATE_BATCH_WAIT,
+]
+
+
+def enabled():
+    return getattr(settings, "ORDERS_METRICS_ENABLED", False)
+
+
+# --- per-request SQL accounting ---
+
+# [statements, seconds] of the request being served; copied into sync_to_async
+# threads with the rest of the context, so async views are counted too
+_request_db = ContextVar("orders_request_db", default=None)
+
+
+def _count_queries(execute, sql, params, many, context):
+    totals = _request_db.get()
+    if totals is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        totals[0] += 1
+        totals[1] += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def _install_wrapper(sender, connection, **kwargs):
+    # DatabaseWrapper objects outlive their (pooled) connections; install once
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+def start_request():
+    """Start counting SQL for the current request; returns a token for finish_request."""
+    return _request_db.set([0, 0.0])
+
+
+def finish_request(token, request, response, started):
+    totals = _request_db.get()
+    _request_db.reset(token)
+    match = getattr(request, "resolver_match", None)
+    route = (match.url_name or match.route) if match is not None else "unmatched"
+    method = request.method if request.method in _METHODS else "OTHER"
+    REQUESTS.inc(route, method, str(response.status_code))
+    REQUEST_LATENCY.observe(time.perf_counter() - started, route, method)
+    REQUEST_QUERIES.observe(totals[0], route)
+    REQUEST_DB_TIME.observe(totals[1], route)
+
+
+def idempotency(outcome, source, amount=1):
+    IDEMPOTENCY.inc(outcome, source, amount=amount)
+
+
+# --- rendering ---
+
+def _outbox_lines():
+    # one scan of the partial outbox_unpublished_idx, at scrape time only
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT count(*), EXTRACT(EPOCH FROM now() - min(created_at)) "
+            f"FROM {Outbox._meta.db_table} WHERE published_at IS NULL"
+        )
+        backlog, oldest = cursor.fetchone()
+    return [
+        "# HELP orders_outbox_backlog Outbox events not yet published.",
+        "# TYPE orders_outbox_backlog gauge",
+        f"orders_outbox_backlog {backlog}",
+        "# HELP orders_outbox_oldest_pending_seconds Age of the oldest unpublished outbox event.",
+        "# TYPE orders_outbox_oldest_pending_seconds gauge",
+        f"orders_outbox_oldest_pending_seconds {float(oldest or 0)!r}",
+    ]
+
+
+# (name, type, help, pool_stats() key); cumulative values become counters
+_POOL_METRICS = (
+    ("orders_db_pool_size", "gauge", "Connections the pool holds open (in use and idle).", "size"),
+    ("orders_db_pool_max_size", "gauge", "Most connections the pool may open.", "max"),
+    ("orders_db_pool_in_use", "gauge", "Pooled connections checked out by requests.", "in_use"),
+    ("orders_db_pool_idle", "gauge", "Pooled connections ready to be checked out.", "idle"),
+    ("orders_db_pool_waiting", "gauge", "Requests waiting for a free connection.", "waiting"),
+    ("orders_db_pool_requests_total", "counter", "Connection checkouts.", "requests"),
+    ("orders_db_pool_requests_queued_total", "counter", "Checkouts that had to wait.", "requests_queued"),
+    ("orders_db_pool_request_errors_total", "counter", "Checkouts that failed (timeout).", "request_errors"),
+    ("orders_db_pool_acquire_seconds_total", "counter", "Time spent waiting for a connection.", "acquire_seconds"),
+    ("orders_db_pool_connections_opened_total", "counter", "Connections opened by the pool.", "connections_opened"),
+    ("orders_db_pool_connect_seconds_total", "counter", "Time spent opening connections.", "connect_seconds"),
+    ("orders_db_pool_connection_errors_total", "counter", "Failed connection attempts.", "connection_errors"),
+)
+
+
+def _pool_lines():
+    stats = pool_stats()
+    if stats is None:  # pooling off
+        return []
+    lines = []
+    for name, kind, documentation, key in _POOL_METRICS:
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {_format_value(stats[key])}")
+    return lines
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.lines())
+    lines.extend(_outbox_lines())
+    lines.extend(_pool_lines())
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Drop every recorded value (tests)."""
+    for metric in METRICS:
+        with metric._lock:
+            metric._values.clear()
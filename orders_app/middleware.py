@@ -1,26 +1,306 @@
-
-from django.utils.deprecation import MiddlewareMixin
+import math
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
 from django.http import JsonResponse
+from django.utils.module_loading import import_string
+from . import metrics
+from .tenants import get_tenant_registry
+from .throttling import ENDPOINT_CLASSES, get_admission
+
+
+def _is_api(request):
+    return request.path.startswith(settings.ORDERS_API_PREFIX)
+
+
+class _Middleware:
+    """Base for middleware that runs natively in both sync and async mode."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+
+class MetricsMiddleware(_Middleware):
+    """
+    Records per-route request counts, latency, SQL statement count and SQL time
+    (see orders_app.metrics). Goes first in MIDDLEWARE so the time spent in
+    every other middleware is included.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not metrics.enabled():
+            return self.get_response(request)
+        started, token = time.perf_counter(), metrics.start_request()
+        response = self.get_response(request)
+        metrics.finish_request(token, request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        if not metrics.enabled():
+            return await self.get_response(request)
+        started, token = time.perf_counter(), metrics.start_request()
+        response = await self.get_response(request)
+        metrics.finish_request(token, request, response, started)
+        return response
+
+
+class SiteMiddleware(_Middleware):
+    """
+    Runs the ORDERS_SITE_MIDDLEWARE stack (sessions, CSRF, auth, messages, ...)
+    for everything outside ORDERS_API_PREFIX and skips it for API requests.
+    The inner middleware's process_view / process_exception /
+    process_template_response hooks are forwarded for site requests only.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self._view_hooks, self._exception_hooks, self._template_hooks = [], [], []
+        handler = convert_exception_to_response(get_response)
+        for path in reversed(settings.ORDERS_SITE_MIDDLEWARE):
+            factory = import_string(path)
+            if not (getattr(factory, "sync_capable", True) and getattr(factory, "async_capable", False)):
+                raise ImproperlyConfigured(f"{path} must support both sync and async mode")
+            try:
+                instance = factory(handler)
+            except MiddlewareNotUsed:
+                continue
+            # same hook order as django.core.handlers.base.BaseHandler.load_middleware
+            if hasattr(instance, "process_view"):
+                self._view_hooks.insert(0, instance.process_view)
+            if hasattr(instance, "process_template_response"):
+                self._template_hooks.append(instance.process_template_response)
+            if hasattr(instance, "process_exception"):
+                self._exception_hooks.append(instance.process_exception)
+            handler = convert_exception_to_response(instance)
+        self.site_handler = handler
+        # only advertise hooks something needs, so API responses skip them entirely
+        # (async variants under ASGI, or Django would run them in a thread for every request)
+        if self._view_hooks:
+            self.process_view = self._aprocess_view if self.is_async else self._process_view
+        if self._template_hooks:
+            self.process_template_response = (
+                self._aprocess_template_response if self.is_async else self._process_template_response
+            )
+        if self._exception_hooks:
+            self.process_exception = self._process_exception
+
+    def __call__(self, request):
+        if _is_api(request):
+            return self.get_response(request)
+        return self.site_handler(request)
+
+    def _process_view(self, request, view_func, view_args, view_kwargs):
+        if _is_api(request):
+            return None
+        for hook in self._view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if _is_api(request):
+            return None
+        return await sync_to_async(self._process_view)(request, view_func, view_args, view_kwargs)
+
+    def _process_template_response(self, request, response):
+        if not _is_api(request):
+            for hook in self._template_hooks:
+                response = hook(request, response)
+        return response
+
+    async def _aprocess_template_response(self, request, response):
+        if _is_api(request):
+            return response
+        return await sync_to_async(self._process_template_response)(request, response)
+
+    def _process_exception(self, request, exception):
+        if _is_api(request):
+            return None
+        for hook in self._exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
 
-# class TenantMiddleware(MiddlewareMixin):
-#     def process_request(self, request):
-#         tenant = request.headers.get("X-Tenant-Id")
-#         if not tenant:
-#             return JsonResponse({"code":"missing_tenant","message":"X-Tenant-Id header required"}, status=400)
-#         request.tenant_id = tenant
 
+class TenantMiddleware(_Middleware):
+    """
+    Resolves X-Tenant-Id for API requests into request.tenant_id (and
+    request.tenant, the registry entry with per-tenant config, when tenants are
+    validated). Sync and async capable: under ASGI the request stays on the
+    event loop instead of hopping to a thread for the check.
+    """
 
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not _is_api(request):
+            return self.get_response(request)
+        tenant_id = request.headers.get("X-Tenant-Id")
+        registry = get_tenant_registry()
+        tenant = registry.get(tenant_id) if registry and tenant_id else None
+        return self._reject(request, tenant_id, tenant, registry) or self.get_response(request)
 
-EXEMPT_PATHS = ["/schema/", "/docs/", "/redoc/"]
+    async def __acall__(self, request):
+        if not _is_api(request):
+            return await self.get_response(request)
+        tenant_id = request.headers.get("X-Tenant-Id")
+        registry = get_tenant_registry()
+        tenant = await registry.aget(tenant_id) if registry and tenant_id else None
+        return self._reject(request, tenant_id, tenant, registry) or await self.get_response(request)
 
-class TenantMiddleware(MiddlewareMixin):
-    def process_request(self, request):
-        if any(request.path.startswith(p) for p in EXEMPT_PATHS):
-            return  # skip tenant check
-        tenant = request.headers.get("X-Tenant-Id")
-        if not tenant:
+    def _reject(self, request, tenant_id, tenant, registry):
+        """Error response for a missing or unknown tenant; otherwise tag the request."""
+        if not tenant_id:
             return JsonResponse(
                 {"code":"missing_tenant","message":"X-Tenant-Id header required"}, 
                 status=400
             )
-        request.tenant_id = tenant
+        if registry is not None and tenant is None:
+            return JsonResponse({"code":"unknown_tenant","message":"unknown or inactive tenant"}, status=403)
+        request.tenant_id = tenant_id
+        request.tenant = tenant
+        return None
+
+
+def _too_many(code, message, retry_after):
+    response = JsonResponse({"code": code, "message": message}, status=429)
+    response["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+class _ReleasingContent:
+    """
+    Streaming content that calls `release` once, after the last chunk or when
+    the response is closed (StreamingHttpResponse.close() closes its content),
+    so a client that disconnects before the body starts still frees its slot.
+    """
+
+    def __init__(self, content, release):
+        self._content = content
+        self._release = release
+
+    def __iter__(self):
+        try:
+            yield from self._content
+        finally:
+            self.close()
+
+    def close(self):
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+
+class _AsyncReleasingContent(_ReleasingContent):
+    async def __aiter__(self):
+        try:
+            async for chunk in self._content:
+                yield chunk
+        finally:
+            self.close()
+
+    __iter__ = None  # StreamingHttpResponse tries iter() before aiter()
+
+
+class AdmissionMiddleware(_Middleware):
+    """
+    Per-tenant admission control for API requests (see orders_app.throttling):
+    429 rate_limited when the tenant's token bucket for the endpoint class is
+    empty, 429 too_many_concurrent when it already has its cap of requests in
+    flight in this process. Goes after TenantMiddleware; a no-op unless
+    ORDERS_RATE_LIMITS["ENABLED"].
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # a coroutine under ASGI, so the bucket check does not hop to a thread
+        self.process_view = self._aprocess_view if self.is_async else self._process_view
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        admission = get_admission()
+        if admission is None or not _is_api(request):
+            return self.get_response(request)
+        release = self._acquire(admission, request)
+        if release is None:
+            return _too_many("too_many_concurrent", "too many requests in flight for this tenant", 1)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            release()
+            raise
+        return self._release_after(response, release)
+
+    async def __acall__(self, request):
+        admission = get_admission()
+        if admission is None or not _is_api(request):
+            return await self.get_response(request)
+        release = self._acquire(admission, request)
+        if release is None:
+            return _too_many("too_many_concurrent", "too many requests in flight for this tenant", 1)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            release()
+            raise
+        return self._release_after(response, release)
+
+    def _acquire(self, admission, request):
+        """A callable that frees the tenant's slot, or None when it has none left."""
+        limit = admission.concurrency_limit(getattr(request, "tenant", None))
+        if not limit:
+            return lambda: None
+        if not admission.concurrency.acquire(request.tenant_id, limit):
+            return None
+        return lambda: admission.concurrency.release(request.tenant_id)
+
+    @staticmethod
+    def _release_after(response, release):
+        if not response.streaming:
+            release()
+            return response
+        # an export holds its connection until the body is sent: free the slot
+        # when the content is exhausted or the response is closed, whichever is first
+        content_class = _AsyncReleasingContent if response.is_async else _ReleasingContent
+        response.streaming_content = content_class(response.streaming_content, release)
+        return response
+
+    def _rate(self, request):
+        admission = get_admission()
+        if admission is None or request.resolver_match is None:
+            return None
+        endpoint_class = ENDPOINT_CLASSES.get(request.resolver_match.url_name)
+        if endpoint_class is None:
+            return None
+        limit = admission.rate(getattr(request, "tenant", None), endpoint_class)
+        if limit is None:
+            return None
+        return admission.buckets, (request.tenant_id, endpoint_class), limit
+
+    def _process_view(self, request, view_func, view_args, view_kwargs):
+        rate = self._rate(request)
+        if rate is None:
+            return None
+        buckets, key, (per_second, burst) = rate
+        wait = buckets.take(key, per_second, burst)
+        if wait:
+            return _too_many("rate_limited", f"rate limit exceeded for {key[1]} requests", wait)
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        rate = self._rate(request)
+        if rate is None:
+            return None
+        buckets, key, (per_second, burst) = rate
+        wait = await buckets.atake(key, per_second, burst)
+        if wait:
+            return _too_many("rate_limited", f"rate limit exceeded for {key[1]} requests", wait)
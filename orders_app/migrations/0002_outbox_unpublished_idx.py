@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:19
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # the outbox can be large; build the index without blocking writers
+    atomic = False
+
+    dependencies = [
+        ('orders_app', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='outbox',
+            index=models.Index(condition=models.Q(('published_at__isnull', True)), fields=['created_at'], name='outbox_unpublished_idx'),
+        ),
+    ]
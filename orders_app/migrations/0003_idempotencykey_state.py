@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0002_outbox_unpublished_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='state',
+            field=models.CharField(choices=[('in_progress', 'In Progress'), ('completed', 'Completed')], default='in_progress', max_length=20),
+        ),
+        # rows written before this migration are finished if they hold a response
+        migrations.RunSQL(
+            "UPDATE orders_app_idempotencykey SET state = 'completed' WHERE response_json IS NOT NULL",
+            migrations.RunSQL.noop,
+        ),
+    ]
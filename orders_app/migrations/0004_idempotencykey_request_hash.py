@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:20
+
+import hashlib
+import json
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def _fingerprint(body_bytes):
+    # frozen copy of orders_app.idempotency.fingerprint
+    canonical = body_bytes
+    if body_bytes.strip():
+        try:
+            parsed = json.loads(body_bytes)
+        except ValueError:
+            pass
+        else:
+            canonical = json.dumps(parsed, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+    return hashlib.sha256(canonical).hexdigest()
+
+
+def hash_request_bodies(apps, schema_editor):
+    IdempotencyKey = apps.get_model('orders_app', 'IdempotencyKey')
+    rows = IdempotencyKey.objects.only('pk', 'request_body').iterator(chunk_size=BATCH_SIZE)
+    batch = []
+    for row in rows:
+        row.request_hash = _fingerprint(bytes(row.request_body or b""))
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            IdempotencyKey.objects.bulk_update(batch, ['request_hash'])
+            batch = []
+    if batch:
+        IdempotencyKey.objects.bulk_update(batch, ['request_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0003_idempotencykey_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='request_hash',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.RunPython(hash_request_bodies, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='idempotencykey',
+            name='request_body',
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:21
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('orders_app', '0004_idempotencykey_request_hash'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='idempotencykey',
+            index=models.Index(fields=['created_at'], name='idempotency_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:26
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('orders_app', '0005_idempotency_created_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['tenant_id', 'status', '-created_at', '-id'], name='orders_tenant_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['tenant_id', 'updated_at', 'id'], name='orders_tenant_updated_idx'),
+        ),
+    ]
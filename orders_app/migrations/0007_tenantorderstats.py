@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0006_order_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantOrderStats',
+            fields=[
+                ('pk', models.CompositePrimaryKey('tenant_id', 'status', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('tenant_id', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('confirmed', 'Confirmed'), ('closed', 'Closed')], max_length=20)),
+                ('order_count', models.BigIntegerField(default=0)),
+                ('total_cents', models.BigIntegerField(default=0)),
+            ],
+        ),
+        # seed the counters from existing orders
+        migrations.RunSQL(
+            """
+            INSERT INTO orders_app_tenantorderstats (tenant_id, status, order_count, total_cents)
+            SELECT tenant_id, status, COUNT(*), COALESCE(SUM(total_cents), 0)
+            FROM orders_app_order
+            GROUP BY tenant_id, status
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
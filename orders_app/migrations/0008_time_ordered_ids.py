@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:30
+
+import orders_app.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0007_tenantorderstats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='id',
+            field=models.UUIDField(default=orders_app.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='outbox',
+            name='id',
+            field=models.UUIDField(default=orders_app.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0008_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tenant',
+            fields=[
+                ('id', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, default='', max_length=255)),
+                ('is_active', models.BooleanField(default=True)),
+                ('config', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        # register every tenant that already has orders
+        migrations.RunSQL(
+            """
+            INSERT INTO orders_app_tenant (id, name, is_active, config, created_at)
+            SELECT DISTINCT tenant_id, '', TRUE, '{}'::jsonb, NOW() FROM orders_app_order
+            ON CONFLICT (id) DO NOTHING
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
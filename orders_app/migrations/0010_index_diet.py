@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:04
+
+import django.utils.timezone
+from django.contrib.postgres.operations import RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+def _drop_concurrently(name, create):
+    return migrations.RunSQL(
+        f"DROP INDEX CONCURRENTLY IF EXISTS {name}",
+        reverse_sql=f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON orders_app_order {create}",
+    )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('orders_app', '0009_tenant'),
+    ]
+
+    operations = [
+        # single-column order indexes from db_index=True; every query leads with
+        # tenant_id and is served by the composite indexes
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                _drop_concurrently('orders_app_order_tenant_id_91d1227c', '(tenant_id)'),
+                _drop_concurrently('orders_app_order_tenant_id_91d1227c_like', '(tenant_id varchar_pattern_ops)'),
+                _drop_concurrently('orders_app_order_created_at_4fcd6cbd', '(created_at)'),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='order',
+                    name='tenant_id',
+                    field=models.CharField(max_length=255),
+                ),
+                migrations.AlterField(
+                    model_name='order',
+                    name='created_at',
+                    field=models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+        ),
+        # duplicate of the (tenant_id, key) unique constraint
+        RemoveIndexConcurrently(
+            model_name='idempotencykey',
+            name='orders_app__tenant__05de89_idx',
+        ),
+        migrations.RenameIndex(
+            model_name='outbox',
+            new_name='outbox_tenant_created_idx',
+            old_name='orders_app__tenant__6d40ea_idx',
+        ),
+        # built here without blocking writes; 0011 promotes it to the primary key
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idempotency_tenant_key_pk "
+            "ON orders_app_idempotencykey (tenant_id, key)",
+            reverse_sql="DROP INDEX CONCURRENTLY IF EXISTS idempotency_tenant_key_pk",
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0010_index_diet'),
+    ]
+
+    operations = [
+        # (tenant_id, key) becomes the primary key: the surrogate id column, its
+        # index and the unique constraint go, leaving one index to maintain.
+        # Django cannot migrate to a composite primary key itself.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    [
+                        "ALTER TABLE orders_app_idempotencykey DROP COLUMN id",
+                        "ALTER TABLE orders_app_idempotencykey "
+                        "DROP CONSTRAINT IF EXISTS orders_app_idempotencykey_tenant_id_key_0525ce90_uniq",
+                        "ALTER TABLE orders_app_idempotencykey ADD CONSTRAINT orders_app_idempotencykey_pkey "
+                        "PRIMARY KEY USING INDEX idempotency_tenant_key_pk",
+                    ],
+                    reverse_sql=[
+                        "ALTER TABLE orders_app_idempotencykey DROP CONSTRAINT orders_app_idempotencykey_pkey",
+                        "ALTER TABLE orders_app_idempotencykey "
+                        "ADD COLUMN id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY",
+                        "ALTER TABLE orders_app_idempotencykey ADD CONSTRAINT "
+                        "orders_app_idempotencykey_tenant_id_key_0525ce90_uniq UNIQUE (tenant_id, key)",
+                        "CREATE UNIQUE INDEX idempotency_tenant_key_pk ON orders_app_idempotencykey (tenant_id, key)",
+                    ],
+                ),
+            ],
+            state_operations=[
+                migrations.AlterUniqueTogether(
+                    name='idempotencykey',
+                    unique_together=set(),
+                ),
+                migrations.AddField(
+                    model_name='idempotencykey',
+                    name='pk',
+                    field=models.CompositePrimaryKey('tenant_id', 'key', blank=True, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.RemoveField(
+                    model_name='idempotencykey',
+                    name='id',
+                ),
+            ],
+        ),
+    ]
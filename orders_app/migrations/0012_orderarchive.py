@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0011_idempotency_composite_pk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderArchive',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('tenant_id', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('confirmed', 'Confirmed'), ('closed', 'Closed')], max_length=20)),
+                ('version', models.IntegerField()),
+                ('total_cents', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant_id', '-created_at', '-id'], name='archive_tenant_created_id_idx')],
+            },
+        ),
+    ]
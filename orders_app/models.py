@@ -1,32 +1,60 @@
-import uuid
 from django.db import models
 from django.utils import timezone
+from .ids import new_id
 class Order(models.Model):
     class Status(models.TextChoices):
         DRAFT = "draft"
         CONFIRMED = "confirmed"
         CLOSED = "closed"
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    tenant_id = models.CharField(max_length=255, db_index=True)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
+    # no single-column indexes: every query filters on tenant_id first, which
+    # the composite indexes below already lead with
+    tenant_id = models.CharField(max_length=255)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.DRAFT)
     version = models.IntegerField(default=1)
     total_cents = models.IntegerField(null=True, blank=True)
-    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['tenant_id', '-created_at', '-id'], name='orders_tenant_created_id_idx'),
-           
+            # status-filtered list pages: a bounded range scan in list order
+            models.Index(fields=['tenant_id', 'status', '-created_at', '-id'], name='orders_tenant_status_idx'),
+            # updatedSince filter
+            models.Index(fields=['tenant_id', 'updated_at', 'id'], name='orders_tenant_updated_idx'),
         ]
 
     def __str__(self):
         return f"Order({self.id}, tenant={self.tenant_id}, status={self.status}, v={self.version})"
 
 
+class OrderArchive(models.Model):
+    """
+    Closed orders moved out of Order by `archive_orders` once they are older than
+    ORDERS_ARCHIVE["AFTER_DAYS"] (see orders_app.archive). Same columns, never
+    updated again; list and single reads fall back to this table.
+    """
+    id = models.UUIDField(primary_key=True)
+    tenant_id = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=Order.Status.choices)
+    version = models.IntegerField()
+    total_cents = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # list pages past the hot window; every archived order is closed, so
+            # this one index also serves status=closed
+            models.Index(fields=['tenant_id', '-created_at', '-id'], name='archive_tenant_created_id_idx'),
+        ]
+
+
 class Outbox(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
     event_type = models.CharField(max_length=255)
     order_id = models.UUIDField()
     tenant_id = models.CharField(max_length=255)
@@ -36,19 +64,58 @@ class Outbox(models.Model):
 
     class Meta:
         indexes = [
-            models.Index(fields=['tenant_id', 'created_at']),
+            models.Index(fields=['tenant_id', 'created_at'], name='outbox_tenant_created_idx'),
+            # only pending rows are indexed, so the relay's claim query stays cheap
+            # no matter how many published rows accumulate
+            models.Index(fields=['created_at'], condition=models.Q(published_at__isnull=True),
+                         name='outbox_unpublished_idx'),
         ]
 
 
 class IdempotencyKey(models.Model):
+    class State(models.TextChoices):
+        IN_PROGRESS = "in_progress"
+        COMPLETED = "completed"
+
+    pk = models.CompositePrimaryKey('tenant_id', 'key')
     tenant_id = models.CharField(max_length=255)
     key = models.CharField(max_length=255)
-    request_body = models.BinaryField(null=True)  
+    # SHA-256 hex digest of the canonical JSON request body (see idempotency.fingerprint)
+    request_hash = models.CharField(max_length=64, null=True)
     response_json = models.JSONField(null=True, blank=True)
+    state = models.CharField(max_length=20, choices=State.choices, default=State.IN_PROGRESS)
     created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
-        unique_together = (('tenant_id', 'key'),)
         indexes = [
-            models.Index(fields=['tenant_id', 'key']),
+            # lets the expiry sweeper pick the oldest rows without a full scan
+            models.Index(fields=['created_at'], name='idempotency_created_idx'),
         ]
+
+
+class TenantOrderStats(models.Model):
+    """
+    Per-tenant, per-status order counters, maintained in the same transaction as
+    every create / confirm / close (see orders_app.stats and orders_app.transitions).
+    """
+    pk = models.CompositePrimaryKey('tenant_id', 'status')
+    tenant_id = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=Order.Status.choices)
+    order_count = models.BigIntegerField(default=0)
+    total_cents = models.BigIntegerField(default=0)
+
+
+class Tenant(models.Model):
+    """
+    Known tenants. X-Tenant-Id is validated against this table (through the
+    in-memory TenantRegistry) when ORDERS_TENANT_REGISTRY["VALIDATE"] is on;
+    `config` carries per-tenant overrides.
+    """
+    id = models.CharField(max_length=255, primary_key=True)
+    name = models.CharField(max_length=255, blank=True, default="")
+    is_active = models.BooleanField(default=True)
+    config = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Tenant({self.id})"
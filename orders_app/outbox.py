@@ -0,0 +1,92 @@
+# orders_app/outbox.py
+import json
+import sys
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Outbox
+
+DEFAULT_BATCH_SIZE = 100
+
+
+class BasePublisher:
+    """
+    Interface for delivering outbox events to a broker.
+    publish() receives a list of Outbox rows and must raise if any of them
+    could not be delivered; the claimed batch is then rolled back and retried.
+    """
+
+    def publish(self, events):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def _event_dict(event):
+    return {
+        "id": str(event.id),
+        "eventType": event.event_type,
+        "orderId": str(event.order_id),
+        "tenantId": event.tenant_id,
+        "payload": event.payload,
+        "createdAt": event.created_at.isoformat(),
+    }
+
+
+class StreamPublisher(BasePublisher):
+    """
+    Writes one JSON line per event to a text stream (stdout by default).
+    Meant for local development and tests.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def publish(self, events):
+        for event in events:
+            self.stream.write(json.dumps(_event_dict(event)) + "\n")
+        self.stream.flush()
+
+
+class FilePublisher(StreamPublisher):
+    """
+    Appends one JSON line per event to a local file.
+    """
+
+    def __init__(self, path):
+        super().__init__(open(path, "a", encoding="utf-8"))
+
+    def close(self):
+        self.stream.close()
+
+
+def get_publisher(path=None, **kwargs):
+    """
+    Instantiate the publisher class named by `path` or settings.OUTBOX_PUBLISHER.
+    """
+    path = path or getattr(settings, "OUTBOX_PUBLISHER", "orders_app.outbox.StreamPublisher")
+    return import_string(path)(**kwargs)
+
+
+def relay_batch(publisher, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Claim up to `batch_size` unpublished rows, publish them and mark them published.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED, so several relays can drain the
+    table in parallel without delivering the same row twice. The claim, publish and
+    bulk update share one transaction: if publishing fails the rows stay unpublished.
+    Returns the number of rows published.
+    """
+    with transaction.atomic():
+        events = list(
+            Outbox.objects.select_for_update(skip_locked=True)
+            .filter(published_at__isnull=True)
+            .order_by("created_at")[:batch_size]
+        )
+        if not events:
+            return 0
+        publisher.publish(events)
+        Outbox.objects.filter(id__in=[e.id for e in events]).update(published_at=timezone.now())
+    return len(events)
@@ -1,37 +1,132 @@
 
 import base64
 import json
+import uuid
 from rest_framework.pagination import BasePagination
 from rest_framework.response import Response
+from django.conf import settings
 from django.utils.dateparse import parse_datetime
 from django.db import models
+from django.db.models.functions import Coalesce
+from . import archive, ids
+from .models import Order, OrderArchive
+from .lookups import RowLessThan
 
-def _encode_cursor(ts, id_):
+class InvalidCursor(ValueError):
+    """The cursor was issued for a different set of filters."""
+
+
+def _encode_cursor(ts, id_, filter_key=None):
     payload = {"ts": ts, "id": str(id_)}
+    if filter_key:
+        payload["f"] = filter_key
     return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
 
 def _decode_cursor(cursor):
     try:
         raw = base64.urlsafe_b64decode(cursor.encode()).decode()
         payload = json.loads(raw)
-        return payload.get("ts"), payload.get("id")
+        return payload.get("ts"), payload.get("id"), payload.get("f")
+    except Exception:
+        return None, None, None
+
+def _encode_id_cursor(id_, filter_key=None):
+    # 22 url-safe characters for the id, plus ".<filter key>" when filtered
+    token = base64.urlsafe_b64encode(id_.bytes).decode().rstrip("=")
+    return f"{token}.{filter_key}" if filter_key else token
+
+def _decode_id_cursor(cursor):
+    token, _, filter_key = cursor.partition(".")
+    if len(token) != 22:
+        return None, None
+    try:
+        return uuid.UUID(bytes=base64.urlsafe_b64decode(token + "==")), filter_key or None
     except Exception:
         return None, None
 
+def _after_anchor(anchor_id, tenant_id):
+    """
+    Keyset predicate for an id-only cursor: the anchor's created_at is looked up by
+    primary key inside the same query, in the archive too when archival is on. If
+    the anchor row is gone, a v7 id still carries its creation time.
+    """
+    lookups = [
+        models.Subquery(anchor.values("created_at")[:1], output_field=models.DateTimeField())
+        for anchor in _anchor_queries(anchor_id, tenant_id)
+    ]
+    embedded = ids.timestamp(anchor_id)
+    if embedded is not None:
+        lookups.append(models.Value(embedded, output_field=models.DateTimeField()))
+    ts = Coalesce(*lookups) if len(lookups) > 1 else lookups[0]
+    return RowLessThan(("created_at", "id"), (ts, anchor_id))
+
+def _anchor_queries(anchor_id, tenant_id):
+    """The anchor row, in the archive too when archival is on."""
+    queries = []
+    for model in (Order, OrderArchive) if archive.enabled() else (Order,):
+        anchor = model.objects.filter(pk=anchor_id)
+        queries.append(anchor.filter(tenant_id=tenant_id) if tenant_id else anchor)
+    return queries
+
+def _anchor_exists(anchor_id, tenant_id):
+    return any(anchor.exists() for anchor in _anchor_queries(anchor_id, tenant_id))
+
+async def _aanchor_exists(anchor_id, tenant_id):
+    for anchor in _anchor_queries(anchor_id, tenant_id):
+        if await anchor.aexists():
+            return True
+    return False
+
+_MISSING_ANCHOR = "the cursor's order no longer exists; start again from the first page"
+
 class KeysetPagination(BasePagination):
     page_size_query_param = 'limit'
     default_limit = 20
     max_limit = 100
 
-    def paginate_queryset(self, queryset, request, view=None):
-        limit = int(request.query_params.get('limit', self.default_limit))
-        limit = min(limit, self.max_limit)
-        cursor = request.query_params.get('cursor')
+    def get_limit(self, request):
+        """The page size, capped at max_limit; ValueError unless it is a positive integer."""
+        # request.GET works for DRF and plain (async view) requests alike
+        try:
+            limit = int(request.GET.get('limit', self.default_limit))
+        except ValueError:
+            raise ValueError("limit must be an integer") from None
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        return min(limit, self.max_limit)
+
+    def page_queryset(self, queryset, request, filter_key=None):
+        """
+        Apply the cursor's keyset and the page limit; returns (queryset, limit).
+
+        `filter_key` identifies the filters already applied to `queryset`; it is
+        stored in the next cursor and a cursor issued for other filters is rejected
+        with InvalidCursor, so pages cannot silently drift.
+
+        With ORDERS_TIME_ORDERED_IDS the next cursor carries only the last id;
+        cursors in either format are accepted.
+        """
+        limit = self.get_limit(request)
+        cursor = request.GET.get('cursor')
         tenant_id = getattr(request, "tenant_id", None)
+        # an id-only anchor with no creation time of its own (a v4 id): if the row
+        # is gone the keyset matches nothing, which must not read as the last page
+        self.unanchored = None
 
         # enforce tenant scoping at view level; here assume queryset already filtered by tenant
+        anchor_id = None
         if cursor:
-            ts_str, id_str = _decode_cursor(cursor)
+            anchor_id, cursor_filter_key = _decode_id_cursor(cursor)
+            if anchor_id is not None:
+                if cursor_filter_key != filter_key:
+                    raise InvalidCursor("cursor does not match the current filters")
+                queryset = queryset.filter(_after_anchor(anchor_id, tenant_id))
+                if ids.timestamp(anchor_id) is None:
+                    self.unanchored = (anchor_id, tenant_id)
+        if cursor and anchor_id is None:
+            ts_str, id_str, cursor_filter_key = _decode_cursor(cursor)
+            if ts_str and id_str and cursor_filter_key != filter_key:
+                raise InvalidCursor("cursor does not match the current filters")
             if ts_str and id_str:
                 # parse ISO ts
                 try:
@@ -40,19 +135,53 @@ class KeysetPagination(BasePagination):
                     ts = None
                 # apply keyset: since sorting is created_at DESC, id DESC
                 if ts is not None:
-                    queryset = queryset.filter(
-                        # either created_at < ts OR (created_at == ts and id < id_str)
-                        models.Q(created_at__lt=ts) |
-                        (models.Q(created_at=ts) & models.Q(id__lt=id_str))
-                    )
+                    # (created_at, id) < (ts, id_str): one index condition, see RowLessThan
+                    queryset = queryset.filter(RowLessThan(("created_at", "id"), (ts, id_str)))
         # ordering must match keyset definition
-        queryset = queryset.order_by('-created_at', '-id')[:limit + 1]
-        items = list(queryset)
+        return queryset.order_by('-created_at', '-id')[:limit + 1], limit
+
+    def paginate_queryset(self, queryset, request, view=None, filter_key=None, archived=None):
+        """
+        `archived` is the same query against OrderArchive (see archive.archived_orders);
+        it is read only when the page reaches past the hot window.
+        """
+        queryset, limit = self.page_queryset(queryset, request, filter_key)
+        rows = self.with_archive(list(queryset), limit, archived, request, filter_key)
+        # only an empty page costs the extra lookup
+        if not rows and self.unanchored and not _anchor_exists(*self.unanchored):
+            raise InvalidCursor(_MISSING_ANCHOR)
+        return self.page_from_rows(rows, limit, filter_key)
+
+    async def apaginate_queryset(self, queryset, request, filter_key=None, archived=None):
+        queryset, limit = self.page_queryset(queryset, request, filter_key)
+        rows = await self.awith_archive([item async for item in queryset], limit, archived, request, filter_key)
+        if not rows and self.unanchored and not await _aanchor_exists(*self.unanchored):
+            raise InvalidCursor(_MISSING_ANCHOR)
+        return self.page_from_rows(rows, limit, filter_key)
+
+    def with_archive(self, rows, limit, archived, request, filter_key=None):
+        """Hot `rows` (up to limit + 1) merged with the archive's, when the page reaches it."""
+        if archived is None or not archive.reaches_archive(rows, limit):
+            return rows
+        older, _ = self.page_queryset(archived, request, filter_key)
+        return archive.merge(rows, list(older), limit)
+
+    async def awith_archive(self, rows, limit, archived, request, filter_key=None):
+        if archived is None or not archive.reaches_archive(rows, limit):
+            return rows
+        older, _ = self.page_queryset(archived, request, filter_key)
+        return archive.merge(rows, [item async for item in older], limit)
+
+    def page_from_rows(self, items, limit, filter_key=None):
+        """(page, next_cursor) from up to limit + 1 rows already in keyset order."""
         self.has_more = len(items) > limit
         if self.has_more:
             self.items = items[:limit]
             last = self.items[-1]
-            next_cursor = _encode_cursor(last.created_at.isoformat(), last.id)
+            if getattr(settings, "ORDERS_TIME_ORDERED_IDS", False):
+                next_cursor = _encode_id_cursor(last.id, filter_key)
+            else:
+                next_cursor = _encode_cursor(last.created_at.isoformat(), last.id, filter_key)
         else:
             self.items = items
             next_cursor = None
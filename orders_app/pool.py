@@ -0,0 +1,28 @@
+# orders_app/pool.py
+from django.db import connections
+
+
+def pool_stats(alias="default"):
+    """
+    Counters of this process's connection pool, or None when pooling is off.
+    Cumulative values (requests, waits, connects) count since the pool was opened.
+    """
+    pool = connections[alias].pool
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    return {
+        "min": stats.get("pool_min", 0),
+        "max": stats.get("pool_max", 0),
+        "size": stats.get("pool_size", 0),
+        "in_use": stats.get("pool_size", 0) - stats.get("pool_available", 0),
+        "idle": stats.get("pool_available", 0),
+        "waiting": stats.get("requests_waiting", 0),
+        "requests": stats.get("requests_num", 0),
+        "requests_queued": stats.get("requests_queued", 0),
+        "request_errors": stats.get("requests_errors", 0),
+        "acquire_seconds": stats.get("requests_wait_ms", 0) / 1000,
+        "connections_opened": stats.get("connections_num", 0),
+        "connect_seconds": stats.get("connections_ms", 0) / 1000,
+        "connection_errors": stats.get("connections_errors", 0),
+    }
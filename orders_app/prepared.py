@@ -0,0 +1,55 @@
+# orders_app/prepared.py
+import re
+import weakref
+from django.conf import settings
+
+# %(name)s or %s, optionally followed by a cast such as ::uuid[]
+_PARAM_RE = re.compile(r"%(?:\((\w+)\))?s(::\w+(?:\[\])?)?")
+
+# raw DB-API connection -> names already PREPAREd on it
+_prepared = weakref.WeakKeyDictionary()
+
+
+class PreparedStatement:
+    """
+    A fixed hot-path statement run as a server-side prepared statement.
+
+    The SQL keeps the usual %(name)s / %s placeholders. It is PREPAREd once per
+    database connection, just before its first EXECUTE, so later runs on a
+    pooled or persistent connection skip parsing and planning.
+    Placeholder casts are repeated on the EXECUTE arguments so array literals
+    keep their types. Needs client-side parameter binding (Django's default).
+    With ORDERS_PREPARED_STATEMENTS off (e.g. behind a transaction-mode
+    PgBouncer) the plain SQL is executed instead.
+    """
+
+    def __init__(self, name, sql):
+        self.name = name
+        self.sql = sql
+        positions, args = {}, []
+
+        def number(match):
+            key, cast = match.group(1), match.group(2) or ""
+            if key is None:  # positional: every %s is its own parameter
+                args.append(f"%s{cast}")
+                return f"${len(args)}{cast}"
+            if key not in positions:
+                args.append(f"%({key})s{cast}")
+                positions[key] = len(args)
+            return f"${positions[key]}{cast}"
+
+        body = _PARAM_RE.sub(number, sql)
+        self.prepare_sql = f"PREPARE {name} AS {body}"
+        self.execute_sql = f"EXECUTE {name}({', '.join(args)})" if args else f"EXECUTE {name}"
+
+    def execute(self, cursor, params):
+        if not getattr(settings, "ORDERS_PREPARED_STATEMENTS", False):
+            return cursor.execute(self.sql, params)
+        names = _prepared.setdefault(cursor.cursor.connection, set())
+        if self.name not in names:
+            # prepared statements outlive transactions (and rollbacks) on the connection,
+            # so the name is recorded as soon as PREPARE succeeds: an EXECUTE that then
+            # fails (bad parameters) must not leave it prepared but unknown
+            cursor.execute(self.prepare_sql)
+            names.add(self.name)
+        return cursor.execute(self.execute_sql, params)
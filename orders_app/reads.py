@@ -0,0 +1,161 @@
+# orders_app/reads.py
+import hashlib
+import uuid
+from collections import namedtuple
+from django.db import connection
+from django.conf import settings
+from django.core.cache import caches
+from .encoders import ID, ORDER_COLUMNS, VERSION
+from .models import Order, OrderArchive
+from .prepared import PreparedStatement
+from . import archive
+
+OrderRow = namedtuple("OrderRow", ORDER_COLUMNS)
+
+# unfiltered first list page, the most common list request
+_FIRST_PAGE = PreparedStatement("orders_first_page", f"""
+SELECT {", ".join(ORDER_COLUMNS)} FROM {Order._meta.db_table}
+WHERE tenant_id = %s
+ORDER BY created_at DESC, id DESC
+LIMIT %s
+""")
+
+
+def _order_query(tenant_id, id_, model=Order):
+    return model.objects.filter(tenant_id=tenant_id, id=id_).values_list(*ORDER_COLUMNS)
+
+
+def _orders_query(tenant_id, ids, model=Order):
+    # id = ANY(%s::uuid[]): one index probe per id, same statement text for any count
+    return model.objects.filter(tenant_id=tenant_id, id__any=ids).values_list(*ORDER_COLUMNS)
+
+
+def get_order(tenant_id, id_):
+    """ORDER_COLUMNS row of one of the tenant's orders (archived ones included), or None."""
+    row = _order_query(tenant_id, id_).first()
+    if row is None and archive.enabled():
+        row = _order_query(tenant_id, id_, OrderArchive).first()
+    if row is not None:
+        remember_version(tenant_id, row[ID], row[VERSION])
+    return row
+
+
+async def aget_order(tenant_id, id_):
+    row = await _order_query(tenant_id, id_).afirst()
+    if row is None and archive.enabled():
+        row = await _order_query(tenant_id, id_, OrderArchive).afirst()
+    if row is not None:
+        await aremember_version(tenant_id, row[ID], row[VERSION])
+    return row
+
+
+def first_page(tenant_id, count):
+    """The tenant's `count` newest orders as OrderRow tuples (list order)."""
+    with connection.cursor() as cursor:
+        _FIRST_PAGE.execute(cursor, [tenant_id, count])
+        return [OrderRow(*row) for row in cursor.fetchall()]
+
+
+def get_orders(tenant_id, ids):
+    """
+    {id: ORDER_COLUMNS row} for the tenant's orders among `ids` (UUIDs), in one
+    query; ids not found are looked up in the archive with a second one.
+    """
+    rows = {row[ID]: row for row in _orders_query(tenant_id, ids)}
+    missing = [i for i in ids if i not in rows]
+    if missing and archive.enabled():
+        rows.update((row[ID], row) for row in _orders_query(tenant_id, missing, OrderArchive))
+    return rows
+
+
+async def aget_orders(tenant_id, ids):
+    rows = {row[ID]: row async for row in _orders_query(tenant_id, ids)}
+    missing = [i for i in ids if i not in rows]
+    if missing and archive.enabled():
+        rows.update([(row[ID], row) async for row in _orders_query(tenant_id, missing, OrderArchive)])
+    return rows
+
+
+# --- short-lived version cache (answers If-None-Match without a query) ---
+
+def _version_cache():
+    ttl = getattr(settings, "ORDERS_VERSION_CACHE_TTL", 0)
+    if ttl <= 0:
+        return None, 0
+    return caches[getattr(settings, "ORDERS_VERSION_CACHE_ALIAS", "default")], ttl
+
+
+def _version_key(tenant_id, id_):
+    digest = hashlib.sha256(f"{tenant_id}\x00{id_}".encode()).hexdigest()
+    return f"order-version:{digest}"
+
+
+def cached_version(tenant_id, id_):
+    cache, _ = _version_cache()
+    if cache is None:
+        return None
+    return cache.get(_version_key(tenant_id, id_))
+
+
+async def acached_version(tenant_id, id_):
+    cache, _ = _version_cache()
+    if cache is None:
+        return None
+    return await cache.aget(_version_key(tenant_id, id_))
+
+
+def remember_version(tenant_id, id_, version):
+    """
+    Record an order's current version. Writers call this after every committed
+    transition; a concurrent writer elsewhere can make an entry stale for at most
+    ORDERS_VERSION_CACHE_TTL seconds.
+    """
+    cache, ttl = _version_cache()
+    if cache is not None:
+        cache.set(_version_key(tenant_id, id_), version, timeout=ttl)
+
+
+async def aremember_version(tenant_id, id_, version):
+    cache, ttl = _version_cache()
+    if cache is not None:
+        await cache.aset(_version_key(tenant_id, id_), version, timeout=ttl)
+
+
+def etag(version):
+    return f'"{version}"'
+
+
+def if_none_match(header):
+    """Versions listed in an If-None-Match header ("*" for any), or None when absent."""
+    if not header:
+        return None
+    tags = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tags.add(tag.strip('"'))
+    return tags
+
+
+def not_modified(version, tags):
+    return tags is not None and ("*" in tags or str(version) in tags)
+
+
+def parse_ids(raw_values, max_ids):
+    """
+    UUIDs from repeated and/or comma-separated ?ids= values, de-duplicated in
+    request order. Raises ValueError for malformed input.
+    """
+    ids = []
+    for raw in raw_values:
+        for part in raw.split(","):
+            part = part.strip()
+            if part:
+                ids.append(uuid.UUID(part))
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValueError("ids is required")
+    if len(ids) > max_ids:
+        raise ValueError(f"at most {max_ids} ids per request")
+    return ids
@@ -0,0 +1,124 @@
+# orders_app/replay_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class ReplayCache:
+    """
+    Two-tier cache of completed idempotent responses.
+
+    Tier 1 is a bounded in-process LRU, tier 2 an optional Django cache alias
+    shared between workers. Entries expire together with the idempotency key
+    (created_at + IDEMPOTENCY_TTL), so a cached replay is never served for a
+    key the database would already treat as expired.
+    """
+
+    def __init__(self, max_entries=10000, shared_alias=None):
+        self.max_entries = max_entries
+        self.shared = caches[shared_alias] if shared_alias else None
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _shared_key(tenant_id, key):
+        # tenant ids and keys are client supplied; hash them into a safe fixed-size key
+        digest = hashlib.sha256(f"{tenant_id}\x00{key}".encode()).hexdigest()
+        return f"idem-replay:{digest}"
+
+    def get(self, tenant_id, key):
+        """Return (request_hash, response_json) for a completed key, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._local.get((tenant_id, key))
+            if entry is not None:
+                if entry[2] > now:
+                    self._local.move_to_end((tenant_id, key))
+                    self.local_hits += 1
+                    return entry[0], entry[1]
+                del self._local[(tenant_id, key)]
+
+        if self.shared is not None:
+            entry = self.shared.get(self._shared_key(tenant_id, key))
+            if entry is not None and entry[2] > now:
+                self._store_local(tenant_id, key, entry)
+                with self._lock:
+                    self.shared_hits += 1
+                return entry[0], entry[1]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, tenant_id, key, request_hash, response_json, expires_at):
+        """Cache a completed response until `expires_at` (an aware datetime)."""
+        entry = (request_hash, response_json, expires_at.timestamp())
+        remaining = entry[2] - time.time()
+        if remaining <= 0:
+            return
+        self._store_local(tenant_id, key, entry)
+        if self.shared is not None:
+            self.shared.set(self._shared_key(tenant_id, key), entry, timeout=int(remaining) or 1)
+
+    def invalidate(self, tenant_id, key):
+        with self._lock:
+            self._local.pop((tenant_id, key), None)
+        if self.shared is not None:
+            self.shared.delete(self._shared_key(tenant_id, key))
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "local_hits": self.local_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "local_entries": len(self._local),
+            }
+
+    def _store_local(self, tenant_id, key, entry):
+        with self._lock:
+            self._local[(tenant_id, key)] = entry
+            self._local.move_to_end((tenant_id, key))
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_replay_cache():
+    """Process-wide ReplayCache built from settings, or None when disabled."""
+    global _cache
+    conf = getattr(settings, "IDEMPOTENCY_REPLAY_CACHE", {})
+    if not conf.get("ENABLED", False):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ReplayCache(
+                    max_entries=conf.get("LOCAL_MAX_ENTRIES", 10000),
+                    shared_alias=conf.get("SHARED_CACHE") or None,
+                )
+    return _cache
+
+
+@receiver(setting_changed)
+def _reset_replay_cache(setting, **kwargs):
+    global _cache
+    if setting in ("IDEMPOTENCY_REPLAY_CACHE", "CACHES"):
+        _cache = None
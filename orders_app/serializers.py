@@ -1,6 +1,10 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Order
 
+# version and total_cents are Postgres integers; larger values cannot be bound to them
+INT_MAX = 2**31 - 1
+
 class OrderCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
@@ -17,4 +21,48 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ['id', 'tenantId', 'status', 'version', 'totalCents', 'createdAt', 'updatedAt']
 
 class ConfirmSerializer(serializers.Serializer):
-    totalCents = serializers.IntegerField(min_value=0)
+    totalCents = serializers.IntegerField(min_value=0, max_value=INT_MAX)
+
+class BatchCreateSerializer(serializers.Serializer):
+    items = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_items(self, items):
+        max_items = settings.ORDERS_BATCH_MAX_ITEMS
+        if len(items) > max_items:
+            raise serializers.ValidationError(f"at most {max_items} items per batch")
+        for item in items:
+            key = item.get("idempotencyKey")
+            if not isinstance(key, str) or not key or len(key) > 255:
+                raise serializers.ValidationError("every item needs an idempotencyKey string")
+        return items
+
+
+class BatchTransitionItemSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    version = serializers.IntegerField(min_value=-INT_MAX - 1, max_value=INT_MAX)
+    totalCents = serializers.IntegerField(min_value=0, max_value=INT_MAX, required=False)
+
+
+class BatchConfirmItemSerializer(BatchTransitionItemSerializer):
+    totalCents = serializers.IntegerField(min_value=0, max_value=INT_MAX)
+
+
+class BatchTransitionSerializer(serializers.Serializer):
+    item_serializer = BatchTransitionItemSerializer
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields["items"] = serializers.ListField(child=self.item_serializer(), allow_empty=False)
+        return fields
+
+    def validate_items(self, items):
+        max_items = settings.ORDERS_BATCH_MAX_ITEMS
+        if len(items) > max_items:
+            raise serializers.ValidationError(f"at most {max_items} items per batch")
+        if len({item["id"] for item in items}) != len(items):
+            raise serializers.ValidationError("order ids must be unique within a batch")
+        return items
+
+
+class BatchConfirmSerializer(BatchTransitionSerializer):
+    item_serializer = BatchConfirmItemSerializer
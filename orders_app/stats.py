@@ -0,0 +1,109 @@
+# orders_app/stats.py
+from django.db import connection, transaction
+from .models import Order, OrderArchive, TenantOrderStats
+
+STATS_TABLE = TenantOrderStats._meta.db_table
+ORDER_TABLE = Order._meta.db_table
+ARCHIVE_TABLE = OrderArchive._meta.db_table
+
+# every order, hot and archived: archival moves rows without touching the counters
+_ALL_ORDERS = """(
+    SELECT tenant_id, status, total_cents FROM {orders}
+    UNION ALL
+    SELECT tenant_id, status, total_cents FROM {archive}
+) o""".format(orders=ORDER_TABLE, archive=ARCHIVE_TABLE)
+
+# Adds a delta to one (tenant, status) counter row, creating it if needed.
+_ADD_SQL = """
+INSERT INTO {stats} AS s (tenant_id, status, order_count, total_cents)
+VALUES (%s, %s, %s, %s)
+ON CONFLICT (tenant_id, status) DO UPDATE
+    SET order_count = s.order_count + EXCLUDED.order_count,
+        total_cents = s.total_cents + EXCLUDED.total_cents
+""".format(stats=STATS_TABLE)
+
+# Counters recomputed from the base table, for rebuild.
+_ACTUAL_SQL = """
+SELECT tenant_id, status, COUNT(*), COALESCE(SUM(total_cents), 0)
+FROM {orders}
+{{where}}
+GROUP BY tenant_id, status
+""".format(orders=_ALL_ORDERS)
+
+# Stored vs recomputed counters in one statement (one snapshot), mismatches only.
+_VERIFY_SQL = """
+WITH actual AS (
+    SELECT tenant_id, status, COUNT(*) AS order_count, COALESCE(SUM(total_cents), 0) AS total_cents
+    FROM {orders}
+    {{where}}
+    GROUP BY tenant_id, status
+),
+stored AS (
+    SELECT tenant_id, status, order_count, total_cents FROM {stats} {{where}}
+)
+SELECT COALESCE(a.tenant_id, s.tenant_id), COALESCE(a.status, s.status),
+       COALESCE(s.order_count, 0), COALESCE(s.total_cents, 0),
+       COALESCE(a.order_count, 0), COALESCE(a.total_cents, 0)
+FROM actual a
+FULL OUTER JOIN stored s ON s.tenant_id = a.tenant_id AND s.status = a.status
+WHERE (COALESCE(s.order_count, 0), COALESCE(s.total_cents, 0))
+      IS DISTINCT FROM (COALESCE(a.order_count, 0), COALESCE(a.total_cents, 0))
+""".format(orders=_ALL_ORDERS, stats=STATS_TABLE)
+
+
+def _where(tenant_id):
+    return ("WHERE tenant_id = %s", [tenant_id]) if tenant_id else ("", [])
+
+
+def record_created(tenant_id, count=1):
+    """Count `count` new draft orders; call inside the transaction that inserts them."""
+    with connection.cursor() as cursor:
+        cursor.execute(_ADD_SQL, [tenant_id, Order.Status.DRAFT, count, 0])
+
+
+def tenant_stats(tenant_id):
+    """Counters for one tenant: a primary-key lookup of at most one row per status."""
+    by_status = {status: {"count": 0, "totalCents": 0} for status in Order.Status.values}
+    rows = TenantOrderStats.objects.filter(tenant_id=tenant_id).values_list("status", "order_count", "total_cents")
+    for status, count, total_cents in rows:
+        by_status[status] = {"count": count, "totalCents": total_cents}
+    return {
+        "tenantId": tenant_id,
+        "count": sum(s["count"] for s in by_status.values()),
+        "totalCents": sum(s["totalCents"] for s in by_status.values()),
+        "byStatus": by_status,
+    }
+
+
+def verify(tenant_id=None):
+    """
+    Compare stored counters with the order tables (hot and archived).
+    Returns {(tenant_id, status): ((count, cents) stored, (count, cents) actual)} for every mismatch.
+    """
+    where, params = _where(tenant_id)
+    with connection.cursor() as cursor:
+        cursor.execute(_VERIFY_SQL.format(where=where), params * 2)
+        rows = cursor.fetchall()
+    return {(t, s): ((sc, st), (ac, at)) for t, s, sc, st, ac, at in rows}
+
+
+def rebuild(tenant_id=None):
+    """
+    Recompute counters from the order tables. Order writes are blocked (SHARE lock)
+    while the aggregate runs so no transition is lost in between.
+    Returns the number of counter rows written.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {ORDER_TABLE}, {ARCHIVE_TABLE} IN SHARE MODE")
+        where, params = _where(tenant_id)
+        cursor.execute(_ACTUAL_SQL.format(where=where), params)
+        actual = {(t, s): (count, cents) for t, s, count, cents in cursor.fetchall()}
+        stale = TenantOrderStats.objects.all()
+        if tenant_id:
+            stale = stale.filter(tenant_id=tenant_id)
+        stale.delete()
+        TenantOrderStats.objects.bulk_create([
+            TenantOrderStats(tenant_id=t, status=s, order_count=count, total_cents=cents)
+            for (t, s), (count, cents) in actual.items()
+        ])
+    return len(actual)
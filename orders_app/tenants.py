@@ -0,0 +1,82 @@
+# orders_app/tenants.py
+import threading
+import time
+from collections import namedtuple
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Tenant
+
+TenantInfo = namedtuple("TenantInfo", ["id", "name", "config"])
+
+
+class TenantRegistry:
+    """
+    In-memory snapshot of the active tenants, reloaded with one query at most
+    every `ttl` seconds, so resolving X-Tenant-Id costs a dict lookup. A tenant
+    added or deactivated is picked up within `ttl` seconds.
+    """
+
+    def __init__(self, ttl=30.0):
+        self.ttl = ttl
+        self._tenants = {}
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        rows = Tenant.objects.filter(is_active=True).values_list("id", "name", "config")
+        return {row[0]: TenantInfo(*row) for row in rows}
+
+    def _stale(self):
+        return time.monotonic() >= self._expires
+
+    def refresh(self):
+        with self._lock:
+            if self._stale():
+                self._tenants = self._load()
+                self._expires = time.monotonic() + self.ttl
+
+    def get(self, tenant_id):
+        """TenantInfo for an active tenant, or None."""
+        if self._stale():
+            self.refresh()
+        return self._tenants.get(tenant_id)
+
+    async def aget(self, tenant_id):
+        if self._stale():
+            await sync_to_async(self.refresh)()
+        return self._tenants.get(tenant_id)
+
+    def invalidate(self):
+        self._expires = 0.0
+
+
+_registry = None
+
+
+def get_tenant_registry():
+    """Process-wide registry, or None when tenants are not validated."""
+    global _registry
+    options = getattr(settings, "ORDERS_TENANT_REGISTRY", {})
+    if not options.get("VALIDATE", False):
+        return None
+    if _registry is None:
+        _registry = TenantRegistry(ttl=options.get("TTL_SECONDS", 30.0))
+    return _registry
+
+
+@receiver(setting_changed)
+def _reset_registry(setting, **kwargs):
+    global _registry
+    if setting == "ORDERS_TENANT_REGISTRY":
+        _registry = None
+
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def _tenant_changed(**kwargs):
+    # other processes pick the change up when their snapshot expires
+    if _registry is not None:
+        _registry.invalidate()
@@ -0,0 +1,131 @@
+# orders_app/tests/test_archive.py
+import json
+from datetime import timedelta
+from io import StringIO
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, Client, AsyncRequestFactory, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from orders_app import stats
+from orders_app.async_views import AsyncOrderExportView, AsyncOrderListView
+from orders_app.models import Order, OrderArchive
+
+ARCHIVE_AFTER_90_DAYS = {"AFTER_DAYS": 90}
+
+
+@override_settings(ORDERS_ARCHIVE=ARCHIVE_AFTER_90_DAYS)
+class ArchiveOrdersTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+        cache.clear()
+        now = timezone.now()
+        # newest first once listed: recent orders of every status, then old ones where
+        # closed orders (archived) and an old draft and confirmed order (kept) interleave
+        specs = [(Order.Status.DRAFT, 1), (Order.Status.CLOSED, 2), (Order.Status.CONFIRMED, 3)]
+        specs += [(Order.Status.CLOSED if i % 3 else Order.Status.DRAFT, 100 + i) for i in range(10)]
+        specs += [(Order.Status.CONFIRMED, 120), (Order.Status.CLOSED, 121)]
+        self.orders = Order.objects.bulk_create(
+            Order(tenant_id="shop-1", status=status, version={"draft": 1, "confirmed": 2, "closed": 3}[status],
+                  total_cents=None if status == "draft" else 100, created_at=now - timedelta(days=days))
+            for status, days in specs
+        )
+        Order.objects.create(tenant_id="shop-2", status=Order.Status.CLOSED, version=3, total_cents=5,
+                             created_at=now - timedelta(days=200))
+        stats.rebuild()
+        self.archived = {o.id for o in self.orders if o.status == "closed" and o.created_at < now - timedelta(days=90)}
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command("archive_orders", *args, stdout=out)
+        return out.getvalue()
+
+    def walk(self, query="", limit=4):
+        ids, cursor = [], None
+        while True:
+            url = reverse("order-list") + f"?limit={limit}{query}" + (f"&cursor={cursor}" if cursor else "")
+            body = self.client.get(url, **self.headers).json()
+            ids += [item["id"] for item in body["items"]]
+            cursor = body["nextCursor"]
+            if cursor is None:
+                return ids
+
+    def test_moves_closed_orders_past_the_window_in_batches(self):
+        output = self.archive("--batch-size", "3")
+        self.assertIn("moved 8 order(s)", output)
+        self.assertIn("rows/sec", output)
+        self.assertIn("live rows after archival", output)
+        self.assertEqual(set(OrderArchive.objects.filter(tenant_id="shop-1").values_list("id", flat=True)),
+                         self.archived)
+        self.assertFalse(Order.objects.filter(id__in=self.archived).exists())
+        self.assertEqual(Order.objects.filter(tenant_id="shop-1").count(), 8)
+        # counters already include archived orders, and still match after the move
+        self.assertEqual(stats.verify(), {})
+        self.assertIn("moved 0 order(s)", self.archive())
+
+    def test_refuses_when_archival_is_off(self):
+        with override_settings(ORDERS_ARCHIVE={"AFTER_DAYS": 0}):
+            with self.assertRaisesMessage(CommandError, "archival is off"):
+                self.archive()
+
+    def test_list_pages_continue_into_the_archive(self):
+        expected = self.walk()
+        self.archive("--tenant", "shop-1")
+        self.assertEqual(self.walk(), expected)
+        self.assertEqual(self.walk(limit=50), expected)
+        with override_settings(ORDERS_TIME_ORDERED_IDS=True):  # id-only cursors
+            self.assertEqual(self.walk(), expected)
+        closed = [str(o.id) for o in sorted(self.orders, key=lambda o: o.created_at, reverse=True)
+                  if o.status == "closed"]
+        self.assertEqual(self.walk("&status=closed", limit=2), closed)
+
+    def test_pages_inside_the_window_do_not_read_the_archive(self):
+        self.archive()
+        with self.assertNumQueries(1):
+            body = self.client.get(reverse("order-list") + "?limit=1", **self.headers).json()
+        with self.assertNumQueries(1):
+            self.client.get(reverse("order-list") + f"?limit=1&cursor={body['nextCursor']}", **self.headers)
+        with self.assertNumQueries(1):  # no draft is ever archived
+            self.client.get(reverse("order-list") + "?status=draft&limit=50", **self.headers)
+
+    def test_async_list_matches(self):
+        self.archive()
+        path = reverse("order-list") + "?limit=50"
+        request = AsyncRequestFactory().get(path)
+        request.tenant_id = "shop-1"
+        response = async_to_sync(AsyncOrderListView.as_view())(request)
+        self.assertEqual(json.loads(response.content), self.client.get(path, **self.headers).json())
+
+        request = AsyncRequestFactory().get(reverse("order-export"))
+        request.tenant_id = "shop-1"
+        response = async_to_sync(AsyncOrderExportView.as_view())(request)
+
+        async def consume():
+            return b"".join([chunk async for chunk in response])
+
+        exported = self.client.get(reverse("order-export"), **self.headers).streaming_content
+        self.assertEqual(async_to_sync(consume)(), b"".join(exported))
+
+    def test_single_reads_and_export_include_archived_orders(self):
+        self.archive()
+        archived = sorted(self.archived)
+        response = self.client.get(reverse("order-detail", args=[archived[0]]), **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "closed")
+
+        ids = ",".join(str(i) for i in [self.orders[0].id, *archived])
+        body = self.client.get(reverse("order-multi-get") + f"?ids={ids}", **self.headers).json()
+        self.assertEqual(len(body["items"]), 1 + len(archived))
+        self.assertEqual(body["missing"], [])
+
+        response = self.client.get(reverse("order-export"), **self.headers)
+        exported = [json.loads(line)["id"] for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(exported, self.walk())
+        self.assertEqual(len(exported), len(self.orders))
+
+        with override_settings(ORDERS_ARCHIVE={"AFTER_DAYS": 0}):
+            self.assertEqual(self.client.get(reverse("order-detail", args=[archived[0]]), **self.headers).status_code,
+                             404)
@@ -0,0 +1,110 @@
+# orders_app/tests/test_async_views.py
+import json
+import warnings
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import TestCase, Client, AsyncRequestFactory, RequestFactory, override_settings
+from django.urls import reverse
+from orders_app.async_views import (
+    AsyncOrderListView, AsyncOrderDetailView, AsyncOrderMultiGetView, AsyncOrderChangesView,
+    AsyncOrderExportView,
+)
+from orders_app.middleware import TenantMiddleware
+from orders_app.models import Order
+
+
+@override_settings(ORDERS_CHANGES={"LAG_SECONDS": 0, "MAX_WAIT_SECONDS": 1, "POLL_INTERVAL_SECONDS": 0.01})
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.factory = AsyncRequestFactory()
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+        cache.clear()
+        self.orders = [Order.objects.create(tenant_id="shop-1") for _ in range(3)]
+
+    async def call(self, view, path, **kwargs):
+        request = self.factory.get(path)
+        request.tenant_id = "shop-1"
+        return await view.as_view()(request, **kwargs)
+
+    def sync_json(self, path):
+        return self.client.get(path, **self.headers).json()
+
+    async def test_responses_match_sync_views(self):
+        ids = ",".join(str(o.id) for o in self.orders)
+        cases = [
+            (AsyncOrderListView, reverse("order-list") + "?limit=2", {}),
+            (AsyncOrderDetailView, reverse("order-detail", args=[self.orders[0].id]), {"id": self.orders[0].id}),
+            (AsyncOrderMultiGetView, reverse("order-multi-get") + f"?ids={ids}", {}),
+            (AsyncOrderChangesView, reverse("order-changes") + "?limit=2", {}),
+        ]
+        for view, path, kwargs in cases:
+            response = await self.call(view, path, **kwargs)
+            self.assertEqual(response.status_code, 200)
+            expected = await sync_to_async(self.sync_json)(path)
+            self.assertEqual(json.loads(response.content), expected, view.__name__)
+
+    async def test_list_pages_and_errors(self):
+        first = json.loads((await self.call(AsyncOrderListView, reverse("order-list") + "?limit=2")).content)
+        rest = json.loads((await self.call(
+            AsyncOrderListView, reverse("order-list") + f"?limit=2&cursor={first['nextCursor']}"
+        )).content)
+        self.assertEqual(len(first["items"]) + len(rest["items"]), 3)
+        self.assertIsNone(rest["nextCursor"])
+
+        bad = await self.call(AsyncOrderListView, reverse("order-list") + "?status=bogus")
+        self.assertEqual((bad.status_code, json.loads(bad.content)["code"]), (400, "invalid_filter"))
+        for limit in ("abc", "0", "-5"):
+            bad = await self.call(AsyncOrderListView, reverse("order-list") + f"?limit={limit}")
+            self.assertEqual((bad.status_code, json.loads(bad.content)["code"]), (400, "invalid_param"))
+
+    async def test_detail_conditional_get(self):
+        order = self.orders[0]
+        path = reverse("order-detail", args=[order.id])
+        response = await self.call(AsyncOrderDetailView, path, id=order.id)
+        self.assertEqual(response["ETag"], '"1"')
+
+        request = self.factory.get(path, headers={"If-None-Match": '"1"'})
+        request.tenant_id = "shop-1"
+        self.assertEqual((await AsyncOrderDetailView.as_view()(request, id=order.id)).status_code, 304)
+
+    async def test_changes_long_poll_times_out(self):
+        first = json.loads((await self.call(AsyncOrderChangesView, reverse("order-changes"))).content)
+        idle = await self.call(AsyncOrderChangesView, reverse("order-changes") + f"?since={first['nextCursor']}&wait=0.05")
+        self.assertEqual(json.loads(idle.content)["items"], [])
+
+
+    async def test_export_streams_without_buffering(self):
+        for query in ("", "?output=csv"):
+            response = await self.call(AsyncOrderExportView, reverse("order-export") + query)
+            self.assertTrue(response.is_async)
+            with warnings.catch_warnings():
+                # "StreamingHttpResponse must consume synchronous iterators ..." under ASGI
+                warnings.simplefilter("error")
+                body = b"".join([chunk async for chunk in response])
+            expected = await sync_to_async(self.sync_export)(reverse("order-export") + query)
+            self.assertEqual(body, expected, query)
+
+    def sync_export(self, path):
+        return b"".join(self.client.get(path, **self.headers).streaming_content)
+
+
+class TenantMiddlewareTests(TestCase):
+    async def test_async_mode_stays_async(self):
+        async def get_response(request):
+            return HttpResponse(request.tenant_id)
+
+        middleware = TenantMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        factory = AsyncRequestFactory()
+        response = await middleware(factory.get("/api/orders/list", headers={"X-Tenant-Id": "shop-9"}))
+        self.assertEqual(response.content, b"shop-9")
+        missing = await middleware(factory.get("/api/orders/list"))
+        self.assertEqual(missing.status_code, 400)
+
+    def test_sync_mode(self):
+        middleware = TenantMiddleware(lambda request: HttpResponse(request.tenant_id))
+        self.assertFalse(iscoroutinefunction(middleware))
+        response = middleware(RequestFactory().get("/api/orders/list", HTTP_X_TENANT_ID="shop-3"))
+        self.assertEqual(response.content, b"shop-3")
@@ -0,0 +1,133 @@
+# orders_app/tests/test_batch_api.py
+import json
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from orders_app.models import Order, Outbox
+from orders_app.replay_cache import get_replay_cache
+
+
+class BatchCreateTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+        get_replay_cache().clear()
+
+    def post_batch(self, items):
+        return self.client.post(
+            reverse("order-batch-create"),
+            data=json.dumps({"items": items}),
+            content_type="application/json",
+            **self.headers,
+        )
+
+    def test_batch_create_reports_per_item_results_in_order(self):
+        single = self.client.post(
+            reverse("order-create"), data="{}", content_type="application/json",
+            **{"HTTP_IDEMPOTENCY_KEY": "k-0", **self.headers},
+        ).json()
+
+        response = self.post_batch([
+            {"idempotencyKey": "k-1"},
+            {"idempotencyKey": "k-0"},              # already used by POST /orders
+            {"idempotencyKey": "k-1"},              # duplicate within the batch
+            {"idempotencyKey": "k-1", "note": "x"},  # duplicate with a different body
+            {"idempotencyKey": "k-2"},
+        ])
+        self.assertEqual(response.status_code, 200)
+        items = response.json()["items"]
+        self.assertEqual([i["status"] for i in items], ["created", "replayed", "replayed", "conflict", "created"])
+        self.assertEqual(items[1]["order"]["id"], single["id"])
+        self.assertEqual(items[2]["order"]["id"], items[0]["order"]["id"])
+        self.assertEqual(Order.objects.count(), 3)
+
+        # the whole batch replays on retry, now served from the database
+        get_replay_cache().clear()
+        retry = self.post_batch([{"idempotencyKey": "k-1"}, {"idempotencyKey": "k-2"}]).json()["items"]
+        self.assertEqual([i["status"] for i in retry], ["replayed", "replayed"])
+        self.assertEqual(retry[1]["order"]["id"], items[4]["order"]["id"])
+
+    def test_key_order_does_not_change_the_request_hash(self):
+        single = self.client.post(
+            reverse("order-create"), data='{"note": "x", "meta": {"b": 1, "a": 2}}',
+            content_type="application/json", **{"HTTP_IDEMPOTENCY_KEY": "k-3", **self.headers},
+        ).json()
+        get_replay_cache().clear()  # compare against the stored hash, not the cached body
+        items = self.post_batch([
+            {"meta": {"a": 2, "b": 1}, "idempotencyKey": "k-3", "note": "x"},
+            {"idempotencyKey": "k-4", "note": "y", "meta": {"a": 1}},
+            {"meta": {"a": 1}, "note": "y", "idempotencyKey": "k-4"},
+        ]).json()["items"]
+        self.assertEqual([i["status"] for i in items], ["replayed", "created", "replayed"])
+        self.assertEqual(items[0]["order"]["id"], single["id"])
+
+    def test_batch_create_query_count_does_not_grow_with_batch_size(self):
+        with CaptureQueriesContext(connection) as small:
+            self.post_batch([{"idempotencyKey": f"s-{i}"} for i in range(2)])
+        with CaptureQueriesContext(connection) as large:
+            self.post_batch([{"idempotencyKey": f"l-{i}"} for i in range(200)])
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(Order.objects.count(), 202)
+
+    def test_batch_create_validation(self):
+        self.assertEqual(self.post_batch([]).status_code, 400)
+        self.assertEqual(self.post_batch([{"note": "no key"}]).status_code, 400)
+        with self.settings(ORDERS_BATCH_MAX_ITEMS=2):
+            self.assertEqual(self.post_batch([{"idempotencyKey": str(i)} for i in range(3)]).status_code, 400)
+
+
+class BatchTransitionTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+        self.drafts = [Order.objects.create(tenant_id="shop-1") for _ in range(3)]
+        self.other_tenant = Order.objects.create(tenant_id="shop-2")
+
+    def send(self, name, items, method="post"):
+        return getattr(self.client, method)(
+            reverse(name), data=json.dumps({"items": items}), content_type="application/json", **self.headers
+        )
+
+    def test_batch_confirm_and_close(self):
+        a, b, c = self.drafts
+        response = self.send("order-batch-confirm", [
+            {"id": str(a.id), "version": 1, "totalCents": 100},
+            {"id": str(b.id), "version": 7, "totalCents": 200},              # stale
+            {"id": str(self.other_tenant.id), "version": 1, "totalCents": 1},  # other tenant
+            {"id": str(c.id), "version": 1, "totalCents": 300},
+        ], method="patch")
+        self.assertEqual(response.status_code, 200)
+        items = response.json()["items"]
+        self.assertEqual([i["ok"] for i in items], [True, False, False, True])
+        self.assertEqual(items[0]["order"]["version"], 2)
+        self.assertEqual([items[1]["code"], items[2]["code"]], ["stale", "not_found"])
+
+        response = self.send("order-batch-close", [
+            {"id": str(c.id), "version": 2},
+            {"id": str(b.id), "version": 1},   # still a draft
+            {"id": str(a.id), "version": 2},
+        ])
+        items = response.json()["items"]
+        self.assertEqual([i["ok"] for i in items], [True, False, True])
+        self.assertEqual(items[1]["code"], "invalid_transition")
+        self.assertEqual(Order.objects.filter(status="closed").count(), 2)
+        self.assertEqual(
+            sorted(Outbox.objects.values_list("payload__totalCents", flat=True)), [100, 300]
+        )
+
+    def test_batch_transition_rejects_duplicate_ids(self):
+        a = self.drafts[0]
+        item = {"id": str(a.id), "version": 1, "totalCents": 1}
+        response = self.send("order-batch-confirm", [item, item], method="patch")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.send("order-batch-confirm", [{"id": str(a.id), "version": 1}], method="patch").status_code, 400)
+
+    def test_batch_transition_rejects_out_of_range_integers(self):
+        a = self.drafts[0]
+        for item in ({"id": str(a.id), "version": 2**31, "totalCents": 1},
+                     {"id": str(a.id), "version": 1, "totalCents": 2**31}):
+            self.assertEqual(self.send("order-batch-confirm", [item], method="patch").status_code, 400)
+        self.assertEqual(self.send("order-batch-close", [{"id": str(a.id), "version": -2**31 - 1}]).status_code, 400)
+        a.refresh_from_db()
+        self.assertEqual(a.version, 1)
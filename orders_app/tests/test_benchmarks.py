@@ -0,0 +1,52 @@
+# orders_app/tests/test_benchmarks.py
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from orders_app import stats
+from orders_app.benchmarks import compare
+from orders_app.benchmarks.seed import bench_tenants, seed
+from orders_app.models import Order
+
+
+class SeedTests(TestCase):
+    def test_seed_is_skewed_and_counters_match(self):
+        seed(tenants=5, orders=500, days=10, seed=7)
+        tenants = bench_tenants()
+        self.assertEqual(len(tenants), 5)
+        counts = [Order.objects.filter(tenant_id=t).count() for t in tenants]
+        self.assertEqual(sum(counts), 500)
+        self.assertGreater(counts[0], counts[-1])
+        self.assertEqual(stats.verify(), {})
+
+        seed(tenants=2, orders=10, seed=7)  # replaces the previous data
+        self.assertEqual(Order.objects.filter(tenant_id__startswith="bench-").count(), 10)
+
+
+class BaselineTests(TestCase):
+    def test_compare_knows_which_direction_is_worse(self):
+        rows = {key: regressed for key, _, _, _, regressed in compare(
+            {"list_p99_ms": 12.0, "list_per_sec": 50.0, "list_requests": 10, "benchmark": "load"},
+            {"list_p99_ms": 10.0, "list_per_sec": 100.0, "list_requests": 20, "benchmark": "load"},
+        )}
+        self.assertEqual(rows, {"list_p99_ms": 20.0, "list_per_sec": 50.0, "list_requests": None})
+
+    def test_output_and_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "encoder.json")
+            args = ["orders_bench", "encoder", "--rows", "50", "--repeat", "1"]
+            call_command(*args, "--output", path, stdout=StringIO())
+            with open(path) as f:
+                self.assertEqual(json.load(f)["rows"], 50)
+
+            out = StringIO()
+            call_command(*args, "--baseline", path, stdout=out)
+            self.assertIn("encoder_rows_per_sec", out.getvalue())
+
+            with open(path, "w") as f:
+                json.dump({"benchmark": "encoder", "encoder_rows_per_sec": 10 ** 12}, f)
+            with self.assertRaises(CommandError):
+                call_command(*args, "--baseline", path, "--max-regression", "50", stdout=StringIO())
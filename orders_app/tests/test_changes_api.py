@@ -0,0 +1,95 @@
+# orders_app/tests/test_changes_api.py
+import json
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from orders_app import changes
+from orders_app.models import Order
+
+NO_LAG = {"LAG_SECONDS": 0, "MAX_WAIT_SECONDS": 5, "POLL_INTERVAL_SECONDS": 0.01}
+
+
+@override_settings(ORDERS_CHANGES=NO_LAG)
+class ChangesFeedTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+
+    def changes(self, query=""):
+        response = self.client.get(reverse("order-changes") + query, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def make_orders(self, count):
+        orders = [Order.objects.create(tenant_id="shop-1") for _ in range(count)]
+        Order.objects.create(tenant_id="shop-2")
+        return orders
+
+    def test_feed_is_resumable_and_picks_up_transitions(self):
+        orders = self.make_orders(3)
+        first = self.changes("?limit=2")
+        self.assertEqual([i["id"] for i in first["items"]], [str(o.id) for o in orders[:2]])
+        self.assertTrue(first["hasMore"])
+
+        rest = self.changes(f"?since={first['nextCursor']}")
+        self.assertEqual([i["id"] for i in rest["items"]], [str(orders[2].id)])
+        self.assertFalse(rest["hasMore"])
+
+        # nothing new: the cursor is handed back unchanged
+        idle = self.changes(f"?since={rest['nextCursor']}")
+        self.assertEqual((idle["items"], idle["nextCursor"]), ([], rest["nextCursor"]))
+
+        self.client.patch(
+            reverse("order-confirm", args=[orders[0].id]), data=json.dumps({"totalCents": 5}),
+            content_type="application/json", HTTP_IF_MATCH='"1"', **self.headers,
+        )
+        changed = self.changes(f"?since={rest['nextCursor']}")
+        self.assertEqual([(i["id"], i["status"]) for i in changed["items"]], [(str(orders[0].id), "confirmed")])
+
+    def test_recent_changes_are_held_back_by_the_lag(self):
+        Order.objects.create(tenant_id="shop-1", updated_at=timezone.now())
+        with self.settings(ORDERS_CHANGES={**NO_LAG, "LAG_SECONDS": 60}):
+            self.assertEqual(self.changes()["items"], [])
+        self.assertEqual(len(self.changes()["items"]), 1)
+
+    def test_long_poll_returns_once_a_change_arrives(self):
+        self.assertEqual(self.changes()["items"], [])
+        with mock.patch("orders_app.changes.time.sleep", side_effect=lambda _: self.make_orders(1)) as sleep:
+            body = self.changes("?wait=5")
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(len(body["items"]), 1)
+
+    def test_long_poll_times_out_empty(self):
+        body = self.changes("?wait=0.05")
+        self.assertEqual((body["items"], body["hasMore"]), ([], False))
+
+    def test_invalid_parameters(self):
+        url = reverse("order-changes")
+        self.assertEqual(self.client.get(url + "?since=garbage", **self.headers).json()["code"], "invalid_cursor")
+        self.assertEqual(self.client.get(url + "?wait=soon", **self.headers).status_code, 400)
+        self.assertEqual(self.client.get(url + "?limit=0", **self.headers).status_code, 400)
+
+
+@override_settings(ORDERS_CHANGES=NO_LAG)
+class LongPollConnectionTests(TransactionTestCase):
+    def test_long_poll_does_not_hold_a_connection_while_sleeping(self):
+        if "pool" not in connection.settings_dict["OPTIONS"]:
+            self.skipTest("connection pooling is off")
+        held = []
+        with mock.patch("orders_app.changes.time.sleep", side_effect=lambda _: held.append(connection.connection)):
+            body = Client().get(reverse("order-changes") + "?wait=0.05", HTTP_X_TENANT_ID="shop-1").json()
+        self.assertEqual(body["items"], [])
+        self.assertTrue(held)
+        self.assertEqual(set(held), {None})
+
+    def test_without_a_pool_the_connection_is_kept(self):
+        Order.objects.exists()  # connected before the pool setting is hidden
+        options = {k: v for k, v in connection.settings_dict["OPTIONS"].items() if k != "pool"}
+        with mock.patch.dict(connection.settings_dict, {"OPTIONS": options}), \
+                mock.patch.object(connection, "close") as close, \
+                mock.patch("orders_app.changes.time.sleep") as sleep:
+            changes.wait_for_changes("shop-1", (None, None), 10, 0.05)
+        self.assertTrue(sleep.called)
+        close.assert_not_called()  # no reconnect to Postgres every poll
@@ -0,0 +1,117 @@
+# orders_app/tests/test_create_batching.py
+import threading
+import time
+from django.test import SimpleTestCase, TestCase, Client, override_settings
+from django.urls import reverse
+from orders_app import metrics, stats
+from orders_app.batching import GroupCommitter
+from orders_app.models import Order
+from orders_app.replay_cache import get_replay_cache
+
+
+class GroupCommitterTests(SimpleTestCase):
+    def submit_concurrently(self, committer, entries):
+        results, errors = {}, {}
+        barrier = threading.Barrier(len(entries))
+
+        def call(entry):
+            barrier.wait()
+            try:
+                results[entry] = committer.submit(entry)
+            except Exception as exc:
+                errors[entry] = exc
+
+        threads = [threading.Thread(target=call, args=(entry,)) for entry in entries]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        self.assertFalse(any(thread.is_alive() for thread in threads), "a caller never returned")
+        return results, errors
+
+    def test_concurrent_calls_share_one_batch(self):
+        batches = []
+
+        def execute(entries):
+            batches.append(list(entries))
+            return [entry * 10 for entry in entries]
+
+        results, _ = self.submit_concurrently(GroupCommitter(execute, max_delay=0.2, max_size=8), list(range(8)))
+        self.assertEqual(results, {i: i * 10 for i in range(8)})
+        self.assertEqual(len(batches), 1)
+
+    def test_batches_are_capped(self):
+        batches = []
+
+        def execute(entries):
+            batches.append(len(entries))
+            return list(entries)
+
+        results, _ = self.submit_concurrently(GroupCommitter(execute, max_delay=0.05, max_size=3), list(range(7)))
+        self.assertEqual(sorted(results), list(range(7)))
+        self.assertEqual(sum(batches), 7)
+        self.assertLessEqual(max(batches), 3)
+
+    def test_a_failing_entry_only_fails_its_caller(self):
+        def execute(entries):
+            if "bad" in entries:
+                raise ValueError("bad entry")
+            return [entry.upper() for entry in entries]
+
+        results, errors = self.submit_concurrently(
+            GroupCommitter(execute, max_delay=0.2, max_size=3), ["a", "bad", "c"],
+        )
+        self.assertEqual(results, {"a": "A", "c": "C"})
+        self.assertIsInstance(errors["bad"], ValueError)
+
+    def test_stress_more_threads_than_max_size(self):
+        def execute(entries):
+            time.sleep(0.001)
+            return [entry * 2 for entry in entries]
+
+        committer = GroupCommitter(execute, max_delay=0, max_size=4, max_wait=10)
+        for round_ in range(5):
+            entries = list(range(round_ * 100, round_ * 100 + 48))
+            results, errors = self.submit_concurrently(committer, entries)
+            self.assertEqual(errors, {})
+            self.assertEqual(results, {entry: entry * 2 for entry in entries})
+        self.assertFalse(committer._leading)
+        self.assertEqual(committer._pending, [])
+
+    def test_a_stranded_follower_leads_itself(self):
+        committer = GroupCommitter(lambda entries: list(entries), max_delay=0, max_wait=0.05)
+        committer._leading = True  # as if a leader never picked the queue up
+        self.assertEqual(committer.submit("x"), "x")
+        self.assertEqual(committer.submit("y"), "y")
+
+
+@override_settings(ORDERS_CREATE_BATCHING={"ENABLED": True, "MAX_DELAY_MS": 0, "MAX_SIZE": 16})
+class BatchedCreateViewTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        get_replay_cache().clear()
+        metrics.reset()
+
+    def create(self, key, body="{}"):
+        return self.client.post(
+            reverse("order-create"), data=body, content_type="application/json",
+            HTTP_X_TENANT_ID="shop-1", HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_responses_match_the_unbatched_path(self):
+        first = self.create("b-1")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()["status"], "draft")
+        self.assertEqual(self.create("b-1").json(), first.json())
+        get_replay_cache().clear()
+        self.assertEqual(self.create("b-1").json(), first.json())  # replayed from the database
+        self.assertEqual(self.create("b-1", '{"x": 1}').json()["code"], "conflict")
+
+        self.assertEqual(Order.objects.filter(tenant_id="shop-1").count(), 1)
+        self.assertEqual(stats.tenant_stats("shop-1")["count"], 1)
+        self.assertEqual(metrics.CREATE_BATCH_SIZE.count(), 4)
+
+    def test_missing_key(self):
+        response = self.client.post(reverse("order-create"), data="{}", content_type="application/json",
+                                    HTTP_X_TENANT_ID="shop-1")
+        self.assertEqual(response.json()["code"], "missing_idempotency_key")
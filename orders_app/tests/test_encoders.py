@@ -0,0 +1,34 @@
+# orders_app/tests/test_encoders.py
+from datetime import datetime, timezone as dt_timezone
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from orders_app.encoders import ORDER_COLUMNS, encode_order, encode_rows
+from orders_app.models import Order
+from orders_app.serializers import OrderSerializer
+
+
+class OrderEncoderTests(TestCase):
+    def setUp(self):
+        Order.objects.create(tenant_id="shop-1")
+        Order.objects.create(tenant_id="shop-1", status="confirmed", version=2, total_cents=0)
+        # whole-second timestamp: isoformat() drops the microseconds
+        Order.objects.create(
+            tenant_id="shop-1", status="closed", version=3, total_cents=123456,
+            created_at=datetime(2025, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc),
+        )
+
+    def assertSameBytes(self):
+        orders = Order.objects.order_by("-created_at", "-id")
+        rows = orders.values_list(*ORDER_COLUMNS, named=True)
+        render = JSONRenderer().render
+        self.assertEqual(render(encode_rows(rows)), render(OrderSerializer(orders, many=True).data))
+        for order in orders:
+            self.assertEqual(render(encode_order(order)), render(OrderSerializer(order).data))
+
+    def test_encoder_output_is_byte_identical_to_serializer(self):
+        self.assertSameBytes()
+
+    def test_encoder_follows_active_timezone(self):
+        with timezone.override("Asia/Kolkata"):
+            self.assertSameBytes()
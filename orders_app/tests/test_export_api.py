@@ -0,0 +1,47 @@
+# orders_app/tests/test_export_api.py
+import csv
+import io
+import json
+from datetime import timedelta
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from orders_app.models import Order
+from orders_app.serializers import OrderSerializer
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+        base = timezone.now() - timedelta(days=10)
+        self.orders = [
+            Order.objects.create(tenant_id="shop-1", created_at=base + timedelta(days=i), total_cents=i or None)
+            for i in range(5)
+        ]
+        Order.objects.create(tenant_id="shop-2")
+
+    def get(self, query):
+        response = self.client.get(reverse("order-export") + query, **self.headers)
+        body = b"".join(response.streaming_content).decode() if response.streaming else response.content
+        return response, body
+
+    def test_ndjson_export_matches_api_representation(self):
+        response, body = self.get("")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in body.splitlines()]
+        expected = OrderSerializer(reversed(self.orders), many=True).data
+        self.assertEqual(rows, [dict(item) for item in expected])
+
+    def test_csv_export_with_created_range(self):
+        created_from = self.orders[1].created_at.isoformat().replace("+00:00", "Z")
+        created_to = self.orders[3].created_at.isoformat().replace("+00:00", "Z")
+        response, body = self.get(f"?output=csv&created_from={created_from}&created_to={created_to}")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], ["id", "tenantId", "status", "version", "totalCents", "createdAt", "updatedAt"])
+        self.assertEqual([r[0] for r in rows[1:]], [str(self.orders[2].id), str(self.orders[1].id)])
+
+    def test_export_rejects_bad_parameters(self):
+        self.assertEqual(self.get("?output=xml")[0].status_code, 400)
+        self.assertEqual(self.get("?created_from=yesterday")[0].status_code, 400)
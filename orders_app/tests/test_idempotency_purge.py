@@ -0,0 +1,23 @@
+# orders_app/tests/test_idempotency_purge.py
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from orders_app.idempotency import IDEMPOTENCY_TTL
+from orders_app.models import IdempotencyKey
+
+
+class PurgeIdempotencyKeysTests(TestCase):
+    def test_purges_only_expired_keys_in_batches(self):
+        expired = timezone.now() - IDEMPOTENCY_TTL - timedelta(minutes=5)
+        for i in range(7):
+            IdempotencyKey.objects.create(tenant_id="shop-1", key=f"old-{i}", created_at=expired)
+        IdempotencyKey.objects.create(tenant_id="shop-1", key="fresh")
+
+        out = StringIO()
+        call_command("purge_idempotency_keys", "--batch-size", "3", stdout=out)
+
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["fresh"])
+        self.assertIn("deleted 7 row(s) in 3 batch(es)", out.getvalue())
+        self.assertIn("rows/sec", out.getvalue())
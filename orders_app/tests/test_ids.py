@@ -0,0 +1,82 @@
+# orders_app/tests/test_ids.py
+import json
+import uuid
+from asgiref.sync import async_to_sync
+from datetime import timedelta
+from django.test import TestCase, Client, AsyncRequestFactory, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from orders_app import ids
+from orders_app.async_views import AsyncOrderListView
+from orders_app.models import Order, Outbox
+
+
+class Uuid7Tests(TestCase):
+    def test_uuid7_is_version_7_and_increasing(self):
+        values = [ids.uuid7() for _ in range(1000)]
+        self.assertTrue(all(v.version == 7 and v.variant == uuid.RFC_4122 for v in values))
+        self.assertEqual(values, sorted(values, key=lambda v: v.bytes))
+        self.assertEqual(len(set(values)), len(values))
+        self.assertLess(abs(ids.timestamp(values[0]) - timezone.now()), timedelta(seconds=5))
+        self.assertIsNone(ids.timestamp(uuid.uuid4()))
+
+    def test_setting_selects_id_version(self):
+        self.assertEqual(Order().id.version, 4)
+        with override_settings(ORDERS_TIME_ORDERED_IDS=True):
+            self.assertEqual(Order().id.version, 7)
+            self.assertEqual(Outbox().id.version, 7)
+
+
+@override_settings(ORDERS_TIME_ORDERED_IDS=True)
+class IdCursorPaginationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+        now = timezone.now()
+        # legacy v4 rows mixed with v7 rows, including a created_at tie
+        self.orders = [
+            Order.objects.create(id=uuid.uuid4() if i % 2 else ids.uuid7(), tenant_id="shop-1",
+                                 created_at=now - timedelta(minutes=i // 2 * 2))
+            for i in range(7)
+        ]
+        self.expected = [str(o.id) for o in sorted(self.orders, key=lambda o: (o.created_at, o.id), reverse=True)]
+
+    def walk(self, cursor=None, limit=2):
+        seen = []
+        while True:
+            query = f"?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+            data = self.client.get(reverse("order-list") + query, **self.headers).json()
+            seen += [item["id"] for item in data["items"]]
+            cursor = data["nextCursor"]
+            if not cursor:
+                return seen
+
+    def test_id_only_cursor_walks_mixed_rows_in_list_order(self):
+        first = self.client.get(reverse("order-list") + "?limit=2", **self.headers).json()
+        self.assertEqual(len(first["nextCursor"]), 22)
+        self.assertEqual(self.walk(), self.expected)
+
+    def test_legacy_cursor_still_accepted(self):
+        with override_settings(ORDERS_TIME_ORDERED_IDS=False):
+            first = self.client.get(reverse("order-list") + "?limit=2", **self.headers).json()
+        self.assertEqual(self.walk(first["nextCursor"]), self.expected[2:])
+
+    def test_cursor_of_removed_v7_row_falls_back_to_embedded_time(self):
+        anchor = Order.objects.create(tenant_id="shop-1")  # newest, v7
+        cursor = self.client.get(reverse("order-list") + "?limit=1", **self.headers).json()["nextCursor"]
+        anchor.delete()
+        self.assertEqual(self.walk(cursor), self.expected)
+
+    def test_cursor_of_removed_v4_row_is_rejected(self):
+        anchor = Order.objects.create(id=uuid.uuid4(), tenant_id="shop-1")  # newest, no embedded time
+        path = reverse("order-list") + "?limit=1"
+        cursor = self.client.get(path, **self.headers).json()["nextCursor"]
+        self.assertEqual(self.walk(cursor), self.expected)  # while the row exists
+        anchor.delete()
+        response = self.client.get(path + f"&cursor={cursor}", **self.headers)
+        self.assertEqual((response.status_code, response.json()["code"]), (400, "invalid_cursor"))
+
+        request = AsyncRequestFactory().get(path + f"&cursor={cursor}")
+        request.tenant_id = "shop-1"
+        response = async_to_sync(AsyncOrderListView.as_view())(request)
+        self.assertEqual((response.status_code, json.loads(response.content)["code"]), (400, "invalid_cursor"))
@@ -0,0 +1,58 @@
+# orders_app/tests/test_indexes.py
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from orders_app.indexes import IndexInfo, indexes, redundant
+from orders_app.models import IdempotencyKey, Order
+
+
+def _index(name, columns, unique=False, primary=False, predicate=None, table="t"):
+    return IndexInfo(table, name, unique, primary, columns, (1,) * len(columns), predicate, False, 8192, 0)
+
+
+class RedundantIndexTests(TestCase):
+    def test_prefix_of_another_index_is_redundant(self):
+        narrow = _index("t_tenant", (2,))
+        wide = _index("t_tenant_created", (2, 6, 1))
+        self.assertEqual(redundant([narrow, wide]), [(narrow, wide)])
+
+    def test_unique_and_partial_indexes_are_kept(self):
+        infos = [
+            _index("t_pkey", (1,), unique=True, primary=True),
+            _index("t_tenant_key", (2, 3), unique=True),
+            _index("t_tenant_key_created", (2, 3, 6)),
+            _index("t_pending", (6,), predicate="(published_at IS NULL)"),
+            _index("t_created", (6, 1)),
+        ]
+        self.assertEqual(redundant(infos), [])
+
+    def test_exact_duplicate_keeps_the_constraint(self):
+        pkey = _index("t_pkey", (2, 3), unique=True, primary=True)
+        copy = _index("t_tenant_key_idx", (2, 3))
+        self.assertEqual(redundant([pkey, copy]), [(copy, pkey)])
+
+
+class CheckIndexesCommandTests(TestCase):
+    def test_migrated_schema_has_no_redundant_indexes(self):
+        out = StringIO()
+        call_command("check_indexes", stdout=out)
+        self.assertNotIn("redundant", out.getvalue())
+
+    def test_idempotency_keys_use_the_composite_primary_key(self):
+        table = IdempotencyKey._meta.db_table
+        primary = [i for i in indexes([table]) if i.primary]
+        self.assertEqual(len(primary), 1)
+        self.assertEqual(len(primary[0].columns), 2)
+        self.assertEqual(len(indexes([table])), 2)  # the key and idempotency_created_idx
+
+    def test_fails_on_a_redundant_index(self):
+        table = Order._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE INDEX test_order_tenant_idx ON {table} (tenant_id)")
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, "1 redundant index(es)"):
+            call_command("check_indexes", "--table", table, stdout=out)
+        self.assertIn(f"redundant: {table}.test_order_tenant_idx", out.getvalue())
+        self.assertIn("covered by orders_tenant_", out.getvalue())
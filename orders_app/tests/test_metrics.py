@@ -0,0 +1,90 @@
+# orders_app/tests/test_metrics.py
+import json
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TestCase, Client, AsyncRequestFactory, override_settings
+from django.urls import reverse
+from orders_app import metrics
+from orders_app.middleware import MetricsMiddleware
+from orders_app.models import Order, Outbox
+from orders_app.replay_cache import get_replay_cache
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+        get_replay_cache().clear()
+        metrics.reset()
+
+    def create(self, key, body="{}"):
+        return self.client.post(
+            reverse("order-create"), data=body, content_type="application/json",
+            **{"HTTP_IDEMPOTENCY_KEY": key, **self.headers},
+        )
+
+    def test_requests_and_queries_are_recorded_per_route(self):
+        order = Order.objects.create(tenant_id="shop-1")
+        self.client.patch(reverse("order-confirm", args=[order.id]), data=json.dumps({"totalCents": 100}),
+                          content_type="application/json", HTTP_IF_MATCH="1", **self.headers)
+        self.client.get(reverse("order-list"), **self.headers)
+
+        self.assertEqual(metrics.REQUESTS.value("order-confirm", "PATCH", "200"), 1)
+        self.assertEqual(metrics.REQUEST_LATENCY.count("order-list", "GET"), 1)
+        confirm = metrics.REQUEST_QUERIES._values[("order-confirm",)]
+        self.assertGreater(confirm[-1], 0)  # sum of statements
+        self.assertGreater(metrics.REQUEST_DB_TIME._values[("order-confirm",)][-1], 0)
+
+    def test_idempotency_outcomes(self):
+        self.create("m-1")
+        self.create("m-1")
+        self.assertEqual(self.create("m-1", '{"x": 1}').status_code, 409)
+        get_replay_cache().clear()
+        self.create("m-1")
+
+        self.assertEqual(metrics.IDEMPOTENCY.value("claimed", "db"), 1)
+        self.assertEqual(metrics.IDEMPOTENCY.value("replay", "cache"), 1)
+        self.assertEqual(metrics.IDEMPOTENCY.value("conflict", "cache"), 1)
+        self.assertEqual(metrics.IDEMPOTENCY.value("replay", "db"), 1)
+        self.assertEqual(metrics.REQUESTS.value("order-create", "POST", "409"), 1)
+
+    def test_prometheus_endpoint(self):
+        self.create("m-2")
+        Outbox.objects.create(event_type="order.created", order_id=Order.objects.get().id,
+                              tenant_id="shop-1", payload={})
+        response = self.client.get(reverse("metrics"))  # no X-Tenant-Id needed
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn("# TYPE orders_http_request_duration_seconds histogram", body)
+        self.assertIn('orders_http_requests_total{route="order-create",method="POST",status="200"} 1', body)
+        self.assertIn('orders_http_request_duration_seconds_bucket{route="order-create",method="POST",le="+Inf"} 1', body)
+        self.assertIn("orders_outbox_backlog 1", body)
+
+    def test_pool_counters(self):
+        body = self.client.get(reverse("metrics")).content.decode()
+        if connection.pool is None:
+            self.assertNotIn("orders_db_pool_", body)
+            return
+        self.assertIn("# TYPE orders_db_pool_in_use gauge", body)
+        in_use = next(line for line in body.splitlines() if line.startswith("orders_db_pool_in_use "))
+        self.assertGreaterEqual(int(in_use.split()[1]), 1)  # the test's own connection
+        self.assertIn("# TYPE orders_db_pool_acquire_seconds_total counter", body)
+
+    def test_unmatched_routes_share_one_label(self):
+        self.client.get("/api/orders/nope/nope", **self.headers)
+        self.assertEqual(metrics.REQUESTS.value("unmatched", "GET", "404"), 1)
+
+    @override_settings(ORDERS_METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.client.get(reverse("order-list"), **self.headers)
+        self.assertEqual(metrics.REQUESTS._values, {})
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+
+    async def test_async_queries_are_counted(self):
+        async def get_response(request):
+            await Order.objects.acount()
+            return HttpResponse()
+
+        await MetricsMiddleware(get_response)(AsyncRequestFactory().get("/api/orders/list"))
+        self.assertEqual(metrics.REQUEST_QUERIES._values[("unmatched",)][-1], 1)
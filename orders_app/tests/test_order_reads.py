@@ -0,0 +1,80 @@
+# orders_app/tests/test_order_reads.py
+import uuid
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from orders_app.models import Order
+from orders_app.serializers import OrderSerializer
+
+
+class OrderDetailTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+        cache.clear()
+        self.order = Order.objects.create(tenant_id="shop-1")
+
+    def get(self, order_id, **headers):
+        return self.client.get(reverse("order-detail", args=[order_id]), **self.headers, **headers)
+
+    def test_get_returns_order_with_etag(self):
+        response = self.get(self.order.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"1"')
+        self.assertEqual(response.json(), OrderSerializer(self.order).data)
+
+        self.assertEqual(self.get(uuid.uuid4()).status_code, 404)
+        other = self.client.get(reverse("order-detail", args=[self.order.id]), HTTP_X_TENANT_ID="shop-2")
+        self.assertEqual(other.status_code, 404)
+
+    def test_if_none_match_uses_version_cache(self):
+        self.get(self.order.id)
+        with self.assertNumQueries(0):
+            response = self.get(self.order.id, HTTP_IF_NONE_MATCH='W/"1"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], '"1"')
+
+        # a confirm refreshes the cached version, so the old tag no longer matches
+        self.client.patch(
+            reverse("order-confirm", args=[self.order.id]), data={"totalCents": 100},
+            content_type="application/json", HTTP_IF_MATCH='"1"', **self.headers,
+        )
+        with self.assertNumQueries(1):
+            response = self.get(self.order.id, HTTP_IF_NONE_MATCH='"1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"2"')
+
+    @override_settings(ORDERS_VERSION_CACHE_TTL=0)
+    def test_if_none_match_without_cache(self):
+        with self.assertNumQueries(1):
+            response = self.get(self.order.id, HTTP_IF_NONE_MATCH='"1"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.get(self.order.id, HTTP_IF_NONE_MATCH='"7"').status_code, 200)
+
+
+class OrderMultiGetTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+        self.orders = [Order.objects.create(tenant_id="shop-1") for _ in range(3)]
+        self.foreign = Order.objects.create(tenant_id="shop-2")
+
+    def test_multi_get_in_one_query(self):
+        a, b, c = (str(o.id) for o in self.orders)
+        unknown = str(uuid.uuid4())
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse("order-multi-get") + f"?ids={c},{a},{unknown}&ids={self.foreign.id},{c}", **self.headers
+            )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([item["id"] for item in body["items"]], [c, a])
+        self.assertEqual(body["missing"], [unknown, str(self.foreign.id)])
+
+    def test_multi_get_validation(self):
+        url = reverse("order-multi-get")
+        self.assertEqual(self.client.get(url, **self.headers).json()["code"], "invalid_ids")
+        self.assertEqual(self.client.get(url + "?ids=nope", **self.headers).status_code, 400)
+        too_many = ",".join(str(uuid.uuid4()) for _ in range(4))
+        with self.settings(ORDERS_BATCH_MAX_ITEMS=3):
+            self.assertEqual(self.client.get(url + f"?ids={too_many}", **self.headers).status_code, 400)
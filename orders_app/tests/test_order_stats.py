@@ -0,0 +1,82 @@
+# orders_app/tests/test_order_stats.py
+import json
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, Client
+from django.urls import reverse
+from orders_app import stats
+from orders_app.models import Order, TenantOrderStats
+from orders_app.replay_cache import get_replay_cache
+
+
+class OrderStatsTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+        get_replay_cache().clear()
+
+    def create(self, key):
+        return self.client.post(
+            reverse("order-create"), data="{}", content_type="application/json",
+            **{"HTTP_IDEMPOTENCY_KEY": key, **self.headers},
+        ).json()
+
+    def patch(self, name, payload):
+        return self.client.patch(
+            reverse(name), data=json.dumps(payload), content_type="application/json", **self.headers,
+        )
+
+    def get_stats(self):
+        response = self.client.get(reverse("order-stats"), **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_counters_follow_creates_and_transitions(self):
+        a, b = self.create("k-1"), self.create("k-2")
+        self.create("k-1")  # replay, not counted
+        self.client.post(
+            reverse("order-batch-create"), data=json.dumps({"items": [{"idempotencyKey": "k-3"}]}),
+            content_type="application/json", **self.headers,
+        )
+        self.patch("order-batch-confirm", {"items": [
+            {"id": a["id"], "version": 1, "totalCents": 1500},
+            {"id": b["id"], "version": 1, "totalCents": 500},
+        ]})
+        self.client.post(
+            reverse("order-batch-close"), data=json.dumps({"items": [
+                {"id": a["id"], "version": 2},
+                {"id": b["id"], "version": 9},  # stale, counters must not move
+            ]}),
+            content_type="application/json", **self.headers,
+        )
+
+        body = self.get_stats()
+        self.assertEqual(body["count"], 3)
+        self.assertEqual(body["totalCents"], 2000)
+        self.assertEqual(body["byStatus"], {
+            "draft": {"count": 1, "totalCents": 0},
+            "confirmed": {"count": 1, "totalCents": 500},
+            "closed": {"count": 1, "totalCents": 1500},
+        })
+        self.assertEqual(stats.verify("shop-1"), {})
+
+        other = self.client.get(reverse("order-stats"), HTTP_X_TENANT_ID="shop-2").json()
+        self.assertEqual(other["count"], 0)
+
+    def test_stats_read_is_one_query(self):
+        self.create("k-1")
+        with self.assertNumQueries(1):
+            self.client.get(reverse("order-stats"), **self.headers)
+
+    def test_verify_and_rebuild_repair_drift(self):
+        self.create("k-1")
+        Order.objects.create(tenant_id="shop-1", status=Order.Status.CONFIRMED, version=2, total_cents=700)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_order_stats", "--verify", stdout=StringIO())
+
+        call_command("rebuild_order_stats", "--tenant", "shop-1", stdout=StringIO())
+        self.assertEqual(stats.verify(), {})
+        row = TenantOrderStats.objects.get(tenant_id="shop-1", status="confirmed")
+        self.assertEqual((row.order_count, row.total_cents), (1, 700))
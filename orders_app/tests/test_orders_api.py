@@ -1,8 +1,15 @@
 # orders_app/tests/test_orders_api.py
 import json
-from django.test import TestCase, Client
+import uuid
+from datetime import timedelta
+from unittest import mock
+from django.utils import timezone
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
-from orders_app.models import Order, Outbox
+from orders_app.models import Order, Outbox, IdempotencyKey
+from orders_app.idempotency import IDEMPOTENCY_TTL, IN_FLIGHT_LEASE, fingerprint
+from orders_app.replay_cache import get_replay_cache
+from orders_app.serializers import OrderSerializer
 
 class OrdersApiTests(TestCase):
     def setUp(self):
@@ -11,6 +18,8 @@ class OrdersApiTests(TestCase):
         self.headers = {
             "HTTP_X_TENANT_ID": self.tenant_id,
         }
+        # the replay cache outlives the per-test transaction rollback
+        get_replay_cache().clear()
 
     # ------------------------
     # 1️⃣ Idempotency Tests
@@ -51,6 +60,101 @@ class OrdersApiTests(TestCase):
         )
         self.assertEqual(response3.status_code, 409)
 
+    def test_idempotency_replay_ignores_json_formatting(self):
+        url = reverse("order-create")
+        headers = {"HTTP_IDEMPOTENCY_KEY": "fmt-1", **self.headers}
+        response1 = self.client.post(url, data='{"a": 1, "b": [1, 2]}', content_type="application/json", **headers)
+        response2 = self.client.post(url, data='{"b":[1,2],"a":1}', content_type="application/json", **headers)
+        self.assertEqual(response2.status_code, 200)
+        self.assertEqual(response2.json()["id"], response1.json()["id"])
+        self.assertEqual(len(IdempotencyKey.objects.get(key="fmt-1").request_hash), 64)
+
+    def test_idempotency_replay_served_from_cache(self):
+        url = reverse("order-create")
+        headers = {"HTTP_IDEMPOTENCY_KEY": "cached-1", **self.headers}
+        response1 = self.client.post(url, data="{}", content_type="application/json", **headers)
+
+        cache = get_replay_cache()
+        hits = cache.stats()["local_hits"]
+        with self.assertNumQueries(0):
+            response2 = self.client.post(url, data="{}", content_type="application/json", **headers)
+            response3 = self.client.post(url, data='{"x": 1}', content_type="application/json", **headers)
+        self.assertEqual(response2.json()["id"], response1.json()["id"])
+        self.assertEqual(response3.status_code, 409)
+        self.assertEqual(cache.stats()["local_hits"], hits + 2)
+
+    @override_settings(IDEMPOTENCY_REPLAY_CACHE={"ENABLED": False})
+    def test_idempotency_replay_without_cache(self):
+        self.assertIsNone(get_replay_cache())
+        url = reverse("order-create")
+        headers = {"HTTP_IDEMPOTENCY_KEY": "uncached-1", **self.headers}
+        response1 = self.client.post(url, data="{}", content_type="application/json", **headers)
+        response2 = self.client.post(url, data="{}", content_type="application/json", **headers)
+        self.assertEqual(response2.json()["id"], response1.json()["id"])
+
+    def test_idempotency_in_flight_and_expired_keys(self):
+        url = reverse("order-create")
+        IdempotencyKey.objects.create(tenant_id=self.tenant_id, key="busy", request_hash=fingerprint(b""))
+
+        # key is held by an unfinished request -> fast 409, nothing created
+        response = self.client.post(
+            url, data="", content_type="application/json",
+            **{"HTTP_IDEMPOTENCY_KEY": "busy", **self.headers},
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["code"], "in_progress")
+        self.assertEqual(Order.objects.count(), 0)
+
+        # a claim left in progress past the lease belongs to a request that died
+        IdempotencyKey.objects.create(tenant_id=self.tenant_id, key="dead", request_hash=fingerprint(b""),
+                                      created_at=timezone.now() - IN_FLIGHT_LEASE - timedelta(seconds=1))
+        response = self.client.post(
+            url, data="", content_type="application/json",
+            **{"HTTP_IDEMPOTENCY_KEY": "dead", **self.headers},
+        )
+        self.assertEqual(response.status_code, 200)
+        Order.objects.all().delete()
+
+        # once the key is past its TTL it can be claimed again
+        IdempotencyKey.objects.filter(key="busy").update(
+            created_at=timezone.now() - IDEMPOTENCY_TTL - timedelta(seconds=1)
+        )
+        response = self.client.post(
+            url, data="", content_type="application/json",
+            **{"HTTP_IDEMPOTENCY_KEY": "busy", **self.headers},
+        )
+        self.assertEqual(response.status_code, 200)
+        row = IdempotencyKey.objects.get(key="busy")
+        self.assertEqual(row.state, IdempotencyKey.State.COMPLETED)
+        self.assertEqual(row.response_json["id"], response.json()["id"])
+
+    def test_order_is_not_committed_without_its_stored_response(self):
+        url = reverse("order-create")
+        headers = {"HTTP_IDEMPOTENCY_KEY": "unstored", **self.headers}
+        with mock.patch("orders_app.idempotency.complete", side_effect=RuntimeError("lost connection")):
+            with self.assertRaises(RuntimeError):
+                self.client.post(url, data="{}", content_type="application/json", **headers)
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertFalse(IdempotencyKey.objects.filter(key="unstored").exists())  # released for a retry
+
+        response = self.client.post(url, data="{}", content_type="application/json", **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(IdempotencyKey.objects.get(key="unstored").response_json["id"], response.json()["id"])
+
+    def test_create_that_lost_its_claim_rolls_back(self):
+        def taken_over(tenant_id, count=1):
+            # another request claimed the key after this one's lease ran out
+            IdempotencyKey.objects.filter(key="slow").update(created_at=timezone.now())
+
+        with mock.patch("orders_app.views.stats.record_created", side_effect=taken_over):
+            response = self.client.post(
+                reverse("order-create"), data="{}", content_type="application/json",
+                **{"HTTP_IDEMPOTENCY_KEY": "slow", **self.headers},
+            )
+        self.assertEqual((response.status_code, response.json()["code"]), (409, "in_progress"))
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(IdempotencyKey.objects.get(key="slow").state, IdempotencyKey.State.IN_PROGRESS)
+
     # ------------------------
     # 2️⃣ Optimistic Locking
     # ------------------------
@@ -87,6 +191,17 @@ class OrdersApiTests(TestCase):
         )
         self.assertEqual(response_stale.status_code, 409)
 
+        # If-Match beyond the integer version column is stale too, not a database error
+        for huge in (str(2**31), "99999999999", str(-2**31 - 1)):
+            response_huge = self.client.patch(
+                reverse("order-confirm", args=[order_id]),
+                data=json.dumps({"totalCents": 555}),
+                content_type="application/json",
+                **{"HTTP_IF_MATCH": huge, **self.headers},
+            )
+            self.assertEqual(response_huge.status_code, 409)
+            self.assertEqual(response_huge.json()["code"], "conflict")
+
     # ------------------------
     # 3️⃣ Close + Outbox
     # ------------------------
@@ -167,3 +282,90 @@ class OrdersApiTests(TestCase):
         ids_page1 = {item["id"] for item in data1["items"]}
         ids_page2 = {item["id"] for item in data2["items"]}
         self.assertTrue(ids_page1.isdisjoint(ids_page2))
+
+    def test_pagination_with_filters(self):
+        now = timezone.now()
+        for i in range(6):
+            Order.objects.create(
+                tenant_id=self.tenant_id,
+                status="confirmed" if i % 2 else "draft",
+                created_at=now - timedelta(days=i),
+            )
+        created_from = (now - timedelta(days=4, hours=1)).isoformat().replace("+00:00", "Z")
+        query = f"?limit=1&status=confirmed&created_from={created_from}"
+
+        ids, cursor = [], None
+        while True:
+            response = self.client.get(
+                reverse("order-list") + query + (f"&cursor={cursor}" if cursor else ""), **self.headers
+            )
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids += [item["id"] for item in data["items"]]
+            self.assertTrue(all(item["status"] == "confirmed" for item in data["items"]))
+            cursor = data["nextCursor"]
+            if not cursor:
+                break
+        self.assertEqual(len(ids), 2)  # days 1 and 3
+
+        first = self.client.get(reverse("order-list") + query, **self.headers).json()
+        # reusing the cursor with different filters is rejected
+        drifted = self.client.get(
+            reverse("order-list") + f"?limit=1&status=draft&cursor={first['nextCursor']}", **self.headers
+        )
+        self.assertEqual(drifted.status_code, 400)
+        self.assertEqual(drifted.json()["code"], "invalid_cursor")
+        self.assertEqual(
+            self.client.get(reverse("order-list") + "?status=bogus", **self.headers).status_code, 400
+        )
+
+    def test_invalid_limits_are_rejected(self):
+        Order.objects.create(tenant_id=self.tenant_id)
+        # the first unfiltered page (prepared statement) and a filtered page
+        for query in ("", "&status=draft"):
+            for limit in ("abc", "0", "-5", "1.5"):
+                response = self.client.get(reverse("order-list") + f"?limit={limit}{query}", **self.headers)
+                self.assertEqual((response.status_code, response.json()["code"]), (400, "invalid_param"), limit)
+        response = self.client.get(reverse("order-list") + "?limit=1000", **self.headers)
+        self.assertEqual(len(response.json()["items"]), 1)  # capped, not rejected
+
+    # ------------------------
+    # 5️⃣ Single-statement transitions
+    # ------------------------
+    def test_transitions_run_one_statement(self):
+        order = Order.objects.create(tenant_id=self.tenant_id)
+
+        with self.assertNumQueries(1):
+            response = self.client.patch(
+                reverse("order-confirm", args=[order.id]),
+                data=json.dumps({"totalCents": 700}),
+                content_type="application/json",
+                **{"HTTP_IF_MATCH": "1", **self.headers},
+            )
+        order.refresh_from_db()
+        self.assertEqual(response.json(), OrderSerializer(order).data)
+        self.assertEqual(response.json()["totalCents"], 700)
+
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                reverse("order-close", args=[order.id]),
+                content_type="application/json",
+                **{"HTTP_IF_MATCH": "2", **self.headers},
+            )
+        data = response.json()
+        self.assertEqual((data["id"], data["status"], data["version"]), (str(order.id), "closed", 3))
+        payload = Outbox.objects.get(order_id=order.id).payload
+        self.assertEqual(payload["orderId"], str(order.id))
+        self.assertEqual(payload["totalCents"], 700)
+
+    def test_transition_errors(self):
+        order = Order.objects.create(tenant_id=self.tenant_id)
+        close = lambda id_, version: self.client.post(
+            reverse("order-close", args=[id_]),
+            content_type="application/json",
+            **{"HTTP_IF_MATCH": str(version), **self.headers},
+        )
+        self.assertEqual(close(order.id, 1).status_code, 400)      # still a draft
+        self.assertEqual(close(order.id, 5).status_code, 409)      # stale
+        self.assertEqual(close(uuid.uuid4(), 1).status_code, 404)
+        self.assertFalse(Outbox.objects.exists())
@@ -0,0 +1,40 @@
+# orders_app/tests/test_outbox_relay.py
+import json
+import uuid
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from orders_app.models import Outbox
+from orders_app.outbox import BasePublisher, relay_batch
+
+
+class FailingPublisher(BasePublisher):
+    def publish(self, events):
+        raise RuntimeError("broker down")
+
+
+class OutboxRelayTests(TestCase):
+    def setUp(self):
+        for i in range(5):
+            Outbox.objects.create(
+                event_type="orders.closed", order_id=uuid.uuid4(), tenant_id="shop-1", payload={"n": i}
+            )
+
+    def test_relay_command_publishes_and_marks_rows(self):
+        out = StringIO()
+        call_command("relay_outbox", "--once", "--batch-size", "2", stdout=out, stderr=StringIO())
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(lines), 5)
+        self.assertEqual([l["payload"]["n"] for l in lines], [0, 1, 2, 3, 4])
+        self.assertFalse(Outbox.objects.filter(published_at__isnull=True).exists())
+
+        # nothing left to deliver on a second run
+        out = StringIO()
+        call_command("relay_outbox", "--once", stdout=out, stderr=StringIO())
+        self.assertEqual(out.getvalue(), "")
+
+    def test_failed_publish_leaves_rows_pending(self):
+        with self.assertRaises(RuntimeError):
+            relay_batch(FailingPublisher(), batch_size=10)
+        self.assertEqual(Outbox.objects.filter(published_at__isnull=True).count(), 5)
@@ -0,0 +1,107 @@
+# orders_app/tests/test_prepared.py
+from django.db import DataError, connection, transaction
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from orders_app.models import Order
+from orders_app.prepared import PreparedStatement
+from orders_app.replay_cache import get_replay_cache
+
+
+def _prepared_names():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM pg_prepared_statements")
+        return {row[0] for row in cursor.fetchall()}
+
+
+class PreparedStatementTests(TestCase):
+    def test_placeholders_become_numbered_parameters(self):
+        named = PreparedStatement("t_named", "SELECT %(a)s::int[], %(b)s, %(a)s::int[]")
+        self.assertEqual(named.prepare_sql, "PREPARE t_named AS SELECT $1::int[], $2, $1::int[]")
+        self.assertEqual(named.execute_sql, "EXECUTE t_named(%(a)s::int[], %(b)s)")
+
+        positional = PreparedStatement("t_pos", "SELECT %s::uuid[], %s")
+        self.assertEqual(positional.prepare_sql, "PREPARE t_pos AS SELECT $1::uuid[], $2")
+        self.assertEqual(positional.execute_sql, "EXECUTE t_pos(%s::uuid[], %s)")
+
+    @override_settings(ORDERS_PREPARED_STATEMENTS=True)
+    def test_prepared_once_per_connection(self):
+        statement = PreparedStatement("t_sum", "SELECT SUM(x) FROM unnest(%s::int[]) AS x WHERE x > %s")
+        for threshold, expected, statements in ((2, 7, 2), (3, 4, 1)):
+            with CaptureQueriesContext(connection) as ctx, connection.cursor() as cursor:
+                statement.execute(cursor, [[2, 3, 4], threshold])
+                self.assertEqual(cursor.fetchone()[0], expected)
+            self.assertEqual(len(ctx.captured_queries), statements)
+        self.assertEqual(ctx.captured_queries[0]["sql"].split("(")[0], "EXECUTE t_sum")
+        self.assertIn("t_sum", _prepared_names())
+
+    @override_settings(ORDERS_PREPARED_STATEMENTS=True)
+    def test_failed_first_execute_leaves_the_statement_usable(self):
+        statement = PreparedStatement("t_div", "SELECT 10 / %s::int")
+        with self.assertRaises(DataError), transaction.atomic(), connection.cursor() as cursor:
+            statement.execute(cursor, [0])
+        with connection.cursor() as cursor:
+            statement.execute(cursor, [5])
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    @override_settings(ORDERS_PREPARED_STATEMENTS=False)
+    def test_disabled_runs_plain_sql(self):
+        statement = PreparedStatement("t_plain", "SELECT %s::int + 1")
+        with connection.cursor() as cursor:
+            statement.execute(cursor, [1])
+            self.assertEqual(cursor.fetchone()[0], 2)
+        self.assertNotIn("t_plain", _prepared_names())
+
+
+@override_settings(ORDERS_PREPARED_STATEMENTS=True)
+class PreparedHotPathTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+        get_replay_cache().clear()
+
+    def test_hot_paths_use_prepared_statements(self):
+        for i in range(3):
+            self.client.post(reverse("order-create"), data="{}", content_type="application/json",
+                             **{"HTTP_IDEMPOTENCY_KEY": f"k-{i}", **self.headers})
+        order = Order.objects.order_by("created_at").first()
+        response = self.client.patch(
+            reverse("order-confirm", args=[order.id]), data={"totalCents": 10},
+            content_type="application/json", HTTP_IF_MATCH='"1"', **self.headers,
+        )
+        self.assertEqual(response.json()["version"], 2)
+
+        page = self.client.get(reverse("order-list") + "?limit=2", **self.headers).json()
+        rest = self.client.get(reverse("order-list") + f"?limit=2&cursor={page['nextCursor']}", **self.headers).json()
+        expected = list(Order.objects.filter(tenant_id="shop-1").order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual([i["id"] for i in page["items"] + rest["items"]], [str(i) for i in expected])
+
+        self.assertLessEqual(
+            {"orders_idempotency_claim", "orders_confirm", "orders_first_page"}, _prepared_names()
+        )
+
+
+@override_settings(ORDERS_PREPARED_STATEMENTS=True)
+class PreparedFailureTests(TransactionTestCase):
+    """Requests autocommit here, as in production, so a failed statement does not abort the test."""
+
+    def setUp(self):
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+        get_replay_cache().clear()
+
+    def test_failed_request_does_not_poison_the_connection(self):
+        client = Client(raise_request_exception=False)
+        order = Order.objects.create(tenant_id="shop-1")
+        # the first use of each statement fails inside the database
+        failed = client.post(reverse("order-create"), data="{}", content_type="application/json",
+                             **{"HTTP_IDEMPOTENCY_KEY": "k" * 300, **self.headers})
+        self.assertEqual(failed.status_code, 500)
+        for key in ("ok-1", "ok-2"):
+            response = client.post(reverse("order-create"), data="{}", content_type="application/json",
+                                   **{"HTTP_IDEMPOTENCY_KEY": key, **self.headers})
+            self.assertEqual(response.status_code, 200)
+        response = client.patch(
+            reverse("order-confirm", args=[order.id]), data={"totalCents": 10},
+            content_type="application/json", HTTP_IF_MATCH='"1"', **self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
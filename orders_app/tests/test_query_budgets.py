@@ -0,0 +1,90 @@
+# orders_app/tests/test_query_budgets.py
+import json
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from orders_app.models import Order
+from orders_app.replay_cache import get_replay_cache
+from orders_app.tests.utils import QueryPlanAssertions
+
+
+class QueryBudgetTests(QueryPlanAssertions, TestCase):
+    """Every endpoint stays within its QUERY_BUDGETS entry; N+1s and extra round trips fail here."""
+
+    def setUp(self):
+        self.client = Client()
+        self.headers = {"HTTP_X_TENANT_ID": "shop-1"}
+        cache.clear()
+        get_replay_cache().clear()
+        self.orders = [Order.objects.create(tenant_id="shop-1") for _ in range(30)]
+
+    def post(self, route, body, args=(), **headers):
+        return self.client.post(reverse(route, args=args), data=json.dumps(body),
+                                content_type="application/json", **self.headers, **headers)
+
+    def patch(self, route, body, args=(), **headers):
+        return self.client.patch(reverse(route, args=args), data=json.dumps(body),
+                                 content_type="application/json", **self.headers, **headers)
+
+    def get(self, route, query="", args=()):
+        return self.client.get(reverse(route, args=args) + query, **self.headers)
+
+    def test_create(self):
+        with self.assertQueryBudget("order-create"):
+            self.assertEqual(self.post("order-create", {}, HTTP_IDEMPOTENCY_KEY="k-1").status_code, 200)
+        get_replay_cache().clear()
+        with self.assertQueryBudget("order-create"):  # replayed from the database
+            self.assertEqual(self.post("order-create", {}, HTTP_IDEMPOTENCY_KEY="k-1").status_code, 200)
+
+    def test_batch_create(self):
+        with self.assertQueryBudget("order-batch-create"):
+            response = self.post("order-batch-create", {"items": [{"idempotencyKey": f"k-{i}"} for i in range(50)]})
+        self.assertEqual(response.status_code, 200)
+
+    def test_transitions(self):
+        order = self.orders[0]
+        with self.assertQueryBudget("order-confirm"):
+            response = self.patch("order-confirm", {"totalCents": 100}, args=[order.id], HTTP_IF_MATCH="1")
+        self.assertEqual(response.status_code, 200)
+        with self.assertQueryBudget("order-close"):
+            self.assertEqual(self.post("order-close", {}, args=[order.id], HTTP_IF_MATCH="2").status_code, 200)
+
+    def test_batch_transitions(self):
+        drafts = self.orders[1:21]
+        with self.assertQueryBudget("order-batch-confirm"):
+            response = self.patch("order-batch-confirm", {
+                "items": [{"id": str(o.id), "version": 1, "totalCents": 100} for o in drafts],
+            })
+        self.assertEqual(response.status_code, 200)
+        with self.assertQueryBudget("order-batch-close"):
+            response = self.post("order-batch-close", {"items": [{"id": str(o.id), "version": 2} for o in drafts]})
+        self.assertEqual(response.status_code, 200)
+
+    def test_reads(self):
+        ids = ",".join(str(o.id) for o in self.orders[:20])
+        with self.assertQueryBudget("order-detail"):
+            self.assertEqual(self.get("order-detail", args=[self.orders[0].id]).status_code, 200)
+        with self.assertQueryBudget("order-multi-get"):
+            self.assertEqual(self.get("order-multi-get", f"?ids={ids}").status_code, 200)
+        with self.assertQueryBudget("order-stats"):
+            self.assertEqual(self.get("order-stats").status_code, 200)
+        with self.assertQueryBudget("metrics"):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+    def test_list_pages(self):
+        cursor = None
+        for _ in range(3):
+            with self.assertQueryBudget("order-list"):
+                response = self.get("order-list", "?limit=10" + (f"&cursor={cursor}" if cursor else ""))
+            self.assertEqual(response.status_code, 200)
+            cursor = response.json()["nextCursor"]
+        with self.assertQueryBudget("order-list"):
+            self.assertEqual(self.get("order-list", "?status=draft&limit=10").status_code, 200)
+
+    def test_changes_and_export(self):
+        with self.assertQueryBudget("order-changes"):
+            self.assertEqual(self.get("order-changes", "?limit=10").status_code, 200)
+        with self.assertQueryBudget("order-export"):
+            response = self.get("order-export")
+            lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 30)
@@ -0,0 +1,146 @@
+# orders_app/tests/test_query_plans.py
+import json
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from orders_app.benchmarks.seed import seed
+from orders_app.ids import new_id
+from orders_app.models import IdempotencyKey, Order, Outbox
+from orders_app.outbox import BasePublisher, relay_batch
+from orders_app.pagination import _encode_cursor, _encode_id_cursor
+from orders_app.tests.utils import QueryPlanAssertions, explain, plan_nodes, statements
+
+ORDERS = Order._meta.db_table
+OUTBOX = Outbox._meta.db_table
+KEYS = IdempotencyKey._meta.db_table
+
+
+def _copy(table, columns, rows):
+    with connection.cursor() as cursor:
+        with cursor.cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+class _NullPublisher(BasePublisher):
+    def publish(self, events):
+        pass
+
+
+@override_settings(ORDERS_PREPARED_STATEMENTS=False)  # capture the plain SQL, so it can be explained
+class QueryPlanTests(QueryPlanAssertions, TestCase):
+    """
+    EXPLAIN every hot-path statement, as the endpoint runs it, against a
+    dataset large enough that a sequential scan or a sort would be costed as
+    the worse plan. Fails when a change makes the planner stop using the
+    index the query was written for.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(tenants=20, orders=30000)  # Zipf-skewed: the first tenant holds about a quarter
+        now = timezone.now()
+        _copy(OUTBOX, ("id", "event_type", "order_id", "tenant_id", "payload", "published_at", "created_at"), (
+            (new_id(), "orders.closed", new_id(), "bench-0", "{}", None if i % 1000 == 0 else now,
+             now - timedelta(seconds=i))
+            for i in range(20000)
+        ))
+        _copy(KEYS, ("tenant_id", "key", "request_hash", "state", "created_at"), (
+            (f"bench-{i % 20}", f"k-{i}", "0" * 64, "completed", now) for i in range(20000)
+        ))
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {OUTBOX}")
+            cursor.execute(f"ANALYZE {KEYS}")
+        cls.tenant_id = "bench-0"
+        cls.newest = list(
+            Order.objects.filter(tenant_id=cls.tenant_id).order_by("-created_at", "-id")[:5001]
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.headers = {"HTTP_X_TENANT_ID": self.tenant_id}
+
+    def plans(self, call, table):
+        """(sql, plan) of every statement on `table` that `call` runs."""
+        with CaptureQueriesContext(connection) as captured:
+            response = call()
+        self.assertLess(response.status_code, 300, getattr(response, "content", b"")[:500])
+        found = statements(captured, table)
+        self.assertTrue(found, f"no statement on {table}")
+        return [(sql, explain(sql)) for sql in found]
+
+    def list_plan(self, query):
+        [(sql, plan)] = self.plans(
+            lambda: self.client.get(reverse("order-list") + query, **self.headers), ORDERS,
+        )
+        return plan
+
+    def assertKeysetInIndexCond(self, plan, columns):
+        # the cursor must bound the index scan itself, not filter the rows it returns
+        conditions = [node.get("Index Cond", "") for node in plan_nodes(plan) if node.get("Relation Name") == ORDERS]
+        self.assertTrue(any(f"ROW({columns})" in c for c in conditions), json.dumps(plan, indent=1))
+
+    def test_first_list_page(self):
+        plan = self.list_plan("?limit=50")
+        self.assertIndexPlan(plan, ORDERS, "orders_tenant_created_id_idx", max_rows=51)
+        self.assertNoSort(plan)
+
+    def test_deep_list_page(self):
+        anchor = self.newest[-1]
+        for cursor in (_encode_cursor(anchor.created_at.isoformat(), anchor.id), _encode_id_cursor(anchor.id)):
+            with self.subTest(cursor=cursor):
+                plan = self.list_plan(f"?limit=50&cursor={cursor}")
+                self.assertIndexPlan(plan, ORDERS, "orders_tenant_created_id_idx", max_rows=51)
+                self.assertNoSort(plan)
+                self.assertKeysetInIndexCond(plan, "created_at, id")
+
+    def test_status_filtered_deep_page(self):
+        first = self.client.get(reverse("order-list") + "?status=confirmed&limit=100", **self.headers).json()
+        plan = self.list_plan(f"?status=confirmed&limit=50&cursor={first['nextCursor']}")
+        self.assertIndexPlan(plan, ORDERS, "orders_tenant_status_idx", max_rows=51)
+        self.assertNoSort(plan)
+        self.assertKeysetInIndexCond(plan, "created_at, id")
+
+    def test_changes_page(self):
+        first = self.client.get(reverse("order-changes") + "?limit=100", **self.headers).json()
+        [(sql, plan)] = self.plans(lambda: self.client.get(
+            reverse("order-changes") + f"?limit=50&since={first['nextCursor']}", **self.headers,
+        ), ORDERS)
+        self.assertIndexPlan(plan, ORDERS, "orders_tenant_updated_idx", max_rows=51)
+        self.assertNoSort(plan)
+        self.assertKeysetInIndexCond(plan, "updated_at, id")
+
+    def test_confirm_and_close(self):
+        draft = Order.objects.filter(tenant_id=self.tenant_id, status=Order.Status.DRAFT).first()
+        [(sql, plan)] = self.plans(lambda: self.client.patch(
+            reverse("order-confirm", args=[draft.id]), data=json.dumps({"totalCents": 100}),
+            content_type="application/json", HTTP_IF_MATCH="1", **self.headers,
+        ), ORDERS)
+        self.assertIndexPlan(plan, ORDERS, "orders_app_order_pkey", max_rows=1)
+
+        [(sql, plan)] = self.plans(lambda: self.client.post(
+            reverse("order-close", args=[draft.id]), HTTP_IF_MATCH="2", **self.headers,
+        ), ORDERS)
+        self.assertIndexPlan(plan, ORDERS, "orders_app_order_pkey", max_rows=1)
+        locks = [node for node in plan_nodes(plan) if node["Node Type"] == "LockRows"]
+        self.assertTrue(locks)
+        for node in plan_nodes(locks[0]):
+            self.assertLessEqual(node["Plan Rows"], 10, json.dumps(plan, indent=1))
+
+    def test_idempotency_claim(self):
+        claim = self.plans(lambda: self.client.post(
+            reverse("order-create"), data="{}", content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY="k-3", **self.headers,  # an existing key: the replay branch
+        ), KEYS)[0][1]
+        self.assertIndexPlan(claim, KEYS, "orders_app_idempotencykey_pkey", max_rows=2)
+
+    def test_outbox_claim(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(relay_batch(_NullPublisher(), batch_size=100), 20)
+        claim = next(sql for sql in statements(captured, OUTBOX) if "SKIP LOCKED" in sql)
+        plan = explain(claim)
+        self.assertIndexPlan(plan, OUTBOX, "outbox_unpublished_idx", max_rows=100)
+        self.assertNoSort(plan)
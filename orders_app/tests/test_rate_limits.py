@@ -0,0 +1,129 @@
+# orders_app/tests/test_rate_limits.py
+import json
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.urls import reverse
+from orders_app.middleware import AdmissionMiddleware
+from orders_app.models import Tenant
+from orders_app.replay_cache import get_replay_cache
+from orders_app.throttling import LocalTokenBuckets, get_admission
+
+
+def limits(backend="local", max_concurrent=0, **endpoints):
+    return {
+        "ENABLED": True, "BACKEND": backend, "MAX_CONCURRENT": max_concurrent,
+        "ENDPOINTS": {name: {"RATE": 1, "BURST": burst} for name, burst in endpoints.items()},
+    }
+
+
+class TokenBucketTests(TestCase):
+    def test_burst_then_wait(self):
+        buckets = LocalTokenBuckets()
+        self.assertEqual([buckets.take(("t", "list"), 10, 3) for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(buckets.take(("t", "list"), 10, 3), 0.1, places=2)
+        self.assertEqual(buckets.take(("u", "list"), 10, 3), 0.0)
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        get_replay_cache().clear()
+
+    def get_list(self, tenant="shop-1"):
+        return self.client.get(reverse("order-list"), HTTP_X_TENANT_ID=tenant)
+
+    def assert_limited(self, backend):
+        with override_settings(ORDERS_RATE_LIMITS=limits(backend, list=2)):
+            self.assertEqual([self.get_list().status_code for _ in range(2)], [200, 200])
+            response = self.get_list()
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.json()["code"], "rate_limited")
+            self.assertEqual(response["Retry-After"], "1")
+            self.assertEqual(self.get_list("shop-2").status_code, 200)
+            # other endpoint classes have their own bucket
+            self.assertEqual(self.client.get(reverse("order-stats"), HTTP_X_TENANT_ID="shop-1").status_code, 429)
+            self.assertEqual(self.client.post(
+                reverse("order-create"), data="{}", content_type="application/json",
+                HTTP_X_TENANT_ID="shop-1", HTTP_IDEMPOTENCY_KEY="rl-1",
+            ).status_code, 200)
+
+    def test_local_backend(self):
+        self.assert_limited("local")
+
+    def test_cache_backend(self):
+        self.assert_limited("cache")
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(get_admission())
+        self.assertEqual({self.get_list().status_code for _ in range(5)}, {200})
+
+    @override_settings(ORDERS_TENANT_REGISTRY={"VALIDATE": True, "TTL_SECONDS": 60})
+    def test_tenant_override(self):
+        Tenant.objects.create(id="shop-1", config={"rate_limits": {"list": {"RATE": 1, "BURST": 5}}})
+        Tenant.objects.create(id="shop-2")
+        with override_settings(ORDERS_RATE_LIMITS=limits(list=1)):
+            self.assertEqual({self.get_list().status_code for _ in range(5)}, {200})
+            self.assertEqual([self.get_list("shop-2").status_code for _ in range(2)], [200, 429])
+
+
+@override_settings(ORDERS_RATE_LIMITS=limits(max_concurrent=1))
+class ConcurrencyCapTests(TestCase):
+    def request(self):
+        request = RequestFactory().get("/api/orders/export")
+        request.tenant_id, request.tenant = "shop-1", None
+        return request
+
+    def test_second_request_in_flight_is_rejected(self):
+        statuses = []
+
+        def get_response(request):
+            statuses.append(middleware(self.request()).status_code)  # arrives while the first runs
+            return HttpResponse()
+
+        middleware = AdmissionMiddleware(get_response)
+        self.assertEqual(middleware(self.request()).status_code, 200)
+        self.assertEqual(statuses, [429])
+        self.assertEqual(get_admission().concurrency.active("shop-1"), 0)
+
+    def test_streaming_response_holds_its_slot_until_closed(self):
+        middleware = AdmissionMiddleware(lambda request: StreamingHttpResponse(iter([b"x"])))
+        response = middleware(self.request())
+        self.assertEqual(get_admission().concurrency.active("shop-1"), 1)
+        rejected = middleware(self.request())
+        self.assertEqual(json.loads(rejected.content)["code"], "too_many_concurrent")
+        response.close()
+        self.assertEqual(get_admission().concurrency.active("shop-1"), 0)
+
+    def test_streaming_slot_is_freed_once_the_body_is_sent(self):
+        middleware = AdmissionMiddleware(lambda request: StreamingHttpResponse(iter([b"x", b"y"])))
+        response = middleware(self.request())
+        self.assertEqual(b"".join(response), b"xy")
+        self.assertEqual(get_admission().concurrency.active("shop-1"), 0)
+        response.close()  # released once only
+        self.assertEqual(get_admission().concurrency.active("shop-1"), 0)
+        self.assertEqual(middleware(self.request()).status_code, 200)
+
+    async def test_async_streaming_response_stays_async(self):
+        async def content():
+            yield b"x"
+
+        async def get_response(request):
+            return StreamingHttpResponse(content())
+
+        response = await AdmissionMiddleware(get_response)(self.request())
+        self.assertTrue(response.is_async)
+        self.assertEqual(get_admission().concurrency.active("shop-1"), 1)
+        self.assertEqual(b"".join([chunk async for chunk in response]), b"x")
+        self.assertEqual(get_admission().concurrency.active("shop-1"), 0)
+
+    async def test_async_mode(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = AdmissionMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware.process_view))
+        self.assertEqual((await middleware(self.request())).status_code, 200)
+        self.assertEqual(get_admission().concurrency.active("shop-1"), 0)
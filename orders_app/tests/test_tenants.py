@@ -0,0 +1,82 @@
+# orders_app/tests/test_tenants.py
+from io import StringIO
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import TestCase, Client, RequestFactory, AsyncRequestFactory, override_settings
+from django.urls import reverse
+from orders_app.middleware import SiteMiddleware, TenantMiddleware
+from orders_app.models import Tenant
+from orders_app.tenants import get_tenant_registry
+
+VALIDATE = {"VALIDATE": True, "TTL_SECONDS": 60}
+
+
+class SiteMiddlewareTests(TestCase):
+    def seen(self, path):
+        middleware = SiteMiddleware(lambda request: HttpResponse(str(hasattr(request, "session"))))
+        return middleware(RequestFactory().get(path)).content
+
+    def test_api_requests_skip_the_site_stack(self):
+        self.assertEqual(self.seen("/api/orders/list"), b"False")
+        self.assertEqual(self.seen("/docs/"), b"True")
+
+    def test_async_view_hook_skips_api_requests(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = SiteMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware.process_view))
+        request = AsyncRequestFactory().get("/api/orders/list")
+        self.assertIsNone(async_to_sync(middleware.process_view)(request, None, (), {}))
+
+    def test_site_paths_need_no_tenant(self):
+        self.assertEqual(Client().get(reverse("swagger-ui")).status_code, 200)
+        response = Client().get(reverse("order-list"))
+        self.assertEqual(response.json()["code"], "missing_tenant")
+
+
+@override_settings(ORDERS_TENANT_REGISTRY=VALIDATE)
+class TenantRegistryTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        Tenant.objects.create(id="shop-1", config={"rate": 5})
+        Tenant.objects.create(id="shop-old", is_active=False)
+
+    def test_unknown_and_inactive_tenants_are_rejected(self):
+        for tenant in ("shop-404", "shop-old"):
+            response = self.client.get(reverse("order-list"), HTTP_X_TENANT_ID=tenant)
+            self.assertEqual(response.status_code, 403)
+            self.assertEqual(response.json()["code"], "unknown_tenant")
+        self.assertEqual(self.client.get(reverse("order-list"), HTTP_X_TENANT_ID="shop-1").status_code, 200)
+
+    def test_resolution_is_cached(self):
+        middleware = TenantMiddleware(lambda request: HttpResponse(str(request.tenant.config)))
+        request = RequestFactory().get("/api/orders/list", HTTP_X_TENANT_ID="shop-1")
+        with self.assertNumQueries(1):
+            middleware(request)
+        with self.assertNumQueries(0):
+            response = middleware(request)
+        self.assertEqual(response.content, b"{'rate': 5}")
+
+    async def test_async_resolution(self):
+        async def get_response(request):
+            return HttpResponse(request.tenant.id)
+
+        middleware = TenantMiddleware(get_response)
+        factory = AsyncRequestFactory()
+        response = await middleware(factory.get("/api/orders/list", headers={"X-Tenant-Id": "shop-1"}))
+        self.assertEqual(response.content, b"shop-1")
+        rejected = await middleware(factory.get("/api/orders/list", headers={"X-Tenant-Id": "shop-404"}))
+        self.assertEqual(rejected.status_code, 403)
+
+    def test_register_tenant_command(self):
+        self.assertIsNone(get_tenant_registry().get("shop-2"))
+        call_command("register_tenant", "shop-2", "--config", '{"rate": 1}', stdout=StringIO())
+        self.assertEqual(get_tenant_registry().get("shop-2").config, {"rate": 1})
+        call_command("register_tenant", "shop-2", "--deactivate", stdout=StringIO())
+        self.assertIsNone(get_tenant_registry().get("shop-2"))
+
+    def test_validation_off_accepts_any_tenant(self):
+        with override_settings(ORDERS_TENANT_REGISTRY={"VALIDATE": False}):
+            self.assertEqual(self.client.get(reverse("order-list"), HTTP_X_TENANT_ID="shop-404").status_code, 200)
@@ -0,0 +1,91 @@
+# orders_app/tests/utils.py
+"""
+Shared helpers for the query plan and query budget tests.
+"""
+import json
+from contextlib import contextmanager
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Most SQL statements each endpoint may run for one request, batch endpoints
+# included (their statement count must not grow with the batch). Raise a budget
+# only together with the change that needs the extra round trip.
+QUERY_BUDGETS = {
+    "order-create": 4,           # claim the key, insert, count it in the stats, store the response
+    "order-batch-create": 4,     # the same four, once for the whole batch
+    "order-confirm": 1,
+    "order-close": 1,
+    "order-batch-confirm": 1,
+    "order-batch-close": 1,
+    "order-detail": 1,
+    "order-multi-get": 1,
+    "order-list": 1,
+    "order-changes": 1,
+    "order-export": 1,
+    "order-stats": 1,
+    "metrics": 1,
+}
+
+# transaction control, and the PREPARE a hot statement runs once per connection
+_SKIPPED = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT", "BEGIN", "COMMIT", "SET ", "PREPARE ")
+
+
+def explain(sql, params=None):
+    """The root node of `EXPLAIN (FORMAT JSON)` for one statement (not executed)."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def plan_nodes(node):
+    """Every node of a plan, init plans and CTEs included, parents first."""
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def statements(captured, table):
+    """SQL of the captured statements that read or write `table`, in order."""
+    return [
+        query["sql"] for query in captured
+        if table in query["sql"] and not query["sql"].lstrip().upper().startswith(_SKIPPED)
+    ]
+
+
+class QueryPlanAssertions:
+    """TestCase mixin for checks on how Postgres plans to run a statement."""
+
+    def assertIndexPlan(self, plan, table, index, max_rows=None):
+        """
+        Every scan of `table` goes through an index and at least one uses
+        `index`; with `max_rows`, the statement returns at most that many rows.
+        """
+        scans = [node for node in plan_nodes(plan) if node.get("Relation Name") == table]
+        self.assertTrue(scans, f"{table} is not read by this plan:\n{json.dumps(plan, indent=1)}")
+        for node in scans:
+            self.assertNotEqual(
+                node["Node Type"], "Seq Scan", f"sequential scan of {table}:\n{json.dumps(plan, indent=1)}"
+            )
+        self.assertIn(index, [node.get("Index Name") for node in scans], json.dumps(plan, indent=1))
+        if max_rows is not None:
+            self.assertLessEqual(plan["Plan Rows"], max_rows, json.dumps(plan, indent=1))
+
+    def assertNoSort(self, plan):
+        sorts = [node for node in plan_nodes(plan) if node["Node Type"] in ("Sort", "Incremental Sort")]
+        self.assertFalse(sorts, f"plan sorts rows instead of reading them in index order:\n"
+                                f"{json.dumps(plan, indent=1)}")
+
+    @contextmanager
+    def assertQueryBudget(self, route):
+        """Fail when the block runs more SQL statements than QUERY_BUDGETS[route]."""
+        budget = QUERY_BUDGETS[route]
+        with CaptureQueriesContext(connection) as captured:
+            yield captured
+        executed = [q["sql"] for q in captured if not q["sql"].lstrip().upper().startswith(_SKIPPED)]
+        self.assertLessEqual(
+            len(executed), budget,
+            f"{route} ran {len(executed)} statement(s), budget {budget}:\n" + "\n".join(executed),
+        )
@@ -0,0 +1,172 @@
+# orders_app/throttling.py
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# URL name -> endpoint class with its own per-tenant rate (ORDERS_RATE_LIMITS["ENDPOINTS"])
+ENDPOINT_CLASSES = {
+    "order-create": "create",
+    "order-batch-create": "create",
+    "order-confirm": "transitions",
+    "order-close": "transitions",
+    "order-batch-confirm": "transitions",
+    "order-batch-close": "transitions",
+    "order-list": "list",
+    "order-detail": "list",
+    "order-multi-get": "list",
+    "order-changes": "list",
+    "order-stats": "list",
+    "order-export": "export",
+}
+
+
+def _gcra(tat, now, rate, burst):
+    """
+    One token-bucket step in GCRA form: the bucket is a single "theoretical
+    arrival time". Returns (new_tat, 0.0) when admitted, (None, seconds to
+    wait) when the bucket is empty.
+    """
+    interval = 1.0 / rate
+    new_tat = max(tat or now, now) + interval
+    allowed_at = new_tat - burst * interval
+    if allowed_at > now:
+        return None, allowed_at - now
+    return new_tat, 0.0
+
+
+class LocalTokenBuckets:
+    """Per-process buckets in a bounded LRU; no I/O, so cheap on every request."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._tats = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        """Take one token from `key`'s bucket; seconds to wait, 0.0 when admitted."""
+        now = time.monotonic()
+        with self._lock:
+            new_tat, wait = _gcra(self._tats.get(key), now, rate, burst)
+            if new_tat is not None:
+                self._tats[key] = new_tat
+                self._tats.move_to_end(key)
+                if len(self._tats) > self.max_entries:
+                    self._tats.popitem(last=False)
+        return wait
+
+    async def atake(self, key, rate, burst):
+        return self.take(key, rate, burst)
+
+
+class CacheTokenBuckets:
+    """
+    Buckets shared by every worker through a Django cache alias. The cache API
+    has no compare-and-set, so workers racing on the same bucket can each admit
+    one request over the limit; sustained rates still hold.
+    """
+
+    def __init__(self, alias="default"):
+        self.cache = caches[alias]
+
+    @staticmethod
+    def _key(key):
+        return "rate:" + ":".join(key)
+
+    def take(self, key, rate, burst):
+        now = time.time()
+        new_tat, wait = _gcra(self.cache.get(self._key(key)), now, rate, burst)
+        if new_tat is not None:
+            self.cache.set(self._key(key), new_tat, timeout=int(new_tat - now) + 1)
+        return wait
+
+    async def atake(self, key, rate, burst):
+        now = time.time()
+        new_tat, wait = _gcra(await self.cache.aget(self._key(key)), now, rate, burst)
+        if new_tat is not None:
+            await self.cache.aset(self._key(key), new_tat, timeout=int(new_tat - now) + 1)
+        return wait
+
+
+class ConcurrencyLimiter:
+    """
+    In-flight requests per tenant in this process. Connection pools are per
+    process too, so capping here keeps one tenant from holding all of them.
+    """
+
+    def __init__(self):
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, tenant_id, limit):
+        with self._lock:
+            active = self._active.get(tenant_id, 0)
+            if active >= limit:
+                return False
+            self._active[tenant_id] = active + 1
+            return True
+
+    def release(self, tenant_id):
+        with self._lock:
+            active = self._active.pop(tenant_id) - 1
+            if active:
+                self._active[tenant_id] = active
+
+    def active(self, tenant_id):
+        return self._active.get(tenant_id, 0)
+
+
+class Admission:
+    """
+    Per-tenant admission control: a token bucket per (tenant, endpoint class)
+    and a cap on concurrent requests. Tenants can override both through their
+    registry config: {"rate_limits": {"create": {"RATE": 5, "BURST": 10}},
+    "max_concurrent": 2}.
+    """
+
+    def __init__(self, options):
+        self.endpoints = options.get("ENDPOINTS", {})
+        self.max_concurrent = options.get("MAX_CONCURRENT", 0)
+        if options.get("BACKEND", "local") == "cache":
+            self.buckets = CacheTokenBuckets(options.get("CACHE_ALIAS", "default"))
+        else:
+            self.buckets = LocalTokenBuckets(options.get("LOCAL_MAX_ENTRIES", 10000))
+        self.concurrency = ConcurrencyLimiter()
+
+    @staticmethod
+    def _config(tenant):
+        return tenant.config if tenant is not None else {}
+
+    def rate(self, tenant, endpoint_class):
+        """(rate per second, burst) for the tenant and endpoint class, or None when unlimited."""
+        limit = self._config(tenant).get("rate_limits", {}).get(endpoint_class) or self.endpoints.get(endpoint_class)
+        if not limit or not limit.get("RATE"):
+            return None
+        return limit["RATE"], limit.get("BURST", limit["RATE"])
+
+    def concurrency_limit(self, tenant):
+        return self._config(tenant).get("max_concurrent", self.max_concurrent)
+
+
+_admission = None
+
+
+def get_admission():
+    """Process-wide Admission, or None when rate limiting is off."""
+    global _admission
+    options = getattr(settings, "ORDERS_RATE_LIMITS", {})
+    if not options.get("ENABLED", False):
+        return None
+    if _admission is None:
+        _admission = Admission(options)
+    return _admission
+
+
+@receiver(setting_changed)
+def _reset_admission(setting, **kwargs):
+    global _admission
+    if setting == "ORDERS_RATE_LIMITS":
+        _admission = None
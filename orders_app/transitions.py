@@ -0,0 +1,149 @@
+# orders_app/transitions.py
+from collections import namedtuple
+from django.db import connection
+from django.utils import timezone
+from .encoders import ORDER_COLUMNS
+from .ids import new_id
+from .prepared import PreparedStatement
+from .models import Order, Outbox, TenantOrderStats
+
+# failure codes
+NOT_FOUND = "not_found"
+STALE = "stale"
+INVALID_TRANSITION = "invalid_transition"
+
+# `order` is the ORDER_COLUMNS row after the transition, `error` a failure code
+Result = namedtuple("Result", ["id", "order", "error"])
+
+# Every transition is one statement, for one order or a whole batch:
+#   locked   - lock the tenant's target rows in id order (no deadlocks between batches)
+#   updated  - conditional UPDATE ... FROM unnest() bumping the version
+#   stats    - move each updated order's count/total between the tenant's status counters
+#   {extra}  - optional data-modifying CTEs fed by `updated` (e.g. the outbox insert)
+# The final SELECT joins every input item to its updated row or, on failure, to
+# the locked row (a locking read sees the latest committed version), which tells
+# stale / invalid_transition / not_found apart without another query.
+_TRANSITION_SQL = """
+WITH input AS (
+    SELECT * FROM unnest(%(idx)s::int[], %(ids)s::uuid[], %(versions)s::int[],
+                         %(totals)s::int[], %(event_ids)s::uuid[])
+        AS i(idx, id, expected_version, total_cents, event_id)
+),
+locked AS (
+    SELECT o.id, o.version, o.total_cents FROM {order_table} o
+    WHERE o.tenant_id = %(tenant_id)s AND o.id IN (SELECT id FROM input)
+    ORDER BY o.id
+    FOR UPDATE
+),
+updated AS (
+    UPDATE {order_table} AS o
+    SET status = %(to_status)s,
+        version = o.version + 1,
+        total_cents = COALESCE(i.total_cents, o.total_cents),
+        updated_at = %(now)s
+    FROM input i
+    WHERE o.id = i.id AND o.id IN (SELECT id FROM locked)
+      AND o.version = i.expected_version AND o.status = %(from_status)s
+    RETURNING {returning}, i.event_id
+),
+stats AS (
+    -- one row per status, upserted in status order so concurrent batches lock alike
+    INSERT INTO {stats_table} AS s (tenant_id, status, order_count, total_cents)
+    SELECT %(tenant_id)s, d.status, SUM(d.n), SUM(d.cents)
+    FROM updated u
+    JOIN locked l ON l.id = u.id
+    CROSS JOIN LATERAL (VALUES (%(from_status)s, -1, -COALESCE(l.total_cents, 0)),
+                               (%(to_status)s, 1, COALESCE(u.total_cents, 0))) AS d(status, n, cents)
+    GROUP BY d.status
+    ORDER BY d.status
+    ON CONFLICT (tenant_id, status) DO UPDATE
+        SET order_count = s.order_count + EXCLUDED.order_count,
+            total_cents = s.total_cents + EXCLUDED.total_cents
+){extra}
+SELECT i.idx, i.id, u.id IS NOT NULL, {selected}, l.version, i.expected_version
+FROM input i
+LEFT JOIN updated u ON u.id = i.id
+LEFT JOIN locked l ON l.id = i.id
+ORDER BY i.idx
+"""
+
+_OUTBOX_CTE = """,
+outbox AS (
+    INSERT INTO {outbox_table} (id, event_type, order_id, tenant_id, payload, published_at, created_at)
+    SELECT u.event_id, 'orders.closed', u.id, u.tenant_id,
+           jsonb_build_object('orderId', u.id::text, 'tenantId', u.tenant_id,
+                              'totalCents', u.total_cents, 'closedAt', %(now_iso)s::text),
+           NULL, %(now)s
+    FROM updated u
+)"""
+
+
+def _build_sql(extra=""):
+    return _TRANSITION_SQL.format(
+        order_table=Order._meta.db_table,
+        stats_table=TenantOrderStats._meta.db_table,
+        returning=", ".join(f"o.{c}" for c in ORDER_COLUMNS),
+        selected=", ".join(f"u.{c}" for c in ORDER_COLUMNS),
+        extra=extra,
+    )
+
+
+_CONFIRM = PreparedStatement("orders_confirm", _build_sql())
+_CLOSE = PreparedStatement("orders_close", _build_sql(_OUTBOX_CTE.format(outbox_table=Outbox._meta.db_table)))
+
+
+def _run(statement, tenant_id, items, from_status, to_status, with_events=False):
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        statement.execute(cursor, {
+            "idx": list(range(len(items))),
+            "ids": [str(item["id"]) for item in items],
+            "versions": [item["version"] for item in items],
+            "totals": [item.get("totalCents") for item in items],
+            "event_ids": [str(new_id()) if with_events else None for _ in items],
+            "tenant_id": tenant_id,
+            "from_status": from_status,
+            "to_status": to_status,
+            "now": now,
+            "now_iso": now.isoformat(),
+        })
+        rows = cursor.fetchall()
+
+    width = len(ORDER_COLUMNS)
+    results = []
+    for row in rows:
+        id_, ok = row[1], row[2]
+        current_version, expected_version = row[3 + width], row[4 + width]
+        if ok:
+            results.append(Result(id_, row[3:3 + width], None))
+        elif current_version is None:
+            results.append(Result(id_, None, NOT_FOUND))
+        elif current_version != expected_version:
+            results.append(Result(id_, None, STALE))
+        else:
+            results.append(Result(id_, None, INVALID_TRANSITION))
+    return results
+
+
+def confirm_orders(tenant_id, items):
+    """
+    draft -> confirmed for a list of {id, version, totalCents} items (ids unique).
+    Returns one Result per item, in input order.
+    """
+    return _run(_CONFIRM, tenant_id, items, Order.Status.DRAFT, Order.Status.CONFIRMED)
+
+
+def close_orders(tenant_id, items):
+    """
+    confirmed -> closed for a list of {id, version} items (ids unique). The
+    orders.closed outbox rows are inserted by the same statement.
+    """
+    return _run(_CLOSE, tenant_id, items, Order.Status.CONFIRMED, Order.Status.CLOSED, with_events=True)
+
+
+def confirm_order(tenant_id, id, expected_version, total_cents):
+    return confirm_orders(tenant_id, [{"id": id, "version": expected_version, "totalCents": total_cents}])[0]
+
+
+def close_order(tenant_id, id, expected_version):
+    return close_orders(tenant_id, [{"id": id, "version": expected_version}])[0]
@@ -15,14 +15,37 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
 from django.urls import path
-from .views import OrderCreateView, OrderConfirmView, OrderCloseView, OrderListView
+from .views import (
+    OrderCreateView, OrderBatchCreateView, OrderConfirmView, OrderCloseView, OrderListView,
+    OrderBatchConfirmView, OrderBatchCloseView, OrderExportView, OrderStatsView,
+    OrderDetailView, OrderMultiGetView, OrderChangesView,
+)
+
+if settings.ORDERS_ASYNC_VIEWS:
+    # read endpoints served by native async handlers (see config/asgi.py)
+    from .async_views import (
+        AsyncOrderListView as OrderListView,
+        AsyncOrderDetailView as OrderDetailView,
+        AsyncOrderMultiGetView as OrderMultiGetView,
+        AsyncOrderChangesView as OrderChangesView,
+        AsyncOrderExportView as OrderExportView,
+    )
 
 
 
 urlpatterns = [
     path('', OrderCreateView.as_view(), name='order-create'),
+    path('batch', OrderBatchCreateView.as_view(), name='order-batch-create'),
+    path('batch/confirm', OrderBatchConfirmView.as_view(), name='order-batch-confirm'),
+    path('batch/close', OrderBatchCloseView.as_view(), name='order-batch-close'),
+    path('<uuid:id>', OrderDetailView.as_view(), name='order-detail'),
+    path('multi', OrderMultiGetView.as_view(), name='order-multi-get'),
     path('<uuid:id>/confirm', OrderConfirmView.as_view(), name='order-confirm'),
     path('<uuid:id>/close', OrderCloseView.as_view(), name='order-close'),
     path('list', OrderListView.as_view(), name='order-list'),  # or reuse /orders with GET
+    path('changes', OrderChangesView.as_view(), name='order-changes'),
+    path('export', OrderExportView.as_view(), name='order-export'),
+    path('stats', OrderStatsView.as_view(), name='order-stats'),
 ]
@@ -2,27 +2,74 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import F
-from .models import Order, Outbox
-from .serializers import OrderSerializer, ConfirmSerializer
+from .models import Order
+from .serializers import (
+    INT_MAX, ConfirmSerializer, BatchCreateSerializer,
+    BatchConfirmSerializer, BatchTransitionSerializer,
+)
 from .idempotency import idempotent_endpoint
-from .pagination import KeysetPagination
+from . import idempotency
+from .batching import get_create_batcher
+from .encoders import ORDER_COLUMNS, VERSION, encode_order, encode_row, encode_rows
+from .bulk import create_orders
+from . import transitions
+from .pagination import KeysetPagination, InvalidCursor
+from .filters import FilterError, created_range, list_filters
+from . import archive
+from . import export
+from . import stats
+from . import reads
+from . import changes
+from . import metrics
+from django.conf import settings
 
 
 class OrderCreateView(APIView):
     """
-    POST /orders  (idempotent via decorator)
+    POST /orders  (idempotent via decorator, or group-committed with other
+    concurrent creates when ORDERS_CREATE_BATCHING is on)
     """
+    def post(self, request):
+        batcher = get_create_batcher()
+        if batcher is not None:
+            return _batched_create(batcher, request)
+        return self.create(request)
+
     @idempotent_endpoint
+    def create(self, request):
+        # already in the decorator's transaction, which also stores the response
+        tenant_id = request.tenant_id
+        order = Order.objects.create(tenant_id=tenant_id, status=Order.Status.DRAFT, version=1)
+        stats.record_created(tenant_id)
+        return Response(encode_order(order), status=status.HTTP_200_OK)
+
+
+def _batched_create(batcher, request):
+    tenant_id, key, request_hash, error = idempotency.request_key(request)
+    if error is not None:
+        return error
+    outcome, data = batcher.submit((tenant_id, key, request_hash))
+    if outcome == idempotency.CONFLICT:
+        return idempotency.conflict_response()
+    if outcome == idempotency.IN_FLIGHT:
+        return idempotency.in_progress_response()
+    return Response(data, status=status.HTTP_200_OK)
+
+
+class OrderBatchCreateView(APIView):
+    """
+    POST /orders/batch  (one Idempotency-Key per item, in the item's idempotencyKey)
+    """
     def post(self, request):
         tenant_id = request.tenant_id
-       
-        with transaction.atomic():
-            order = Order.objects.create(tenant_id=tenant_id, status=Order.Status.DRAFT, version=1)
-        serializer = OrderSerializer(order)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+
+        ser = BatchCreateSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        results = create_orders(tenant_id, ser.validated_data['items'])
+        return Response({"items": results}, status=status.HTTP_200_OK)
 
 
 class OrderConfirmView(APIView):
@@ -36,40 +83,16 @@ class OrderConfirmView(APIView):
         ser.is_valid(raise_exception=True)
         total_cents = ser.validated_data['totalCents']
 
-        if_match = request.headers.get("If-Match")
-        if not if_match:
-            return Response({"code":"missing_if_match","message":"If-Match header required"}, status=400)
-        
-        try:
-            expected_version = int(if_match.strip().strip('"'))
-        except Exception:
-            return Response({"code":"invalid_if_match","message":"If-Match header must be an integer version"}, status=400)
-
-        with transaction.atomic():
-            updated = Order.objects.filter(id=id, tenant_id=tenant_id, version=expected_version, status=Order.Status.DRAFT).update(
-                version=F('version') + 1,
-                status=Order.Status.CONFIRMED,
-                total_cents=total_cents,
-                updated_at=timezone.now()
-            )
-            if updated == 0:
-                try:
-                    order = Order.objects.get(id=id, tenant_id=tenant_id)
-                    if order.version != expected_version:
-                        return Response({"code":"conflict","message":"stale version"}, status=409)
-                    if order.status != Order.Status.DRAFT:
-                        return Response({"code":"invalid_transition","message":"only draft -> confirmed allowed"}, status=400)
-                except Order.DoesNotExist:
-                    return Response({"code":"not_found","message":"order not found"}, status=404)
-            order = Order.objects.get(id=id, tenant_id=tenant_id)
-      
-        out = {
-            "id": str(order.id),
-            "status": order.status,
-            "version": order.version,
-            "totalCents": order.total_cents
-        }
-        return Response(out, status=200)
+        expected_version, error = _parse_if_match(request)
+        if error is not None:
+            return error
+
+        result = transitions.confirm_order(tenant_id, id, expected_version, total_cents)
+        if result.error is not None:
+            return _transition_error(result.error, "only draft -> confirmed allowed")
+
+        reads.remember_version(tenant_id, result.id, result.order[VERSION])
+        return Response(encode_row(result.order), status=200, headers={"ETag": reads.etag(result.order[VERSION])})
 
 
 class OrderCloseView(APIView):
@@ -79,50 +102,228 @@ class OrderCloseView(APIView):
     def post(self, request, id):
         tenant_id = request.tenant_id
 
-        if_match = request.headers.get("If-Match")
-        if not if_match:
-            return Response({"code":"missing_if_match","message":"If-Match header required"}, status=400)
-        try:
-            expected_version = int(if_match.strip().strip('"'))
-        except Exception:
-            return Response({"code":"invalid_if_match","message":"If-Match header must be an integer version"}, status=400)
+        expected_version, error = _parse_if_match(request)
+        if error is not None:
+            return error
+
+        # one statement updates the order and inserts its outbox row
+        result = transitions.close_order(tenant_id, id, expected_version)
+        if result.error is not None:
+            return _transition_error(result.error, "order must be confirmed to be closed")
+
+        reads.remember_version(tenant_id, result.id, result.order[VERSION])
+        return Response(encode_row(result.order), status=200, headers={"ETag": reads.etag(result.order[VERSION])})
+
+
+def _parse_if_match(request):
+    if_match = request.headers.get("If-Match")
+    if not if_match:
+        return None, Response({"code":"missing_if_match","message":"If-Match header required"}, status=400)
+    try:
+        version = int(if_match.strip().strip('"'))
+    except Exception:
+        return None, Response({"code":"invalid_if_match","message":"If-Match header must be an integer version"}, status=400)
+    if not -INT_MAX - 1 <= version <= INT_MAX:
+        # no stored version is that large, so it is stale like any other mismatch
+        return None, Response({"code":"conflict","message":"stale version"}, status=409)
+    return version, None
+
 
-        with transaction.atomic():
-            qs = Order.objects.select_for_update().filter(id=id, tenant_id=tenant_id)
-            try:
-                order = qs.get()
-            except Order.DoesNotExist:
-                return Response({"code":"not_found","message":"order not found"}, status=404)
+def _transition_error(code, invalid_transition_message):
+    if code == transitions.NOT_FOUND:
+        return Response({"code":"not_found","message":"order not found"}, status=404)
+    if code == transitions.STALE:
+        return Response({"code":"conflict","message":"stale version"}, status=409)
+    return Response({"code":"invalid_transition","message":invalid_transition_message}, status=400)
 
-            if order.version != expected_version:
-                return Response({"code":"conflict","message":"stale version"}, status=409)
-            if order.status != Order.Status.CONFIRMED:
-                return Response({"code":"invalid_transition","message":"order must be confirmed to be closed"}, status=400)
 
-            order.status = Order.Status.CLOSED
-            order.version = F('version') + 1
-            order.save(update_fields=['status','version','updated_at'])
+def _remember_versions(tenant_id, results):
+    for result in results:
+        if result.error is None:
+            reads.remember_version(tenant_id, result.id, result.order[VERSION])
 
-            order.refresh_from_db()
 
-            payload = {
-                "orderId": str(order.id),
-                "tenantId": tenant_id,
-                "totalCents": order.total_cents,
-                "closedAt": timezone.now().isoformat()
-            }
-            Outbox.objects.create(event_type="orders.closed", order_id=order.id, tenant_id=tenant_id, payload=payload)
+_BATCH_ERRORS = {
+    transitions.NOT_FOUND: "order not found",
+    transitions.STALE: "stale version",
+    transitions.INVALID_TRANSITION: "invalid status for this transition",
+}
 
-        return Response({"id": str(order.id), "status": order.status, "version": order.version}, status=200)
 
+def _batch_item(result):
+    if result.error is not None:
+        return {"id": str(result.id), "ok": False, "code": result.error, "message": _BATCH_ERRORS[result.error]}
+    return {"id": str(result.id), "ok": True, "order": encode_row(result.order)}
+
+
+class OrderBatchConfirmView(APIView):
+    """
+    PATCH /orders/batch/confirm  (per-item expected version instead of If-Match)
+    """
+    def patch(self, request):
+        tenant_id = request.tenant_id
+
+        ser = BatchConfirmSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        results = transitions.confirm_orders(tenant_id, ser.validated_data['items'])
+        _remember_versions(tenant_id, results)
+        return Response({"items": [_batch_item(r) for r in results]}, status=200)
+
+
+class OrderBatchCloseView(APIView):
+    """
+    POST /orders/batch/close  (transactional close and write outbox for every item)
+    """
+    def post(self, request):
+        tenant_id = request.tenant_id
+
+        ser = BatchTransitionSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        results = transitions.close_orders(tenant_id, ser.validated_data['items'])
+        _remember_versions(tenant_id, results)
+        return Response({"items": [_batch_item(r) for r in results]}, status=200)
+
+
+class OrderDetailView(APIView):
+    """
+    GET /orders/{id}  (ETag is the version; If-None-Match answers 304)
+    """
+    def get(self, request, id):
+        tenant_id = request.tenant_id
+
+        tags = reads.if_none_match(request.headers.get("If-None-Match"))
+        if tags is not None:
+            # a recently seen version answers the conditional GET without a query
+            version = reads.cached_version(tenant_id, id)
+            if version is not None and reads.not_modified(version, tags):
+                return Response(status=304, headers={"ETag": reads.etag(version)})
+
+        row = reads.get_order(tenant_id, id)
+        if row is None:
+            return Response({"code":"not_found","message":"order not found"}, status=404)
+        if reads.not_modified(row[VERSION], tags):
+            return Response(status=304, headers={"ETag": reads.etag(row[VERSION])})
+        return Response(encode_row(row), status=200, headers={"ETag": reads.etag(row[VERSION])})
+
+
+class OrderMultiGetView(APIView):
+    """
+    GET /orders/multi?ids=<id>,<id>,...  (one query; unknown ids are listed in "missing")
+    """
+    def get(self, request):
+        tenant_id = request.tenant_id
+        try:
+            ids = reads.parse_ids(request.query_params.getlist("ids"), settings.ORDERS_BATCH_MAX_ITEMS)
+        except ValueError as exc:
+            return Response({"code":"invalid_ids","message":str(exc)}, status=400)
+
+        rows = reads.get_orders(tenant_id, ids)
+        tz = timezone.get_current_timezone()
+        return Response({
+            "items": [encode_row(rows[i], tz) for i in ids if i in rows],
+            "missing": [str(i) for i in ids if i not in rows],
+        }, status=200)
 
 
 class OrderListView(APIView):
     
     def get(self, request):
         tenant_id = request.tenant_id
-        qs = Order.objects.filter(tenant_id=tenant_id)
+        try:
+            filters, filter_key = list_filters(request.query_params)
+        except FilterError as exc:
+            return Response({"code":"invalid_filter","message":str(exc)}, status=400)
+
         paginator = KeysetPagination()
-        items, next_cursor = paginator.paginate_queryset(qs, request)
-        serializer = OrderSerializer(items, many=True)
-        return paginator.get_paginated_response(serializer.data, next_cursor)
+        try:
+            limit = paginator.get_limit(request)
+        except ValueError as exc:
+            return Response({"code":"invalid_param","message":str(exc)}, status=400)
+
+        archived = archive.archived_orders(tenant_id, filters)
+        if archived is not None:
+            archived = archived.values_list(*ORDER_COLUMNS, named=True)
+        if not filters and not request.query_params.get("cursor"):
+            # first unfiltered page: a prepared statement
+            rows = paginator.with_archive(reads.first_page(tenant_id, limit + 1), limit, archived, request)
+            items, next_cursor = paginator.page_from_rows(rows, limit)
+            return paginator.get_paginated_response(encode_rows(items), next_cursor)
+
+        # named rows keep attribute access for the cursor without building models
+        qs = Order.objects.filter(tenant_id=tenant_id, **filters).values_list(*ORDER_COLUMNS, named=True)
+        try:
+            items, next_cursor = paginator.paginate_queryset(qs, request, filter_key=filter_key, archived=archived)
+        except InvalidCursor as exc:
+            return Response({"code":"invalid_cursor","message":str(exc)}, status=400)
+        return paginator.get_paginated_response(encode_rows(items), next_cursor)
+
+
+class OrderChangesView(APIView):
+    """
+    GET /orders/changes?since=<cursor>&limit=&wait=<seconds>
+    (orders changed since the cursor, oldest change first; wait long-polls)
+    """
+    def get(self, request):
+        tenant_id = request.tenant_id
+        cursor = request.query_params.get("since")
+        try:
+            since, limit, wait = changes.parse_params(request.query_params)
+        except InvalidCursor as exc:
+            return Response({"code":"invalid_cursor","message":str(exc)}, status=400)
+        except ValueError as exc:
+            return Response({"code":"invalid_param","message":str(exc)}, status=400)
+
+        if wait:
+            rows, has_more = changes.wait_for_changes(tenant_id, since, limit, wait)
+        else:
+            rows, has_more = changes.changes_page(tenant_id, since, limit)
+        return Response({
+            "items": encode_rows(rows),
+            "nextCursor": changes.next_cursor(rows, cursor),
+            "hasMore": has_more,
+        }, status=200)
+
+
+class OrderExportView(APIView):
+    """
+    GET /orders/export?output=ndjson|csv  (streams every order of the tenant)
+    """
+    def get(self, request):
+        tenant_id = request.tenant_id
+
+        output = request.query_params.get("output", "ndjson")
+        if output not in ("ndjson", "csv"):
+            return Response({"code":"invalid_output","message":"output must be ndjson or csv"}, status=400)
+        try:
+            filters = created_range(request.query_params)
+        except FilterError as exc:
+            return Response({"code":"invalid_filter","message":str(exc)}, status=400)
+
+        qs = Order.objects.filter(tenant_id=tenant_id, **filters)
+        archived = archive.archived_orders(tenant_id, filters)
+        if output == "csv":
+            response = StreamingHttpResponse(export.csv_lines(qs, archived), content_type="text/csv")
+            response["Content-Disposition"] = 'attachment; filename="orders.csv"'
+        else:
+            response = StreamingHttpResponse(export.ndjson_lines(qs, archived), content_type="application/x-ndjson")
+        return response
+
+
+class OrderStatsView(APIView):
+    """
+    GET /orders/stats  (per-status counts and totals, read from maintained counters)
+    """
+    def get(self, request):
+        return Response(stats.tenant_stats(request.tenant_id), status=200)
+
+
+class MetricsView(APIView):
+    """
+    GET /metrics  (this process's request metrics in Prometheus text format; not tenant scoped)
+    """
+    def get(self, request):
+        if not metrics.enabled():
+            return Response({"code":"metrics_disabled","message":"metrics are not enabled"}, status=404)
+        return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
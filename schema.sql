@@ -15,6 +15,32 @@ CREATE TABLE orders_app_order (
 CREATE INDEX orders_tenant_created_id_idx 
     ON orders_app_order (tenant_id, created_at DESC, id DESC);
 
+-- Index for status-filtered list pages
+CREATE INDEX orders_tenant_status_idx
+    ON orders_app_order (tenant_id, status, created_at DESC, id DESC);
+
+-- Index for the updatedSince filter
+CREATE INDEX orders_tenant_updated_idx
+    ON orders_app_order (tenant_id, updated_at, id);
+
+-- -----------------------------------------------------
+-- OrderArchive table (closed orders moved out by archive_orders)
+-- -----------------------------------------------------
+CREATE TABLE orders_app_orderarchive (
+    id UUID PRIMARY KEY,
+    tenant_id VARCHAR(255) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    version INT NOT NULL,
+    total_cents INT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- List pages past the hot window
+CREATE INDEX archive_tenant_created_id_idx
+    ON orders_app_orderarchive (tenant_id, created_at DESC, id DESC);
+
 -- -----------------------------------------------------
 -- Outbox table
 -- -----------------------------------------------------
@@ -32,18 +58,46 @@ CREATE TABLE orders_app_outbox (
 CREATE INDEX outbox_tenant_created_idx
     ON orders_app_outbox (tenant_id, created_at);
 
+-- Partial index over pending events only (used by the outbox relay)
+CREATE INDEX outbox_unpublished_idx
+    ON orders_app_outbox (created_at)
+    WHERE published_at IS NULL;
+
 -- -----------------------------------------------------
 -- IdempotencyKey table
 -- -----------------------------------------------------
 CREATE TABLE orders_app_idempotencykey (
     tenant_id VARCHAR(255) NOT NULL,
     key VARCHAR(255) NOT NULL,
-    request_body BYTEA,
+    request_hash VARCHAR(64),
     response_json JSONB,
+    state VARCHAR(20) NOT NULL DEFAULT 'in_progress',
     created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
     PRIMARY KEY (tenant_id, key)
 );
 
--- Index for tenant_id + key (redundant with PK but for faster lookups)
-CREATE INDEX idempotency_tenant_key_idx
-    ON orders_app_idempotencykey (tenant_id, key);
+-- Index for the expiry sweeper (purge_idempotency_keys)
+CREATE INDEX idempotency_created_idx
+    ON orders_app_idempotencykey (created_at);
+
+-- -----------------------------------------------------
+-- TenantOrderStats table (per-tenant counters kept in step by every write)
+-- -----------------------------------------------------
+CREATE TABLE orders_app_tenantorderstats (
+    tenant_id VARCHAR(255) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    order_count BIGINT NOT NULL DEFAULT 0,
+    total_cents BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, status)
+);
+
+-- -----------------------------------------------------
+-- Tenant table (X-Tenant-Id values accepted when tenant validation is on)
+-- -----------------------------------------------------
+CREATE TABLE orders_app_tenant (
+    id VARCHAR(255) PRIMARY KEY,
+    name VARCHAR(255) NOT NULL DEFAULT '',
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    config JSONB NOT NULL DEFAULT '{}'::jsonb,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);